@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# benchmarks/bench_parse.py
+"""
+Rule-parser latency, current tree against an earlier revision.
+
+Times parse_intent() on short commands, a ticket-style paragraph and a long
+operator command, using the working tree's yurei/core/intents.py and the
+same file from a git revision (the baseline commit by default). Exits
+non-zero if the current parser is slower than the revision on any workload.
+
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --against HEAD~3 --n 5000
+"""
+import argparse
+import importlib.util
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SHORT = [
+    "scan 10.0.0.1 top 100",
+    "udp scan 192.168.1.0/24 ports 53,161",
+    "vuln scan example.com consent",
+    "ping 10.0.0.0/24",
+    "check web on shop.example.co.uk -v",
+    "smb enum ms17-010 on 10.1.1.1",
+    "run an aggressive scan of 10.2.3.4 p 22-25",
+    "scan 10.0.0.0/16 workers 8 fresh",
+]
+# the kind of paragraph pasted in from a ticket (279 characters)
+TICKET = ("Hi team, following up on INC-4471: since the weekend change window the finance subnet "
+          "10.20.30.0/24 keeps timing out. Could someone scan it for open ports 22,80,443 and 3389, "
+          "check whether smb is exposed on files.corp.example.com and keep the output verbose? "
+          "Thanks, Dana from IT")
+# a long saved operator command that names its hosts rather than giving addresses (878 characters)
+LONG = ("run the weekly external exposure check against the public web tier: www.example.com, shop.example.com, "
+        "api.example.com, status.example.com and the two mail relays mx1.example.net and mx2.example.net. "
+        "Use service version detection and os detection, keep the output verbose and save everything under the "
+        "usual reports directory so the diff job picks it up. Skip the vulnerability scripts this time because "
+        "the vendor asked us not to hammer the api during their migration, but do include the smb and http "
+        "enumeration on anything that answers. If a host does not respond, note it in the summary rather than "
+        "retrying it all night; the previous run took far too long because of that. This is covered by the "
+        "standing authorization from the security office for the external estate, and the on-call engineer "
+        "has been told to expect the traffic between now and the end of the working day.")
+
+WORKLOADS = {"short": SHORT, "ticket": [TICKET], "long": [LONG]}
+
+def _baseline_rev() -> str:
+    out = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()[-1]
+
+def load_revision(rev: str):
+    """intents.py as of rev, as a module inside yurei.core (so its relative imports resolve)."""
+    source = subprocess.run(["git", "show", f"{rev}:yurei/core/intents.py"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    import yurei.core  # noqa: F401  (package for the relative imports)
+    spec = importlib.util.spec_from_loader(f"yurei.core._intents_{rev[:12]}", loader=None)
+    module = importlib.util.module_from_spec(spec)
+    module.__package__ = "yurei.core"
+    exec(compile(source, f"{rev}:yurei/core/intents.py", "exec"), module.__dict__)
+    return module
+
+def _round(parse, texts, reps):
+    t0 = time.perf_counter_ns()
+    for _ in range(reps):
+        for text in texts:
+            parse(text)
+    return (time.perf_counter_ns() - t0) / (reps * len(texts)) / 1000
+
+def measure(current, previous, texts, n, reps):
+    """
+    Both parsers timed in alternating rounds, so load on the box hits them
+    alike. A round parses the texts reps times over, the way a batch of lines
+    goes through; the figures are per parse.
+    """
+    for text in texts:
+        current(text)
+        previous(text)
+    now, then = [], []
+    for _ in range(n):
+        now.append(_round(current, texts, reps))
+        then.append(_round(previous, texts, reps))
+    return _stats(now), _stats(then)
+
+def _stats(samples):
+    samples.sort()
+    return {"mean_us": round(statistics.fmean(samples), 2), "p50_us": round(samples[len(samples) // 2], 2)}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--against", default=None, help="git revision to compare with (default: the baseline commit)")
+    ap.add_argument("--n", type=int, default=500, help="timed rounds per workload")
+    ap.add_argument("--reps", type=int, default=20, help="passes over the workload per round")
+    args = ap.parse_args()
+
+    from yurei.core import intents as current
+    rev = args.against or _baseline_rev()
+    previous = load_revision(rev)
+    report, slower = {"against": rev, "workloads": {}}, []
+    for name, texts in WORKLOADS.items():
+        now, then = measure(current.parse_intent, previous.parse_intent, texts, args.n, args.reps)
+        report["workloads"][name] = {"current": now, "against": then,
+                                     "speedup": round(then["p50_us"] / now["p50_us"], 2)}
+        if now["p50_us"] > then["p50_us"]:
+            slower.append(name)
+    report["slower"] = slower
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if slower else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# benchmarks/bench_startup.py
+"""
+Startup-time guard for the CLI.
+
+Runs `python -X importtime -m yurei.cli <cmd>` to report the most expensive
+imports, checks that short commands do not pull in heavy modules, and times
+repeated wall-clock runs against a target. Exits non-zero on a regression.
+
+    python benchmarks/bench_startup.py --runs 20 --target-ms 250
+"""
+import argparse
+import json
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must stay out of `yurei version` (the default command).
+FORBIDDEN = (
+    "requests",
+    "rich.console",
+    "sqlite3",
+    "yurei.core.router",
+    "yurei.core.llm.mistral_client",
+    "yurei.plugins.nmap_plugin",
+)
+
+def importtime(cmd):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "yurei.cli"] + cmd,
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        rows.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+def wall_clock(cmd, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "yurei.cli"] + cmd, cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--cmd", default="version", help="CLI arguments to benchmark (space separated)")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--target-ms", type=float, default=250.0, help="Fail if the median run is slower")
+    ap.add_argument("--top", type=int, default=15, help="How many imports to list")
+    ap.add_argument("--forbid", default=",".join(FORBIDDEN),
+                    help="Comma-separated modules the command must not import ('' to skip the check)")
+    args = ap.parse_args()
+    cmd = shlex.split(args.cmd)
+
+    rows = importtime(cmd)
+    loaded = {r["module"] for r in rows}
+    forbidden = [m for m in args.forbid.split(",") if m and m in loaded]
+    samples = wall_clock(cmd, args.runs)
+    median = statistics.median(samples)
+    report = {
+        "command": ["yurei"] + cmd,
+        "runs": args.runs,
+        "wall_ms": {"median": round(median, 1), "min": round(min(samples), 1), "max": round(max(samples), 1)},
+        "target_ms": args.target_ms,
+        "modules_imported": len(rows),
+        "top_imports": sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:args.top],
+        "forbidden_imports": forbidden,
+        "ok": median <= args.target_ms and not forbidden,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
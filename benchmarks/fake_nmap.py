@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# benchmarks/fake_nmap.py
+"""
+Stand-in `nmap` executable for benchmarks. Put a copy named `nmap` on PATH
+(benchmarks/run.py does this in a temp dir).
+
+It ignores the scan arguments and writes nmap-style XML to stdout, either
+replaying a recorded file or synthesising hosts/ports:
+
+    FAKE_NMAP_REPLAY=scan.xml   replay a recorded -oX file
+    FAKE_NMAP_REPEAT=10         ...repeating its <host> elements N times
+    FAKE_NMAP_HOSTS=256         synthesise N hosts (default 16)
+    FAKE_NMAP_PORTS=20          open ports per synthesised host (default 5)
+    FAKE_NMAP_DELAY=0.01        seconds to sleep before each host
+"""
+import os
+import re
+import sys
+import time
+
+HOST_RE = re.compile(r"<host[ >].*?</host>", re.S)
+
+def _header(args):
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE nmaprun>\n'
+            f'<nmaprun scanner="nmap" args="nmap {" ".join(args)}" start="{int(time.time())}" version="7.94">\n')
+
+def _footer(count, started):
+    elapsed = time.time() - started
+    return (f'<runstats><finished time="{int(time.time())}" elapsed="{elapsed:.2f}" '
+            f'summary="Nmap done: {count} IP addresses ({count} hosts up) scanned in {elapsed:.2f} seconds"/>'
+            f'<hosts up="{count}" down="0" total="{count}"/></runstats>\n</nmaprun>\n')
+
+def _synth_host(i, ports):
+    addr = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+    out = [f'<host><status state="up" reason="syn-ack"/><address addr="{addr}" addrtype="ipv4"/>'
+           f'<hostnames><hostname name="host{i}.bench.lan" type="PTR"/></hostnames><ports>']
+    for p in range(ports):
+        out.append(f'<port protocol="tcp" portid="{20 + p}"><state state="open" reason="syn-ack"/>'
+                   f'<service name="svc{p % 7}" product="BenchD" version="{p % 3}.0"/></port>')
+    out.append('</ports><times srtt="900" rttvar="300" to="100000"/></host>\n')
+    return "".join(out)
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] in ("-V", "--version"):
+        print("Nmap version 7.94 ( fake )")
+        return 0
+    delay = float(os.getenv("FAKE_NMAP_DELAY", "0"))
+    started = time.time()
+    out = sys.stdout
+    out.write(_header(args))
+    count = 0
+    replay = os.getenv("FAKE_NMAP_REPLAY")
+    if replay:
+        with open(replay, encoding="utf-8") as fh:
+            hosts = HOST_RE.findall(fh.read())
+        for _ in range(int(os.getenv("FAKE_NMAP_REPEAT", "1"))):
+            for host in hosts:
+                if delay:
+                    time.sleep(delay)
+                out.write(host + "\n")
+                count += 1
+    else:
+        ports = int(os.getenv("FAKE_NMAP_PORTS", "5"))
+        for i in range(int(os.getenv("FAKE_NMAP_HOSTS", "16"))):
+            if delay:
+                time.sleep(delay)
+            out.write(_synth_host(i, ports))
+            out.flush()
+            count += 1
+    out.write(_footer(count, started))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
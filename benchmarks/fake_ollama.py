@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# benchmarks/fake_ollama.py
+"""
+Local stand-in for Ollama's OpenAI-compatible API, for offline benchmarks.
+
+Serves POST /v1/chat/completions (streamed SSE or a plain JSON body) and
+POST /api/generate (warm-up). Latency is configurable: `latency` seconds
+before the first byte, then `token_delay` seconds per streamed token.
+After the JSON object it keeps emitting `trailing_tokens` of prose, like a
+chatty model would.
+
+    python benchmarks/fake_ollama.py --port 11434 --latency 0.5
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+REPLY = ('{"intent": "nmap_scan", "slots": {"target": "10.0.0.1", "ports": null, "top": 100}, '
+         '"required": ["target"], "missing": []}')
+
+class FakeOllama:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 token_delay: float = 0.0, trailing_tokens: int = 40, reply: str = REPLY):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.trailing_tokens = trailing_tokens
+        self.reply = reply
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _tokens(self):
+        reply = self.reply
+        tokens = [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        return tokens + [" and some more prose"] * self.trailing_tokens
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                fake.requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if self.path == "/api/generate":
+                    return self._json({"model": body.get("model"), "done": True, "response": ""})
+                if self.path != "/v1/chat/completions":
+                    self.send_error(404)
+                    return
+                if not body.get("stream"):
+                    return self._json({"choices": [{"message": {"role": "assistant",
+                                                                "content": "".join(fake._tokens())}}]})
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    limit = body.get("max_tokens") or 10 ** 9
+                    for i, tok in enumerate(fake._tokens()):
+                        if i >= limit:
+                            break
+                        event = {"choices": [{"index": 0, "delta": {"content": tok}}]}
+                        self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+                        if fake.token_delay:
+                            time.sleep(fake.token_delay)
+                    self._chunk(b"data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # client stopped reading early (expected with early JSON termination)
+                    self.close_connection = True
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def _json(self, obj):
+                data = json.dumps(obj).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--token-delay", type=float, default=0.0)
+    ap.add_argument("--trailing-tokens", type=int, default=40)
+    args = ap.parse_args()
+    server = FakeOllama(args.host, args.port, args.latency, args.token_delay, args.trailing_tokens)
+    print(f"fake ollama listening on {server.url}")
+    server.start()._thread.join()
+
+if __name__ == "__main__":
+    main()
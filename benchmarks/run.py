@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# benchmarks/run.py
+"""
+Offline benchmark suite for Yurei's own overhead.
+
+Covers rule parsing throughput, IntentEngine latency with and without the
+LLM path, router/DialogManager overhead and _run_nmap end to end. nmap is
+replaced by benchmarks/fake_nmap.py and Ollama by benchmarks/fake_ollama.py,
+so it runs on a box with neither. Results are printed (or written) as JSON
+for comparison across versions.
+
+    python benchmarks/run.py --output bench.json
+    python benchmarks/run.py --quick --only parse
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import stat
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+COMMANDS = [
+    "scan 10.0.0.1 top 100",
+    "udp scan 192.168.1.0/24 ports 53,161",
+    "vuln scan example.com consent",
+    "ping 10.0.0.0/24",
+    "check web on shop.example.co.uk -v",
+    "smb enum ms17-010 on 10.1.1.1",
+    "run an aggressive scan of 10.2.3.4 p 22-25",
+    "scan 10.0.0.0/16 workers 8 fresh",
+]
+UNRESOLVED = "have a look at the database box for me"
+
+def _stats(samples_ns, ops_per_call=1):
+    samples_us = [s / 1000 for s in samples_ns]
+    samples_us.sort()
+    mean = statistics.fmean(samples_us)
+    return {
+        "n": len(samples_us),
+        "mean_us": round(mean, 2),
+        "p50_us": round(samples_us[len(samples_us) // 2], 2),
+        "p95_us": round(samples_us[min(len(samples_us) - 1, int(len(samples_us) * 0.95))], 2),
+        "max_us": round(samples_us[-1], 2),
+        "ops_per_sec": round(ops_per_call * 1e6 / mean, 1) if mean else None,
+    }
+
+def measure(fn, n, warmup=3, ops_per_call=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return _stats(samples, ops_per_call)
+
+def _quiet_consoles():
+    devnull = open(os.devnull, "w")
+    from yurei.core import dialog, router
+    from yurei.plugins import nmap_plugin, nmap_shard
+    for mod in (dialog, router, nmap_plugin, nmap_shard):
+        mod.console.file = devnull
+
+def _install_fake_nmap(tmp: Path) -> None:
+    src = (Path(__file__).resolve().parent / "fake_nmap.py").read_text()
+    exe = tmp / "nmap"
+    exe.write_text(f"#!{sys.executable}\n" + src)
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}"
+
+def bench_parse(args):
+    from yurei.core import intents
+    lines = COMMANDS * 250
+    return {
+        "parse_intent": measure(lambda: [intents.parse_intent(c) for c in COMMANDS], args.n,
+                                ops_per_call=len(COMMANDS)),
+        "parse_many_2000": measure(lambda: intents.parse_many(lines), max(3, args.n // 20),
+                                   ops_per_call=len(lines)),
+    }
+
+def bench_engine(args):
+    from yurei.core.intent_engine import IntentEngine
+    from yurei.core.llm.mistral_client import MistralClient
+    from yurei.core.llm.cache import InferenceCache
+    from fake_ollama import FakeOllama
+
+    out = {"rules_only": measure(lambda: IntentEngine().parse(COMMANDS[0]), args.n)}
+    server = FakeOllama(latency=args.llm_latency, token_delay=args.token_delay).start()
+    try:
+        client = MistralClient(url=server.url, use_cache=False)
+        engine = IntentEngine(nlp=client, llm_deadline=None)
+        n_llm = max(3, args.n // 50)
+        out["llm_path"] = measure(lambda: engine.parse(UNRESOLVED), n_llm, warmup=1)
+        out["llm_tokens_saved_est_per_call"] = client.last_timings.get("tokens_saved_est")
+        deadline = IntentEngine(nlp=client, llm_deadline=args.llm_latency / 2)
+        out["llm_deadline_miss"] = measure(lambda: deadline.parse(UNRESOLVED), n_llm, warmup=1)
+        cached = MistralClient(url=server.url, cache=InferenceCache(client.model, "bench", persistent=False))
+        cached_engine = IntentEngine(nlp=cached)
+        out["llm_cached"] = measure(lambda: cached_engine.parse(UNRESOLVED), args.n, warmup=1)
+        out["fake_ollama_requests"] = server.requests
+    finally:
+        server.stop()
+    return out
+
+def bench_router(args):
+    from yurei.core.router import route, dm
+    from yurei.core.registry import registry
+    from yurei.core.intents import parse_intent
+
+    registry.register("bench_noop", lambda payload, user_input: None)
+    noop = {"intent": "bench_noop", "slots": {"target": "10.0.0.1"}, "required": [], "missing": []}
+
+    def dialog_round_trip():
+        payload = parse_intent("scan")
+        route(payload, "scan", session_id="bench")
+        dm.answer("bench", "10.0.0.1")
+
+    return {
+        "route_dispatch": measure(lambda: route(dict(noop), "noop"), args.n),
+        "dialog_round_trip": measure(dialog_round_trip, args.n),
+    }
+
+def bench_nmap(args):
+    from yurei.core import db
+    from yurei.plugins import nmap_plugin, nmap_timing
+    # the probe phase talks to the real network; it is measured on its own as nmap.probe
+    nmap_timing.ENABLED = False
+    os.environ["FAKE_NMAP_HOSTS"] = str(args.nmap_hosts)
+    os.environ["FAKE_NMAP_PORTS"] = str(args.nmap_ports)
+    os.environ["FAKE_NMAP_DELAY"] = str(args.nmap_delay)
+    nmap_plugin._opts.fresh = True
+    result = {}
+
+    def run():
+        result["scan"] = nmap_plugin._run_nmap(["nmap", "-sT", "10.0.0.0/24"], on_line=lambda line: None)
+
+    n = max(3, args.n // 100)
+    out = {"run_nmap": measure(run, n, warmup=1, ops_per_call=args.nmap_hosts)}
+    out["run_nmap"]["hosts"] = len(result["scan"].hosts)
+    out["run_nmap"]["ports"] = sum(len(h.ports) for h in result["scan"].hosts)
+    nmap_plugin._opts.fresh = False
+    nmap_plugin._run_nmap(["nmap", "-sT", "10.0.0.0/24"], on_line=lambda line: None)
+    db.flush()
+    out["run_nmap_cached"] = measure(run, n, warmup=0)
+    return out
+
+SUITES = {"parse": bench_parse, "engine": bench_engine, "router": bench_router, "nmap": bench_nmap}
+
+def main():
+    ap = argparse.ArgumentParser(description="Yurei offline benchmark suite")
+    ap.add_argument("--only", action="append", choices=sorted(SUITES), help="Run only these suites")
+    ap.add_argument("--n", type=int, default=500, help="Base iteration count")
+    ap.add_argument("--quick", action="store_true", help="Fewer iterations, smaller fake scans")
+    ap.add_argument("--llm-latency", type=float, default=0.2, help="Fake Ollama time to first byte (s)")
+    ap.add_argument("--token-delay", type=float, default=0.002, help="Fake Ollama delay per token (s)")
+    ap.add_argument("--nmap-hosts", type=int, default=256)
+    ap.add_argument("--nmap-ports", type=int, default=20)
+    ap.add_argument("--nmap-delay", type=float, default=0.0, help="Fake nmap delay per host (s)")
+    ap.add_argument("--output", help="Write JSON here instead of stdout")
+    args = ap.parse_args()
+    if args.quick:
+        args.n = min(args.n, 100)
+        args.nmap_hosts = min(args.nmap_hosts, 32)
+
+    tmp = Path(tempfile.mkdtemp(prefix="yurei-bench-"))
+    try:
+        # keep benchmark runs out of the real database
+        from yurei.core import db
+        db.DB_PATH = tmp / "bench.db"
+        _install_fake_nmap(tmp)
+        _quiet_consoles()
+        import yurei
+        report = {
+            "yurei_version": getattr(yurei, "__version__", "unknown"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": int(time.time()),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "only")},
+            "results": {},
+        }
+        for name in args.only or SUITES:
+            t0 = time.perf_counter()
+            report["results"][name] = SUITES[name](args)
+            report["results"][name]["suite_seconds"] = round(time.perf_counter() - t0, 3)
+    finally:
+        # queued writes must land before the temp database goes away
+        from yurei.core import db
+        db.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# tests/conftest.py
+import pytest
+from yurei.core import db
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """Point the shared connection and the writer at a fresh database file."""
+    db.close()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "yurei.db")
+    yield tmp_path / "yurei.db"
+    db.close()
@@ -0,0 +1,72 @@
+# tests/test_batch.py
+import io
+import threading
+import time
+import pytest
+from yurei.core import batch
+from yurei.core.intent_engine import IntentEngine
+from yurei.plugins.nmap_xml import Host, Port, ScanResult
+
+class StubRoute:
+    """Stands in for router.route: sleeps, tracks concurrency, fails targets listed in `fail`."""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.now = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, payload, command, session_id=None):
+        with self._lock:
+            self.calls.append(command)
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+        try:
+            time.sleep(self.delay)
+            target = payload["slots"]["target"]
+            host = Host(target, status="up", ports=[Port("tcp", 22, "open")])
+            return ScanResult(["nmap", target], [host], 1 if target in self.fail else 0)
+        finally:
+            with self._lock:
+                self.now -= 1
+
+def _run(monkeypatch, commands, stub, **kw):
+    monkeypatch.setattr(batch, "route", stub)
+    return batch.run_batch(commands, IntentEngine(), **kw)
+
+def test_read_commands(tmp_path, monkeypatch):
+    path = tmp_path / "cmds.txt"
+    path.write_text("# weekly\nscan 10.0.0.1\n\n   \n  ping 10.0.0.0/24  \n#scan 10.0.0.9\n")
+    assert batch.read_commands(str(path)) == ["scan 10.0.0.1", "ping 10.0.0.0/24"]
+    monkeypatch.setattr("sys.stdin", io.StringIO("10.0.0.1\n# skip\n10.0.0.2\n"))
+    assert batch.read_commands("-", template="scan {target} top 100") == \
+        ["scan 10.0.0.1 top 100", "scan 10.0.0.2 top 100"]
+
+def test_bounded_concurrency(monkeypatch):
+    stub = StubRoute(delay=0.05)
+    summary = _run(monkeypatch, [f"scan 10.0.0.{i}" for i in range(12)], stub, concurrency=3)
+    assert stub.peak == 3 and len(stub.calls) == 12
+    assert summary["counts"] == {"ok": 12}
+
+def test_fail_fast_cancels_the_rest(monkeypatch):
+    stub = StubRoute(delay=0.02, fail={"10.0.0.2"})
+    commands = [f"scan 10.0.0.{i}" for i in range(1, 9)]
+    summary = _run(monkeypatch, commands, stub, concurrency=1, fail_fast=True)
+    assert stub.calls == commands[:2]
+    assert summary["counts"] == {"ok": 1, "failed": 1, "cancelled": 6}
+    assert summary["policy"] == "fail-fast"
+
+def test_summary_counts_and_skips(monkeypatch):
+    stub = StubRoute(fail={"10.0.0.3"})
+    commands = ["scan 10.0.0.1", "make me a sandwich", "scan", "vuln scan 10.0.0.2", "scan 10.0.0.3"]
+    summary = _run(monkeypatch, commands, stub)
+    assert summary["total"] == 5 and summary["policy"] == "continue-on-error"
+    assert summary["counts"] == {"ok": 1, "skipped": 3, "failed": 1}
+    by_status = {e["command"]: (e["status"], e["error"]) for e in summary["results"]}
+    assert by_status["vuln scan 10.0.0.2"] == ("skipped", "requires consent (--consent)")
+    assert by_status["scan"] == ("skipped", "missing target")
+    ok = summary["results"][0]
+    assert (ok["hosts_up"], ok["open_ports"], ok["returncode"]) == (1, 1, 0)
+    # --consent lets the intrusive command through
+    assert _run(monkeypatch, ["vuln scan 10.0.0.2"], StubRoute(), consent=True)["counts"] == {"ok": 1}
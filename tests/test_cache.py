@@ -0,0 +1,62 @@
+# tests/test_cache.py
+import time
+import pytest
+from yurei.core import db
+from yurei.core.cache import ResultCache, make_key
+
+pytestmark = pytest.mark.usefixtures("tmp_db")
+
+def _put(cache, key, value, ttl=None):
+    cache.put(key, value, ttl=ttl)
+    db.flush()
+
+def test_hit_and_ttl_expiry():
+    cache = ResultCache("t", default_ttl=60)
+    _put(cache, "k", "v", ttl=0.2)
+    entry = cache.get("k")
+    assert entry["value"] == "v" and entry["expires"] - entry["created"] == pytest.approx(0.2)
+    time.sleep(0.3)
+    assert cache.get("k") is None
+
+def test_namespaces_are_isolated():
+    a, b = ResultCache("a"), ResultCache("b")
+    _put(a, "k", "from a")
+    assert b.get("k") is None
+    _put(b, "k", "from b")
+    assert (a.get("k")["value"], b.get("k")["value"]) == ("from a", "from b")
+    a.clear()
+    assert a.get("k") is None and b.get("k")["value"] == "from b"
+
+def test_drop_other_namespaces():
+    keep, old, other = ResultCache("llm:m:new"), ResultCache("llm:m:old"), ResultCache("llm_x")
+    for cache in (keep, old, other):
+        _put(cache, "k", cache.namespace)
+    keep.drop_other_namespaces("llm:m:")
+    db.flush()
+    assert keep.get("k") is not None and old.get("k") is None
+    # "_" in the prefix is literal, not a LIKE wildcard
+    keep.drop_other_namespaces("llm_")
+    db.flush()
+    assert other.get("k") is None and keep.get("k") is not None
+
+def test_lru_eviction_at_bound():
+    cache = ResultCache("lru", max_entries=3)
+    for key in "abc":
+        _put(cache, key, key)
+        time.sleep(0.01)
+    cache.get("a")  # most recently used now
+    db.flush()
+    time.sleep(0.01)
+    _put(cache, "d", "d")
+    assert [k for k in "abcd" if cache.get(k)] == ["a", "c", "d"]
+
+def test_hit_miss_counters():
+    cache = ResultCache("stats")
+    _put(cache, "k", "v")
+    cache.get("k")
+    cache.get("k")
+    cache.get("missing")
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+def test_make_key_is_order_stable():
+    assert make_key({"a": 1, "b": 2}) == make_key({"b": 2, "a": 1}) != make_key({"a": 2, "b": 1})
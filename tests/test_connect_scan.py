@@ -0,0 +1,96 @@
+# tests/test_connect_scan.py
+import asyncio
+import socket
+import time
+import pytest
+from yurei.plugins import connect_scan
+from yurei.plugins.nmap_xml import ScanResult, parse_xml
+
+@pytest.fixture
+def listener():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    yield sock.getsockname()[1]
+    sock.close()
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def _states(port_list, **kw):
+    seen = {}
+
+    async def run():
+        limiter = connect_scan._RateLimiter(0)
+        for port in port_list:
+            seen[port] = (await connect_scan._probe("127.0.0.1", port, limiter, kw.get("timeout", 1.0)))[0]
+    asyncio.run(run())
+    return seen
+
+def test_open_and_closed(listener, closed_port):
+    assert _states([listener, closed_port]) == {listener: "open", closed_port: "closed"}
+
+def test_timeout_is_filtered(monkeypatch, listener):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    monkeypatch.setattr(asyncio, "open_connection", hang)
+    t0 = time.perf_counter()
+    assert _states([listener], timeout=0.2) == {listener: "filtered"}
+    assert time.perf_counter() - t0 < 2
+
+def test_result_matches_nmap_shape(listener, closed_port):
+    hosts = []
+    result = connect_scan.scan("127.0.0.1", [listener, closed_port], on_host=hosts.append)
+    assert isinstance(result, ScanResult) and result.returncode == 0
+    assert hosts == result.hosts
+    (host,) = result.hosts
+    assert (host.address, host.addrtype, host.status) == ("127.0.0.1", "ipv4", "up")
+    assert host.srtt is not None
+    # open ports only, as nmap reports them
+    assert [(p.protocol, p.portid, p.state, p.reason) for p in host.ports] == [("tcp", listener, "open", "syn-ack")]
+    xml = ('<nmaprun><host><status state="up"/><address addr="127.0.0.1" addrtype="ipv4"/>'
+           f'<ports><port protocol="tcp" portid="{listener}"><state state="open" reason="syn-ack"/></port></ports>'
+           '<times srtt="100"/></host></nmaprun>')
+    nmap_host = parse_xml(xml).hosts[0]
+    for name in host.__slots__:
+        assert type(getattr(host, name)) is type(getattr(nmap_host, name)), name
+    assert ScanResult.from_dict(result.to_dict()).to_dict() == result.to_dict()
+
+def test_probe_cap_refuses():
+    with pytest.raises(ValueError, match="probes"):
+        connect_scan.scan("10.0.0.0/20", list(range(1, 65536)))
+
+def _instrumented(monkeypatch, delay=0.0):
+    """Record start times and peak concurrency of every connect."""
+    real = asyncio.open_connection
+    stats = {"now": 0, "peak": 0, "starts": []}
+
+    async def counted(*args, **kwargs):
+        stats["now"] += 1
+        stats["peak"] = max(stats["peak"], stats["now"])
+        stats["starts"].append(time.perf_counter())
+        try:
+            await asyncio.sleep(delay)
+            return await real(*args, **kwargs)
+        finally:
+            stats["now"] -= 1
+    monkeypatch.setattr(asyncio, "open_connection", counted)
+    return stats
+
+def test_concurrency_bound(monkeypatch, closed_port):
+    stats = _instrumented(monkeypatch, delay=0.01)
+    result = connect_scan.scan("127.0.0.1", [closed_port] * 40, concurrency=4)
+    assert len(stats["starts"]) == 40 and stats["peak"] == 4
+    assert "40 closed" in result.summary
+
+def test_rate_limit(monkeypatch, closed_port):
+    stats = _instrumented(monkeypatch)
+    connect_scan.scan("127.0.0.1", [closed_port] * 11, concurrency=8, rate=50)
+    starts = stats["starts"]
+    # 11 starts at 50/s take at least 10 intervals of 20 ms
+    assert starts[-1] - starts[0] >= 0.19
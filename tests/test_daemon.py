@@ -0,0 +1,43 @@
+# tests/test_daemon.py
+import os
+import socket
+import socketserver
+import stat
+import threading
+import pytest
+from yurei.core import daemon
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _Hello(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(b"hello\n")
+
+@pytest.fixture
+def bound(tmp_path, monkeypatch):
+    umasks = []
+    real = os.umask
+    monkeypatch.setattr(os, "umask", lambda mask: umasks.append(mask) or real(mask))
+    path = tmp_path / "yurei.sock"
+    server = daemon._bind_private(_Server, _Hello, path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield path, umasks
+    server.shutdown()
+    server.server_close()
+
+def test_socket_is_private_without_touching_umask(bound):
+    path, umasks = bound
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert umasks == []
+    # only the socket is left behind, not the staging directory
+    assert os.listdir(path.parent) == [path.name]
+    with socket.socket(socket.AF_UNIX) as client:
+        client.connect(str(path))
+        assert client.recv(16) == b"hello\n"
+
+def test_refuses_a_taken_path(bound):
+    path, _ = bound
+    with pytest.raises(FileExistsError):
+        daemon._bind_private(_Server, _Hello, path)
+    assert os.listdir(path.parent) == [path.name]
@@ -0,0 +1,50 @@
+# tests/test_db.py
+import sqlite3
+import pytest
+from yurei.core import db
+from yurei.plugins.nmap_xml import Host, Port, ScanResult
+
+pytestmark = pytest.mark.usefixtures("tmp_db")
+
+def _count(table):
+    with db.connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def test_flush_makes_queued_writes_visible():
+    for i in range(50):
+        db.log_action("s", f"cmd {i}", "ping", "ok")
+    assert db.flush(timeout=5)
+    assert _count("actions") == 50
+
+def test_close_drains_the_queue(tmp_db):
+    for i in range(200):
+        db.log_action("s", f"cmd {i}", "ping", "ok")
+    db.close()
+    conn = sqlite3.connect(tmp_db)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM actions").fetchone()[0] == 200
+    finally:
+        conn.close()
+
+def test_log_scan_then_runs_with_the_scan_row():
+    seen = []
+
+    def then(conn, scan_id):
+        # the scans row is already there in the same transaction
+        seen.append(conn.execute("SELECT source FROM scans WHERE id = ?", (scan_id,)).fetchone())
+        conn.execute("INSERT INTO cache (namespace, key, value, created, expires, last_used) "
+                     "VALUES ('t', 'k', ?, 0, 1e12, 0)", (str(scan_id),))
+
+    result = ScanResult(["nmap", "10.0.0.1"], [Host("10.0.0.1", status="up", ports=[Port("tcp", 22, "open")])],
+                        0, 0, 1.0, "done")
+    db.log_scan(result.args, result, then=then)
+    db.flush()
+    assert seen == [("nmap",)]
+    with db.connection() as conn:
+        (scan_id,) = conn.execute("SELECT value FROM cache WHERE namespace = 't'").fetchone()
+    assert db.load_scan(int(scan_id)) == result.to_dict()
+    assert _count("ports") == 1
+
+def test_wal_mode():
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
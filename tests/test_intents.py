@@ -0,0 +1,42 @@
+# tests/test_intents.py
+import pytest
+from yurei.core.intents import parse_intent
+
+@pytest.mark.parametrize("text, intent", [
+    ("check smb on 10.0.0.5 which is the file server", "smb_enum"),
+    ("vuln check 10.0.0.1 where the db lives", "vuln_scan"),
+    ("enumerate http on 10.0.0.1 seen earlier", "http_enum"),
+    ("udp 10.0.0.1 which ports", "udp_scan"),
+    ("scan 10.0.0.5 which ports are open", "nmap_scan"),
+    ("scan 10.0.0.1 today", "nmap_scan"),
+    ("which hosts have smb open, scan them on 10.0.0.0/24", "smb_enum"),
+])
+def test_scan_commands_are_not_history_queries(text, intent):
+    p = parse_intent(text)
+    assert p["intent"] == intent
+    assert p["slots"]["target"]
+
+@pytest.mark.parametrize("text", [
+    "which hosts had 445 open last week",
+    "where is OpenSSH 7.x running",
+    "history 10.0.0.5",
+    "which hosts had smb open since 2026-10-01",
+    "hosts with 22 open last week",
+    "next page",
+    "10.0.0.0/24 --query",
+    "which hosts had smb open",
+    "what hosts have port 22 open",
+    "what ports were open on 10.0.0.0/24",
+])
+def test_history_queries(text):
+    assert parse_intent(text)["intent"] == "query"
+
+def test_query_slots():
+    slots = parse_intent("where is OpenSSH 7.x running on 10.0.0.0/24 limit 20")["slots"]
+    assert (slots["product"], slots["version"]) == ("OpenSSH", "7.x")
+    assert (slots["target"], slots["limit"], slots["state"]) == ("10.0.0.0/24", 20, "open")
+    assert parse_intent("which hosts had 445 open last week")["slots"]["ports"] == "445"
+
+def test_questions_without_a_window():
+    assert parse_intent("which hosts had smb open")["slots"]["product"] == "smb"
+    assert parse_intent("what hosts have port 22 open")["slots"]["ports"] == "22"
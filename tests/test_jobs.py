@@ -0,0 +1,129 @@
+# tests/test_jobs.py
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from yurei.core import jobs
+from yurei.core.jobs import JobScheduler, footprint, busiest, track_process
+
+def _payload(target=None):
+    return {"intent": "nmap_scan", "slots": {"target": target} if target else {}}
+
+class Recorder:
+    """Runner that logs each job's command and waits for its gate, if it has one."""
+
+    def __init__(self):
+        self.order = []
+        self.gates = {}
+
+    def __call__(self, job):
+        self.order.append(job.command)
+        gate = self.gates.get(job.command)
+        if gate is not None:
+            gate.wait(5)
+
+@pytest.fixture
+def make():
+    made = []
+
+    def _make(runner, **kw):
+        sched = JobScheduler(runner, **kw)
+        made.append(sched)
+        return sched
+    yield _make
+    for sched in made:
+        sched.shutdown()
+
+def _wait_until(cond, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_priority_then_fifo(make):
+    rec = Recorder()
+    rec.gates["blocker"] = threading.Event()
+    sched = make(rec, max_jobs=1)
+    sched.submit(_payload(), "blocker")
+    _wait_until(lambda: rec.order == ["blocker"])
+    for command, prio in (("low", 9), ("normal 1", 5), ("high", 0), ("normal 2", 5), ("normal 3", 5)):
+        sched.submit(_payload(), command, priority=prio)
+    rec.gates["blocker"].set()
+    assert sched.wait(timeout=5)
+    assert rec.order == ["blocker", "high", "normal 1", "normal 2", "normal 3", "low"]
+
+def test_wide_job_holds_every_covered_block(make):
+    rec = Recorder()
+    rec.gates["wide"] = threading.Event()
+    sched = make(rec, max_jobs=4, per_subnet=1)
+    wide = sched.submit(_payload("10.0.0.0/16"), "wide")
+    _wait_until(lambda: wide.status == jobs.RUNNING)
+    inside = sched.submit(_payload("10.0.5.7 10.9.0.1"), "inside")
+    outside = sched.submit(_payload("10.9.0.1"), "outside")
+    assert outside.wait(5)
+    assert inside.status == jobs.QUEUED
+    rec.gates["wide"].set()
+    assert sched.wait(timeout=5)
+    assert rec.order == ["wide", "outside", "inside"]
+
+def test_footprint_and_busiest():
+    assert str(footprint("10.0.0.5 10.0.1.9,2001:db8::1 Host.Example.com")) == \
+        "10.0.0.0/23 2001:db8::/64 host.example.com"
+    running = [footprint("10.0.0.0/16"), footprint("10.0.3.1"), footprint("host.example.com")]
+    assert busiest(footprint("10.0.3.200"), running) == 2
+    assert busiest(footprint("10.0.4.1 host.example.com"), running) == 1
+    assert busiest(footprint("10.1.0.1"), running) == 0
+
+def test_cancel_queued_job(make):
+    rec = Recorder()
+    rec.gates["blocker"] = threading.Event()
+    sched = make(rec, max_jobs=1)
+    sched.submit(_payload(), "blocker")
+    queued = sched.submit(_payload(), "queued")
+    assert sched.cancel(queued.id)
+    assert queued.wait(5) and queued.status == jobs.CANCELLED
+    rec.gates["blocker"].set()
+    assert sched.wait(timeout=5)
+    assert rec.order == ["blocker"]
+    assert not sched.cancel(queued.id)
+
+def test_cancel_kills_running_process(make):
+    procs = []
+
+    def runner(job):
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        procs.append(proc)
+        track_process(proc)
+        proc.wait()
+
+    sched = make(runner)
+    job = sched.submit(_payload(), "sleep")
+    _wait_until(lambda: procs)
+    t0 = time.monotonic()
+    assert sched.cancel(job.id)
+    assert job.wait(5) and job.status == jobs.CANCELLED
+    assert procs[0].poll() is not None and time.monotonic() - t0 < 5
+
+def test_cancel_stops_connect_scan(make, tmp_db, monkeypatch):
+    import asyncio
+    import socket
+    from yurei.plugins import nmap_plugin
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        raise ConnectionRefusedError
+    monkeypatch.setattr(asyncio, "open_connection", slow)
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    results = []
+    sched = make(lambda job: results.append(nmap_plugin._run_connect("127.0.0.1", [port] * 50000)))
+    job = sched.submit(_payload("127.0.0.1"), "connect")
+    _wait_until(lambda: job.status == jobs.RUNNING)
+    time.sleep(0.2)
+    t0 = time.monotonic()
+    assert sched.cancel(job.id)
+    assert job.wait(5) and time.monotonic() - t0 < 2
+    assert job.status == jobs.CANCELLED and results == [None]
@@ -0,0 +1,39 @@
+# tests/test_nmap_plugin.py
+import pytest
+from yurei.plugins import nmap_plugin
+
+class Printed(list):
+    def print(self, *args, **kwargs):
+        self.append(" ".join(str(a) for a in args))
+
+@pytest.fixture
+def calls(monkeypatch):
+    seen = []
+    monkeypatch.setattr(nmap_plugin, "console", Printed())
+    monkeypatch.setattr(nmap_plugin, "_run_nmap", lambda args, **kw: seen.append((args, kw.get("on_line"))))
+    monkeypatch.setattr(nmap_plugin, "_run_connect",
+                        lambda target, ports, **kw: seen.append((["connect", target], kw.get("on_line"))))
+    return seen
+
+def _payload(intent, **slots):
+    return {"intent": intent, "slots": dict(target="10.0.0.1", **slots)}
+
+@pytest.mark.parametrize("intent", ["nmap_scan", "udp_scan", "http_enum", "smb_enum", "vuln_scan",
+                                    "host_discovery", "top_ports", "full", "traceroute"])
+def test_dispatch_forwards_on_line(calls, intent):
+    sink = [].append
+    nmap_plugin._dispatch(_payload(intent), on_line=sink)
+    assert calls and all(on_line is sink for _, on_line in calls)
+
+def _warnings():
+    return [line for line in nmap_plugin.console if "Caution" in line or "WARNING" in line]
+
+def test_vuln_warns_once_per_command(calls):
+    nmap_plugin.handle_intent(_payload("vuln_scan"))
+    assert len(_warnings()) == 1
+
+def test_vuln_warns_outside_handle_intent(calls):
+    nmap_plugin._dispatch(_payload("vuln_scan"))
+    assert len(_warnings()) == 1
+    nmap_plugin.vuln_script_scan("10.0.0.1")
+    assert len(_warnings()) == 2
@@ -0,0 +1,57 @@
+# tests/test_sessions.py
+import time
+import pytest
+from yurei.core.dialog import DialogManager
+from yurei.core.sessions import MemorySessionStore, SQLiteSessionStore, SessionState
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request):
+    if request.param == "sqlite":
+        request.getfixturevalue("tmp_db")
+        return SQLiteSessionStore
+    return MemorySessionStore
+
+def _state(session_id):
+    return SessionState(session_id, {"intent": "nmap_scan", "slots": {}, "required": ["target"]}, "slot", "target", "?")
+
+def test_ttl_expiry_and_sliding(make_store):
+    store = make_store(ttl=0.3, max_sessions=10)
+    store.put(_state("a"))
+    time.sleep(0.2)
+    assert store.get("a") is not None  # reading resets the clock
+    time.sleep(0.2)
+    assert store.get("a") is not None
+    time.sleep(0.4)
+    assert store.get("a") is None and store.pop("a") is None
+
+def test_lru_eviction(make_store):
+    store = make_store(ttl=60, max_sessions=2)
+    store.put(_state("a"))
+    time.sleep(0.01)
+    store.put(_state("b"))
+    time.sleep(0.01)
+    store.get("a")
+    time.sleep(0.01)
+    store.put(_state("c"))
+    assert [s for s in "abc" if store.get(s)] == ["a", "c"]
+    assert store.stats()["evicted"] == 1
+
+def test_pop_once_and_discard(make_store):
+    store = make_store(ttl=60, max_sessions=10)
+    store.put(_state("a"))
+    store.put(_state("b"))
+    assert store.pop("a").pending_slot == "target" and store.pop("a") is None
+    assert store.discard("b") and not store.discard("b")
+    stats = store.stats()
+    assert (stats["active"], stats["created"], stats["completed"]) == (0, 2, 1)
+
+def test_stale_local_prompt_is_cleared_at_start(tmp_db, monkeypatch):
+    from typer.testing import CliRunner
+    from yurei import cli
+    from yurei.core import router
+    # a prompt left in the database by an earlier run
+    DialogManager(SQLiteSessionStore()).require_slot(cli.SESSION_ID, _state("x").intent_payload, "target", "?")
+    monkeypatch.setattr(router, "dm", DialogManager(SQLiteSessionStore()))
+    result = CliRunner().invoke(cli.app, ["start", "--no-warmup"], input="exit\n")
+    assert result.exit_code == 0
+    assert router.dm.get_pending(cli.SESSION_ID) is None
@@ -0,0 +1,53 @@
+# tests/test_targets.py
+import ipaddress
+import pytest
+from yurei.core.targets import AddressSet, IntervalSet, PortSet, is_target
+
+def _v4(text):
+    return int(ipaddress.IPv4Address(text))
+
+def test_merge_and_dedup():
+    s = IntervalSet([(5, 9), (1, 3), (4, 4), (2, 6), (20, 20), (20, 20)])
+    assert s.intervals == ((1, 9), (20, 20)) and s.size == 10
+    assert AddressSet.parse("10.0.0.1 10.0.0.1,10.0.0.0/30 10.0.0.4").v4.intervals == ((_v4("10.0.0.0"), _v4("10.0.0.4")),)
+
+def test_subtract_block():
+    rest = AddressSet.parse("10.0.0.0/8") - AddressSet.parse("10.5.0.0/16")
+    assert rest.v4.intervals == ((_v4("10.0.0.0"), _v4("10.4.255.255")), (_v4("10.6.0.0"), _v4("10.255.255.255")))
+    assert rest.size == 2 ** 24 - 2 ** 16
+    assert rest.to_cidrs()[:3] == ["10.0.0.0/14", "10.4.0.0/16", "10.6.0.0/15"]
+
+def test_intersection():
+    a, b = IntervalSet([(1, 10), (20, 30)]), IntervalSet([(5, 25)])
+    assert (a & b).intervals == ((5, 10), (20, 25))
+    both = AddressSet.parse("10.0.0.0/24 web.example.com") & AddressSet.parse("10.0.0.128/25 10.1.0.1 WEB.example.com")
+    assert str(both) == "10.0.0.128/25 web.example.com"
+
+def test_chunk_sizes_and_order():
+    parts = AddressSet.parse("10.0.0.0/28 a.example.com").chunk(4)
+    assert [p.size for p in parts] == [5, 4, 4, 4]
+    joined = parts[0]
+    for p in parts[1:]:
+        joined = joined | p
+    assert joined == AddressSet.parse("10.0.0.0/28 a.example.com")
+    assert parts[-1].names == ("a.example.com",)
+    assert [len(c.intervals) for c in IntervalSet([(1, 3)]).chunk(10)] == [1, 1, 1]
+
+def test_ranges_and_ipv6():
+    s = AddressSet.parse("192.168.1.10-20 2001:db8::/126 2001:db8::10-2001:db8::11")
+    assert s.v4.size == 11 and s.v6.size == 6
+    assert list(AddressSet(v6=s.v6))[:2] == ["2001:db8::", "2001:db8::1"]
+    assert str(AddressSet.parse("2001:db8::/64")) == "2001:db8::/64"
+    with pytest.raises(ValueError):
+        AddressSet.parse("10.0.0.300")
+    with pytest.raises(ValueError):
+        AddressSet.parse("10.0.0.1-2001:db8::1")
+    assert is_target("host.example.com") and not is_target("hello")
+
+def test_port_ranges():
+    ports = PortSet.parse("80, 22,8000-8010,8005,23")
+    assert str(ports) == "22-23,80,8000-8010" and ports.size == 14
+    assert 8005 in ports and 24 not in ports
+    for bad in ("0", "70000", "10-5", "http", ""):
+        with pytest.raises(ValueError):
+            PortSet.parse(bad)
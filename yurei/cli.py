@@ -1,47 +1,163 @@
 # yurei/cli.py
+# Keep module-level imports to the bare minimum: wrappers invoke short
+# commands like `yurei run`/`yurei version` thousands of times, so each
+# subcommand imports what it needs (see benchmarks/bench_startup.py).
 import typer
-from rich.console import Console
-from yurei.core import logger
-from yurei.core.intents import parse_intent
-from yurei.core.router import route, dm
-from yurei.core.intent_engine import IntentEngine
-from yurei.core.llm.mistral_client import MistralClient
+from typing import Optional
+# resolves to a rich Console on first print (and to the client's stream inside the daemon)
+from yurei.core.output import console
 
 app = typer.Typer(help="Yurei — modular CLI cyber assistant for Linux")
-console = Console()
-log = logger.get_logger()
 SESSION_ID = "local"
-ie = IntentEngine(nlp=MistralClient(), use_llm_first=False)
+
+_engine = None
+
+def _ie():
+    """The shared IntentEngine; the LLM client inside it is only built when a parse needs it."""
+    global _engine
+    if _engine is None:
+        from yurei.core.intent_engine import IntentEngine, LLM_DEADLINE
+
+        def _client():
+            from yurei.core.llm.mistral_client import MistralClient
+            return MistralClient()
+
+        _engine = IntentEngine(nlp_factory=_client, use_llm_first=False, llm_deadline=LLM_DEADLINE)
+    return _engine
+
+@app.callback()
+def main(ctx: typer.Context,
+         profile: bool = typer.Option(False, "--profile", help="Profile the command: writes .pstats and collapsed stacks, prints hot spots"),
+         profile_dir: Optional[str] = typer.Option(None, "--profile-dir", help="Where profile files go (default: data/profiles)"),
+         profile_top: int = typer.Option(20, "--profile-top", help="Functions listed in the profile report")):
+    if not profile:
+        return
+    from yurei.core.profiling import Profiler
+    profiler = Profiler(ctx.invoked_subcommand or "yurei", out_dir=profile_dir, top=profile_top).start()
+    ctx.call_on_close(profiler.stop)
 
 @app.command()
-def start():
+def start(warmup: bool = typer.Option(True, "--warmup/--no-warmup", help="Load the LLM in the background at startup"),
+          background: bool = typer.Option(False, "--background/--foreground",
+                                          help="Queue scans as jobs and keep the prompt free (jobs/cancel/wait)")):
+    from yurei.core import logger
+    from yurei.core.router import route, run_job, dm
+    log = logger.get_logger()
+    ie = _ie()
+    sched = None
+    submit = None
+    if background:
+        from yurei.core.jobs import JobScheduler, parse_priority
+        sched = JobScheduler(run_job, on_finish=_report_job)
+    # with YUREI_SESSIONS=sqlite a prompt left by an earlier run would take the first command as its answer
+    dm.discard(SESSION_ID)
     console.print("[bold cyan]Yurei online. Type 'exit' to quit.[/bold cyan]")
+    if warmup and ie.has_nlp:
+        ie.nlp.warm_up(background=True)
     while True:
         try:
             user_input = input("> ").strip()
             if not user_input: continue
             if user_input.lower() in {"exit","quit"}:
                 console.print("[bold red]Shutting down...[/bold red]"); break
+            if sched and _job_command(sched, user_input):
+                continue
+            if sched:
+                user_input, priority = parse_priority(user_input)
+                submit = lambda p, u, s, prio=priority: _queued(sched.submit(p, u, s, prio))
 
             pending = dm.get_pending(SESSION_ID)
             if pending:
                 updated = dm.answer(SESSION_ID, user_input)  # <— changed from fill_slot(...)
                 if updated:
-                    route(updated, user_input, SESSION_ID)
+                    route(updated, user_input, SESSION_ID, submit=submit)
                 continue
 
             payload = ie.parse(user_input)
-            route(payload, user_input, SESSION_ID)
+            route(payload, user_input, SESSION_ID, submit=submit)
 
         except (KeyboardInterrupt, EOFError):
             console.print("\n[bold red]Interrupted. Goodbye.[/bold red]"); break
         except Exception as e:
             log.error("Unexpected error", exc_info=True)
             console.print(f"[red]Error:[/red] {e}")
+    if sched:
+        active = sched.stats().get("running", 0) + sched.stats().get("queued", 0)
+        if active:
+            console.print(f"[yellow]Cancelling {active} unfinished job(s).[/yellow]")
+        sched.shutdown()
+
+def _queued(job):
+    console.print(f"[cyan]Job {job.id}[/cyan] queued (priority {job.priority}). "
+                  f"Use [cyan]jobs[/cyan], [cyan]wait {job.id}[/cyan] or [cyan]cancel {job.id}[/cyan].")
+    return job
+
+def _report_job(job):
+    colour = {"done": "green", "failed": "red", "cancelled": "yellow"}.get(job.status, "white")
+    line = f"[{colour}]Job {job.id} {job.status}[/{colour}] after {job.summary()['elapsed']}s: {job.command}"
+    if job.error:
+        line += f" ({job.error})"
+    console.print(line)
+
+def _job_command(sched, text: str) -> bool:
+    """Handle the REPL's jobs / cancel <id> / wait [id] commands; False if text is not one."""
+    parts = text.split()
+    verb = parts[0].lower()
+    if verb not in {"jobs", "cancel", "wait"} or len(parts) > 2:
+        return False
+    arg = parts[1] if len(parts) == 2 else None
+    if arg is not None and not arg.isdigit():
+        return False
+    if verb == "jobs":
+        from rich.table import Table
+        jobs = sched.jobs()
+        if not jobs:
+            console.print("No jobs yet."); return True
+        table = Table(title="Jobs")
+        for col in ("id", "status", "prio", "subnet", "queued", "elapsed", "command"):
+            table.add_column(col)
+        for job in jobs:
+            info = job.summary()
+            table.add_row(str(info["id"]), info["status"], str(info["priority"]), info["subnet"] or "-",
+                          f"{info['queued_for']}s", f"{info['elapsed']}s", info["command"])
+        console.print(table)
+    elif verb == "cancel":
+        if arg is None:
+            console.print("Usage: cancel <job id>"); return True
+        if sched.cancel(int(arg)):
+            console.print(f"[yellow]Cancelling job {arg}...[/yellow]")
+        else:
+            console.print(f"No queued or running job {arg}.")
+    else:
+        try:
+            if arg is not None and sched.get(int(arg)) is None:
+                console.print(f"No job {arg}."); return True
+            sched.wait(int(arg) if arg is not None else None)
+        except KeyboardInterrupt:
+            console.print("\nStopped waiting; jobs keep running.")
+    return True
 
 @app.command()
-def run(command: str = typer.Argument(..., help="One-shot command, e.g. 'scan 192.168.1.0/24 top 100'")):
-    payload = ie.parse(command)
+def run(command: str = typer.Argument(..., help="One-shot command, e.g. 'scan 192.168.1.0/24 top 100'"),
+        workers: int = typer.Option(0, "--workers", "-w", help="Split CIDR/range targets across N parallel nmap processes"),
+        fresh: bool = typer.Option(False, "--fresh", help="Ignore cached scan results and re-run nmap"),
+        via_daemon: bool = typer.Option(False, "--via-daemon", help="Send the command to a running 'yurei serve'"),
+        socket_path: Optional[str] = typer.Option(None, "--socket", help="Daemon socket (default: $YUREI_SOCKET)")):
+    if via_daemon:
+        from yurei.core import daemon
+        req = {"op": "run", "command": command, "workers": workers, "fresh": fresh}
+        try:
+            code = daemon.run_remote(req, socket_path or daemon.SOCKET_PATH)
+        except OSError as e:
+            typer.echo(f"Yurei daemon not reachable ({e}); running locally.", err=True)
+        else:
+            raise typer.Exit(code=code)
+    from yurei.core.router import route
+    payload = _ie().parse(command)
+    if workers:
+        payload["slots"]["workers"] = workers
+    if fresh:
+        payload["slots"]["fresh"] = True
     # fail fast if interactive follow-ups would be needed
     if payload.get("missing"):
         console.print(f"[yellow]Missing required info:[/yellow] {payload['missing']}. Try interactive: [cyan]yurei start[/cyan].")
@@ -52,6 +168,95 @@ def run(command: str = typer.Argument(..., help="One-shot command, e.g. 'scan 19
         raise typer.Exit(code=3)
     route(payload, command, SESSION_ID)
 
+@app.command()
+def serve(socket_path: Optional[str] = typer.Option(None, "--socket", help="Unix socket to listen on (default: $YUREI_SOCKET)"),
+          warmup: bool = typer.Option(True, "--warmup/--no-warmup", help="Load the LLM in the background at startup")):
+    """Keep the engine, LLM connection, caches and plugins warm and serve commands over a Unix socket."""
+    from yurei.core import daemon
+    try:
+        daemon.serve(socket_path or daemon.SOCKET_PATH, warmup=warmup)
+    except RuntimeError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+@app.command()
+def batch(source: str = typer.Argument("-", help="File with one command per line, or '-' for stdin"),
+          template: Optional[str] = typer.Option(None, "--template", "-t",
+                                                 help="Lines are bare targets expanded into this command, e.g. 'scan {target} top 100'"),
+          concurrency: int = typer.Option(4, "--concurrency", "-c", help="Commands dispatched in parallel"),
+          fail_fast: bool = typer.Option(False, "--fail-fast/--continue-on-error", help="Stop at the first failed command"),
+          consent: bool = typer.Option(False, "--consent", help="Grant consent for intrusive commands in the batch"),
+          fresh: bool = typer.Option(False, "--fresh", help="Ignore cached scan results and re-run nmap"),
+          summary: str = typer.Option("-", "--summary", help="Where to write the JSON summary ('-' for stdout)")):
+    import json
+    import sys
+    from yurei.core.batch import read_commands, run_batch
+    if summary == "-":
+        # stdout carries only the JSON summary, so progress and scan output go to stderr
+        console.file = sys.stderr
+    commands = read_commands(source, template)
+    if not commands:
+        console.print("[yellow]No commands to run.[/yellow]")
+        raise typer.Exit(code=2)
+    report = run_batch(commands, _ie(), concurrency=concurrency, fail_fast=fail_fast, consent=consent, fresh=fresh)
+    console.print(f"[bold cyan]Batch finished:[/bold cyan] {report['total']} commands in {report['elapsed']}s "
+                  + ", ".join(f"{k}={v}" for k, v in sorted(report["counts"].items())))
+    text = json.dumps(report, indent=2)
+    if summary == "-":
+        typer.echo(text)
+    else:
+        with open(summary, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+        console.print(f"Summary written to {summary}")
+    if report["counts"].get("ok", 0) != report["total"]:
+        raise typer.Exit(code=1)
+
+@app.command()
+def cache(clear: bool = typer.Option(False, "--clear", help="Drop all cached scan results")):
+    from yurei.plugins.nmap_plugin import scan_cache
+    if clear:
+        scan_cache.clear()
+        console.print("[green]Scan cache cleared.[/green]")
+        return
+    stats = scan_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = (100.0 * stats["hits"] / lookups) if lookups else 0.0
+    console.print(f"[cyan]Scan cache:[/cyan] {stats['entries']} entries, "
+                  f"{stats['hits']} hits / {stats['misses']} misses ({rate:.0f}% hit rate)")
+
+@app.command()
+def stats(since: float = typer.Option(0, "--since", help="Only spans from the last N hours (0 = everything kept)"),
+          prometheus: bool = typer.Option(False, "--prometheus", help="Print Prometheus text format instead of a table"),
+          clear: bool = typer.Option(False, "--clear", help="Drop all recorded timings")):
+    import time
+    from yurei.core import metrics
+    if clear:
+        metrics.clear()
+        console.print("[green]Timings cleared.[/green]")
+        return
+    cutoff = time.time() - since * 3600 if since else None
+    if prometheus:
+        typer.echo(metrics.prometheus(cutoff), nl=False)
+        return
+    rows = metrics.summary(cutoff)
+    if not rows:
+        console.print("[yellow]No timings recorded yet.[/yellow]")
+        return
+    from rich.table import Table
+
+    def ms(seconds: float) -> str:
+        return f"{seconds * 1000:.1f}"
+
+    table = Table(title="Per-stage latency (ms)")
+    for col in ("stage", "count", "mean", "p50", "p95", "p99", "max", "child cpu (s)", "output"):
+        table.add_column(col, justify="left" if col == "stage" else "right")
+    for r in rows:
+        cpu = f"{r['cpu']:.2f}" if "cpu" in r else "-"
+        out = f"{r['output_bytes'] / 1024:.0f} KiB" if "output_bytes" in r else "-"
+        table.add_row(r["stage"], str(r["count"]), ms(r["mean"]), ms(r["p50"]), ms(r["p95"]),
+                      ms(r["p99"]), ms(r["max"]), cpu, out)
+    console.print(table)
+
 @app.command()
 def check_deps():
     from yurei.core.executor import check_dependencies
@@ -59,7 +264,8 @@ def check_deps():
 
 @app.command()
 def version():
-    console.print("[green]Yurei v0.1.0[/green]")
+    from yurei import __version__
+    typer.secho(f"Yurei v{__version__}", fg=typer.colors.GREEN)
 
 if __name__ == "__main__":
     app()
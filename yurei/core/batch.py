@@ -0,0 +1,121 @@
+# yurei/core/batch.py
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
+from yurei.core.router import route, INTRUSIVE_INTENTS
+from yurei.plugins.nmap_shard import labelled
+from yurei.core.output import console, carry
+
+def read_commands(source: str, template: Optional[str] = None) -> List[str]:
+    """
+    Read one command per line from a file or '-' (stdin), skipping blanks and
+    '#' comments. With a template, each line is a bare target substituted
+    for {target}, e.g. 'scan {target} top 100'.
+    """
+    fh = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        lines = [line.strip() for line in fh]
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    lines = [line for line in lines if line and not line.startswith("#")]
+    if template:
+        lines = [template.replace("{target}", line) for line in lines]
+    return lines
+
+def _summarize(result) -> Dict[str, Any]:
+    if result is None:
+        return {"returncode": None, "hosts_up": 0, "open_ports": 0}
+    if not hasattr(result, "up_hosts"):
+        # e.g. a history query page
+        return {"returncode": result.returncode, "hosts_up": 0, "open_ports": 0}
+    return {
+        "returncode": result.returncode,
+        "hosts_up": len(result.up_hosts()),
+        "open_ports": sum(1 for _ in result.iter_ports("open")),
+    }
+
+def run_batch(commands: List[str], engine, concurrency: int = 4, fail_fast: bool = False,
+              consent: bool = False, fresh: bool = False) -> Dict[str, Any]:
+    """
+    Parse all commands in bulk, then dispatch them through route() on a pool
+    of `concurrency` threads. Commands that would need an interactive
+    follow-up (missing slots, consent) are skipped. With fail_fast, the first
+    failure stops anything not yet started. Returns a JSON-ready summary.
+    """
+    started = time.time()
+    payloads = engine.parse_many(commands)
+    entries: List[Dict[str, Any]] = []
+    runnable = []
+    for i, (command, payload) in enumerate(zip(commands, payloads)):
+        slots = payload.setdefault("slots", {})
+        if consent:
+            slots["consent"] = True
+        if fresh:
+            slots["fresh"] = True
+        entry = {"index": i, "command": command, "intent": payload.get("intent"),
+                 "target": slots.get("target"), "status": "pending", "error": None}
+        entries.append(entry)
+        if payload.get("intent") == "unknown":
+            entry.update(status="skipped", error="could not understand command")
+        elif payload.get("missing"):
+            entry.update(status="skipped", error=f"missing {', '.join(payload['missing'])}")
+        elif (payload.get("intent") in INTRUSIVE_INTENTS or slots.get("vuln")) and not slots.get("consent"):
+            entry.update(status="skipped", error="requires consent (--consent)")
+        else:
+            runnable.append((entry, payload))
+
+    # set by the first failure under fail_fast; checked by workers before they start a command,
+    # since a freed worker can pick up the next one before the loop below sees the failure
+    halt = threading.Event()
+
+    def _run(entry: Dict[str, Any], payload: Dict[str, Any]):
+        if halt.is_set():
+            return None
+        t0 = time.perf_counter()
+        try:
+            with labelled(f"#{entry['index'] + 1}"):
+                result = route(payload, entry["command"], session_id=f"batch-{entry['index']}")
+            entry.update(_summarize(result))
+            entry["status"] = "ok" if result is not None and result.returncode == 0 else "failed"
+        except Exception as e:
+            entry.update(status="error", error=str(e))
+        entry["elapsed"] = round(time.perf_counter() - t0, 3)
+        if fail_fast and entry["status"] != "ok":
+            halt.set()
+        return entry
+
+    stopped = False
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="yurei-batch") as pool:
+        run = carry(_run)
+        futures = [pool.submit(run, entry, payload) for entry, payload in runnable]
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            entry = fut.result()
+            if entry is None:
+                continue
+            console.print(f"[grey50]#{entry['index'] + 1}[/grey50] {entry['command']} -> {entry['status']}")
+            if fail_fast and entry["status"] != "ok" and not stopped:
+                stopped = True
+                console.print("[red]Fail-fast: stopping remaining commands.[/red]")
+                for other in futures:
+                    other.cancel()
+    for entry, _ in runnable:
+        if entry["status"] == "pending":
+            entry.update(status="cancelled")
+
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {
+        "started": started,
+        "elapsed": round(time.time() - started, 3),
+        "total": len(entries),
+        "concurrency": concurrency,
+        "policy": "fail-fast" if fail_fast else "continue-on-error",
+        "counts": counts,
+        "results": entries,
+    }
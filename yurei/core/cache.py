@@ -0,0 +1,100 @@
+# yurei/core/cache.py
+import hashlib
+import json
+import time
+from typing import Optional, Dict, Any
+from yurei.core import db
+
+def make_key(*parts: Any) -> str:
+    """Stable digest of arbitrary JSON-serialisable key parts."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Persistent TTL cache on top of the Yurei SQLite database. Entries live
+    in a namespace, expire after their TTL and the least recently used ones
+    are evicted once the namespace holds more than max_entries.
+
+    Lookups read through the shared connection; every write (puts, LRU
+    bookkeeping, hit/miss counters) goes through the batched background
+    writer, so a put becomes visible once the writer commits it.
+    """
+
+    def __init__(self, namespace: str, default_ttl: float = 600, max_entries: int = 500):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"value", "created", "expires"} for a live entry, or None on a miss."""
+        now = time.time()
+        with db.connection() as conn:
+            row = conn.execute(
+                "SELECT value, created, expires FROM cache WHERE namespace = ? AND key = ? AND expires > ?",
+                (self.namespace, key, now),
+            ).fetchone()
+        if row:
+            db.submit(("UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                       (now, self.namespace, key)))
+        self._count(hit=bool(row))
+        if not row:
+            return None
+        return {"value": row[0], "created": row[1], "expires": row[2]}
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        db.submit(lambda conn: self.write(conn, key, value, ttl))
+
+    def write(self, conn, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """put() inside a write already running on the writer (see db.log_scan's then=)."""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, created, expires, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, value, now, now + ttl, now),
+        )
+        self._evict(conn, now)
+
+    def clear(self) -> None:
+        db.flush()
+        with db.connection() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_stats WHERE namespace = ?", (self.namespace,))
+
+    def drop_other_namespaces(self, prefix: str) -> None:
+        """Delete every namespace starting with prefix except this one (e.g. after a prompt change)."""
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+        def _write(conn):
+            for table in ("cache", "cache_stats"):
+                conn.execute(f"DELETE FROM {table} WHERE namespace LIKE ? ESCAPE '\\' AND namespace != ?",
+                             (pattern, self.namespace))
+
+        db.submit(_write)
+
+    def stats(self) -> Dict[str, int]:
+        db.flush()
+        with db.connection() as conn:
+            row = conn.execute("SELECT hits, misses FROM cache_stats WHERE namespace = ?",
+                               (self.namespace,)).fetchone()
+            entries = conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires > ?",
+                                   (self.namespace, time.time())).fetchone()[0]
+        hits, misses = row or (0, 0)
+        return {"hits": hits, "misses": misses, "entries": entries}
+
+    def _count(self, hit: bool) -> None:
+        column = "hits" if hit else "misses"
+        db.submit((
+            f"INSERT INTO cache_stats (namespace, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1",
+            (self.namespace,),
+        ))
+
+    def _evict(self, conn, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE namespace = ? AND expires <= ?", (self.namespace, now))
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "  SELECT key FROM cache WHERE namespace = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        )
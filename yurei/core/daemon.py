@@ -0,0 +1,265 @@
+# yurei/core/daemon.py
+# Client half is imported by `yurei run --via-daemon`, so module-level
+# imports stay light; the server half imports the engine inside YureiDaemon.
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable
+
+SOCKET_PATH = os.getenv("YUREI_SOCKET") or str(
+    Path(os.getenv("XDG_RUNTIME_DIR") or Path(__file__).resolve().parents[2] / "data") / "yurei.sock")
+
+# Protocol: the client sends one JSON object on one line, e.g.
+#   {"op": "run", "command": "scan 10.0.0.1", "session": "s1", "tty": true, "width": 120}
+# and reads JSON lines back until a "done" event:
+#   {"type": "output", "text": "..."}                      rendered console output
+#   {"type": "prompt", "prompt": "...", "pending": "slot"}  the session awaits an answer ("say" op)
+#   {"type": "done", "status": "ok", "exit": 0, ...}
+# ops: "run" (one-shot, same checks as `yurei run`), "say" (one REPL line in a
+# session: answers a pending prompt or starts a new command), "ping".
+
+class _EventStream:
+    """File-like target for a rich Console that turns every write into an output event."""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None]):
+        self._send = send
+
+    def write(self, text: str) -> int:
+        if text:
+            self._send({"type": "output", "text": text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+def _summarize(result) -> Dict[str, Any]:
+    if result is None or not hasattr(result, "up_hosts"):
+        return {}
+    return {"returncode": result.returncode, "hosts_up": len(result.up_hosts()),
+            "open_ports": sum(1 for _ in result.iter_ports("open"))}
+
+class YureiDaemon:
+    """
+    Long-lived request handler. Owns the warm state every request shares:
+    the IntentEngine with its LLM client and pooled HTTP connection, the
+    plugin registry (nmap plugin already imported), the scan and inference
+    caches and the database connection. DialogManager keeps one pending
+    follow-up per session, so concurrent clients use distinct session ids.
+    """
+
+    def __init__(self, warmup: bool = True):
+        from yurei.core.intent_engine import IntentEngine, LLM_DEADLINE
+        from yurei.core.llm.mistral_client import MistralClient
+        from yurei.core.registry import registry
+        from yurei.core.router import route, dm
+        from yurei.core import db
+
+        self.engine = IntentEngine(nlp=MistralClient(), llm_deadline=LLM_DEADLINE)
+        self.route = route
+        self.dm = dm
+        self.started = time.time()
+        self.requests = 0
+        registry.resolve("nmap_scan")
+        with db.connection():
+            pass
+        if warmup:
+            self.engine.nlp.warm_up(background=True)
+
+    def handle(self, req: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        from rich.console import Console
+        from yurei.core.output import redirect
+
+        self.requests += 1
+        op = req.get("op", "run")
+        if op == "ping":
+            return {"type": "done", "status": "ok", "exit": 0, "pid": os.getpid(),
+                    "uptime": round(time.time() - self.started, 1), "requests": self.requests,
+                    "sessions": self.dm.stats()}
+        if op not in ("run", "say"):
+            return {"type": "done", "status": "error", "exit": 1, "error": f"unknown op {op!r}"}
+
+        tty = bool(req.get("tty"))
+        console = Console(file=_EventStream(send), force_terminal=tty, color_system="auto" if tty else None,
+                          width=int(req.get("width") or 100))
+        session = str(req.get("session") or f"daemon-{os.getpid()}-{self.requests}")
+        t0 = time.perf_counter()
+        with redirect(console):
+            done = self._run(req, session) if op == "run" else self._say(req, session, send)
+        done.setdefault("type", "done")
+        done["elapsed"] = round(time.perf_counter() - t0, 3)
+        return done
+
+    def _run(self, req: Dict[str, Any], session: str) -> Dict[str, Any]:
+        from yurei.core.output import console
+        command = req.get("command") or ""
+        payload = self.engine.parse(command)
+        if req.get("workers"):
+            payload["slots"]["workers"] = int(req["workers"])
+        if req.get("fresh"):
+            payload["slots"]["fresh"] = True
+        if payload.get("missing"):
+            console.print(f"[yellow]Missing required info:[/yellow] {payload['missing']}. "
+                          f"Try interactive: [cyan]yurei start[/cyan].")
+            return {"status": "missing", "exit": 2}
+        if (payload["intent"] in {"vuln_scan"} or payload["slots"].get("vuln")) and not payload["slots"].get("consent"):
+            console.print("[yellow]This command requires explicit consent. Add 'consent' or '--consent' to proceed, "
+                          "or use interactive mode.[/yellow]")
+            return {"status": "consent", "exit": 3}
+        result = self.route(payload, command, session)
+        return {"status": "ok", "exit": 0, "intent": payload["intent"], **_summarize(result)}
+
+    def _say(self, req: Dict[str, Any], session: str, send: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        text = (req.get("command") or "").strip()
+        result = None
+        if self.dm.get_pending(session):
+            updated = self.dm.answer(session, text)
+            if updated:
+                result = self.route(updated, text, session)
+        elif text:
+            result = self.route(self.engine.parse(text), text, session)
+        pending = self.dm.get_pending(session)
+        if pending:
+            send({"type": "prompt", "prompt": pending["prompt"], "pending": pending["pending_type"]})
+            return {"status": "pending", "exit": 0, "session": session}
+        return {"status": "ok", "exit": 0, "session": session, **_summarize(result)}
+
+def _claim(path: Path) -> None:
+    """Remove a stale socket file; refuse if another daemon is answering on it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise RuntimeError(f"a Yurei daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+def _bind_private(server_cls, handler, path: Path):
+    """
+    server_cls bound at path, with the socket file private (0600) before
+    anyone can reach it. bind() happens inside a fresh 0700 directory, where
+    the file is chmod'ed and then linked into place; the process umask is
+    left alone, since the job, writer and logging threads are already
+    creating files by now.
+    """
+    import shutil
+    import tempfile
+    private = tempfile.mkdtemp(prefix=".ys", dir=path.parent)
+    staged = os.path.join(private, "s")
+    try:
+        server = server_cls(staged, handler)
+        try:
+            os.chmod(staged, 0o600)
+            os.link(staged, path)  # unlike rename, fails if another daemon took the path meanwhile
+        except BaseException:
+            server.server_close()
+            raise
+    finally:
+        shutil.rmtree(private, ignore_errors=True)
+    server.server_address = str(path)
+    return server
+
+def serve(path: str = SOCKET_PATH, warmup: bool = True) -> None:
+    """Run the daemon in the foreground until SIGINT/SIGTERM."""
+    import signal
+    import socketserver
+    import threading
+    from yurei.core.output import console
+
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lock = threading.Lock()
+
+            def send(event: Dict[str, Any]) -> None:
+                data = (json.dumps(event) + "\n").encode("utf-8")
+                with lock:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+
+            try:
+                req = json.loads(self.rfile.readline() or b"{}")
+                if not isinstance(req, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                send({"type": "done", "status": "error", "exit": 1, "error": f"bad request: {e}"})
+                return
+            try:
+                done = daemon.handle(req, send)
+            except (BrokenPipeError, ConnectionResetError):
+                # client went away; raising out of the scan already stopped nmap
+                return
+            except Exception as e:
+                done = {"type": "done", "status": "error", "exit": 1, "error": str(e)}
+            try:
+                send(done)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    sock_path = Path(path)
+    _claim(sock_path)
+    daemon = YureiDaemon(warmup=warmup)
+    server = _bind_private(_Server, _Handler, sock_path)
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+    console.print(f"[bold cyan]Yurei daemon listening on {sock_path}[/bold cyan] (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[bold red]Daemon shutting down...[/bold red]")
+    finally:
+        server.server_close()
+        sock_path.unlink(missing_ok=True)
+
+def request(req: Dict[str, Any], path: str = SOCKET_PATH,
+            on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Send one request and feed streamed events to on_event; returns the final
+    "done" event. Raises OSError if no daemon is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        with sock.makefile("rwb") as f:
+            f.write((json.dumps(req) + "\n").encode("utf-8"))
+            f.flush()
+            for line in f:
+                event = json.loads(line)
+                if event.get("type") == "done":
+                    return event
+                if on_event:
+                    on_event(event)
+    finally:
+        sock.close()
+    raise ConnectionError("daemon closed the connection without a result")
+
+def run_remote(req: Dict[str, Any], path: str = SOCKET_PATH) -> int:
+    """Thin client: stream the daemon's output to stdout and return its exit code."""
+    import shutil
+    req.setdefault("tty", sys.stdout.isatty())
+    req.setdefault("width", shutil.get_terminal_size().columns)
+
+    def _print(event: Dict[str, Any]) -> None:
+        if event.get("type") == "output":
+            sys.stdout.write(event["text"])
+            sys.stdout.flush()
+
+    done = request(req, path, _print)
+    if done.get("status") == "error":
+        sys.stderr.write(f"Daemon error: {done.get('error')}\n")
+    return int(done.get("exit", 1))
@@ -1,13 +1,267 @@
+import atexit
+import ipaddress
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional, Callable, Iterable, Any, Dict, Union
 
 DB_PATH = Path(__file__).resolve().parents[2] / "data" / "yurei.db"
 
+# Pending writes the background writer may hold before submit() blocks (back-pressure).
+WRITE_QUEUE_SIZE = int(os.getenv("YUREI_DB_QUEUE", "10000"))
+# Most writes committed in one transaction, and how long the writer waits to fill a batch.
+WRITE_BATCH = 500
+WRITE_WINDOW = 0.05
+
+_lock = threading.RLock()
+_conn: Optional[sqlite3.Connection] = None
+_initialized = False
+
+def _open(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    """
+    A separate connection of its own, for callers that manage it themselves.
+    Yurei code uses connection() (shared) and submit() (batched writes).
+    """
+    global _initialized
+    conn = _open(DB_PATH)
+    if not _initialized:
+        _create_tables(conn)
+        _initialized = True
+    return conn
 
-def init_db():
-    conn = get_connection()
+def _shared() -> sqlite3.Connection:
+    global _conn, _initialized
+    if _conn is None:
+        _conn = _open(DB_PATH)
+        _create_tables(_conn)
+        _initialized = True
+    return _conn
+
+@contextmanager
+def connection():
+    """The process-wide connection, held under a lock; commits on success, rolls back on error."""
+    with _lock:
+        conn = _shared()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+# A write is (sql, params-tuple), (sql, [params, ...]) for executemany, or a callable taking the connection.
+Write = Union[tuple, Callable[[sqlite3.Connection], Any]]
+
+class _Writer(threading.Thread):
+    """
+    Drains queued writes on a background thread and commits them in batches
+    of up to WRITE_BATCH per transaction, so hot paths only pay a queue put.
+    """
+
+    def __init__(self):
+        super().__init__(name="yurei-db-writer", daemon=True)
+        self.queue: "queue.Queue" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.written = 0
+        self.batches = 0
+        self.blocked = 0
+        self.errors = 0
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            deadline = time.monotonic() + WRITE_WINDOW
+            while len(batch) < WRITE_BATCH and not isinstance(item, threading.Event):
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        writes = [w for w in batch if not isinstance(w, threading.Event)]
+        if writes:
+            try:
+                with connection() as conn:
+                    for w in writes:
+                        _apply(conn, w)
+                self.written += len(writes)
+                self.batches += 1
+            except Exception:
+                # the batch rolled back; retry one by one so a single bad write loses only itself
+                self._commit_each(writes)
+        for w in batch:
+            if isinstance(w, threading.Event):
+                w.set()
+
+    def _commit_each(self, writes):
+        for w in writes:
+            try:
+                with connection() as conn:
+                    _apply(conn, w)
+                self.written += 1
+            except Exception:
+                self.errors += 1
+
+def _apply(conn: sqlite3.Connection, write: Write) -> None:
+    if callable(write):
+        write(conn)
+    elif isinstance(write[1], list):
+        conn.executemany(write[0], write[1])
+    else:
+        conn.execute(write[0], write[1] or ())
+
+_writer: Optional[_Writer] = None
+_writer_lock = threading.Lock()
+
+def _get_writer() -> _Writer:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _Writer()
+                _writer.start()
+                atexit.register(close)
+    return _writer
+
+def submit(write: Write) -> None:
+    """
+    Queue a write for the background writer. Blocks only when the queue is
+    full, which throttles producers to the speed of the disk.
+    """
+    writer = _get_writer()
+    try:
+        writer.queue.put_nowait(write)
+    except queue.Full:
+        writer.blocked += 1
+        writer.queue.put(write)
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Wait until everything queued so far is committed."""
+    if _writer is None:
+        return True
+    done = threading.Event()
+    _writer.queue.put(done)
+    return done.wait(timeout)
+
+def close() -> None:
+    """Flush pending writes and close the shared connection (reopened on next use)."""
+    global _conn, _initialized
+    flush(timeout=10)
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+            _initialized = False
+
+def writer_stats() -> Dict[str, int]:
+    if _writer is None:
+        return {"queued": 0, "written": 0, "batches": 0, "blocked": 0, "errors": 0}
+    return {"queued": _writer.queue.qsize(), "written": _writer.written, "batches": _writer.batches,
+            "blocked": _writer.blocked, "errors": _writer.errors}
+
+def log_action(session: str, command: Optional[str], intent: Optional[str], status: str,
+               elapsed: Optional[float] = None, detail: Optional[Dict[str, Any]] = None) -> None:
+    """Audit one routed command (queued, never blocks on disk)."""
+    submit(("INSERT INTO actions (ts, session, command, intent, status, elapsed, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), session, command, intent, status, elapsed,
+             json.dumps(detail, default=str) if detail else None)))
+
+def log_scan(args: Iterable[str], result, source: str = "nmap",
+             then: Optional[Callable[[sqlite3.Connection, int], None]] = None) -> None:
+    """
+    Record a finished scan. The result object is serialised on the writer
+    thread, so the scan path only pays for the queue put. then(conn, scan_id)
+    runs in the same transaction, e.g. to point a cache entry at the row.
+    """
+    args = list(args)
+    ts = time.time()
+
+    def _write(conn):
+        data = result.to_dict()
+        cur = conn.execute(
+            "INSERT INTO scans (ts, source, args, target, returncode, hosts_up, open_ports, elapsed, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (ts, source, " ".join(args), args[-1] if args else None, result.returncode,
+             len(result.up_hosts()), sum(1 for _ in result.iter_ports("open")), result.elapsed,
+             json.dumps(data, separators=(",", ":"))),
+        )
+        _index_result(conn, cur.lastrowid, ts, data)
+        if then is not None:
+            then(conn, cur.lastrowid)
+
+    submit(_write)
+
+def load_scan(scan_id: int) -> Optional[Dict[str, Any]]:
+    """A recorded scan's result in to_dict() form, or None if the row is gone."""
+    with connection() as conn:
+        row = conn.execute("SELECT result FROM scans WHERE id = ?", (scan_id,)).fetchone()
+    try:
+        return json.loads(row[0]) if row and row[0] else None
+    except ValueError:
+        return None
+
+def _ipv4(address: str) -> Optional[int]:
+    try:
+        return int(ipaddress.IPv4Address(address))
+    except ValueError:
+        return None
+
+def _index_result(conn: sqlite3.Connection, scan_id: int, ts: float, data: Dict[str, Any]) -> None:
+    """
+    Break a scan's to_dict() form into the hosts / ports / services / scripts
+    tables, so history questions are answered by index lookups instead of
+    decoding the JSON of every stored scan.
+    """
+    services: Dict[tuple, int] = {}
+
+    def service_id(key: tuple) -> Optional[int]:
+        if not any(key):
+            return None
+        if key not in services:
+            conn.execute("INSERT OR IGNORE INTO services (name, product, version, extrainfo) VALUES (?, ?, ?, ?)", key)
+            services[key] = conn.execute(
+                "SELECT id FROM services WHERE name = ? AND product = ? AND version = ? AND extrainfo = ?", key
+            ).fetchone()[0]
+        return services[key]
+
+    for address, addrtype, status, hostnames, ports, hscripts, *rest in data.get("hosts", []):
+        ipv4 = _ipv4(address) if addrtype == "ipv4" else None
+        host_id = conn.execute(
+            "INSERT INTO hosts (scan_id, ts, address, ipv4, addrtype, status, hostnames, srtt) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (scan_id, ts, address, ipv4, addrtype, status, " ".join(hostnames or ()) or None,
+             rest[0] if rest else None),
+        ).lastrowid
+        for protocol, portid, state, reason, service, product, version, extrainfo, pscripts in ports:
+            port_id = conn.execute(
+                "INSERT INTO ports (scan_id, host_id, ts, address, ipv4, protocol, port, state, reason, service_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (scan_id, host_id, ts, address, ipv4, protocol, portid, state, reason or None,
+                 service_id((service or "", product or "", version or "", extrainfo or ""))),
+            ).lastrowid
+            if pscripts:
+                conn.executemany("INSERT INTO scripts (scan_id, host_id, port_id, script, output) VALUES (?, ?, ?, ?, ?)",
+                                 [(scan_id, host_id, port_id, sid, out) for sid, out in pscripts])
+        if hscripts:
+            conn.executemany("INSERT INTO scripts (scan_id, host_id, port_id, script, output) VALUES (?, ?, ?, ?, ?)",
+                             [(scan_id, host_id, None, sid, out) for sid, out in hscripts])
+
+def _create_tables(conn):
     cursor = conn.cursor()
     cursor.execute("""
                     CREATE TABLE IF NOT EXISTS logs (
@@ -17,5 +271,143 @@ def init_db():
                    result Text
                    )"""
                    )
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS actions (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   ts REAL NOT NULL,
+                   session TEXT,
+                   command TEXT,
+                   intent TEXT,
+                   status TEXT NOT NULL,
+                   elapsed REAL,
+                   detail TEXT
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_ts ON actions (ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_intent ON actions (intent, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_session ON actions (session, ts)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scans (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   ts REAL NOT NULL,
+                   source TEXT NOT NULL,
+                   args TEXT NOT NULL,
+                   target TEXT,
+                   returncode INTEGER,
+                   hosts_up INTEGER,
+                   open_ports INTEGER,
+                   elapsed REAL,
+                   result TEXT
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scans_ts ON scans (ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scans_target ON scans (target, ts)")
+    # Normalized copy of each scan's result (see _index_result). address/ipv4/ts
+    # are repeated on ports so the common questions never need the hosts join.
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS hosts (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   scan_id INTEGER NOT NULL,
+                   ts REAL NOT NULL,
+                   address TEXT NOT NULL,
+                   ipv4 INTEGER,
+                   addrtype TEXT,
+                   status TEXT,
+                   hostnames TEXT,
+                   srtt REAL
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hosts_scan ON hosts (scan_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hosts_address ON hosts (address, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hosts_ipv4 ON hosts (ipv4, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hosts_status ON hosts (status, ts)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS services (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   name TEXT NOT NULL COLLATE NOCASE,
+                   product TEXT NOT NULL COLLATE NOCASE,
+                   version TEXT NOT NULL,
+                   extrainfo TEXT NOT NULL,
+                   UNIQUE (name, product, version, extrainfo)
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_services_product ON services (product, version)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_services_name ON services (name)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ports (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   scan_id INTEGER NOT NULL,
+                   host_id INTEGER NOT NULL,
+                   ts REAL NOT NULL,
+                   address TEXT NOT NULL,
+                   ipv4 INTEGER,
+                   protocol TEXT NOT NULL,
+                   port INTEGER NOT NULL,
+                   state TEXT NOT NULL,
+                   reason TEXT,
+                   service_id INTEGER
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_port ON ports (port, protocol, state, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_state ON ports (state, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_address ON ports (address, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_ipv4 ON ports (ipv4, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_service ON ports (service_id, state)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ports_host ON ports (host_id)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scripts (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   scan_id INTEGER NOT NULL,
+                   host_id INTEGER NOT NULL,
+                   port_id INTEGER,
+                   script TEXT NOT NULL,
+                   output TEXT
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_script ON scripts (script)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_host ON scripts (host_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scripts_port ON scripts (port_id)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS cache (
+                   namespace TEXT NOT NULL,
+                   key TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   created REAL NOT NULL,
+                   expires REAL NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (namespace, key)
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache (namespace, last_used)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_stats (
+                   namespace TEXT PRIMARY KEY,
+                   hits INTEGER NOT NULL DEFAULT 0,
+                   misses INTEGER NOT NULL DEFAULT 0
+                   )"""
+                   )
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS timings (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   stage TEXT NOT NULL,
+                   started REAL NOT NULL,
+                   duration REAL NOT NULL,
+                   attrs TEXT
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timings_stage ON timings (stage, started)")
+    cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sessions (
+                   session_id TEXT PRIMARY KEY,
+                   state TEXT NOT NULL,
+                   expires REAL NOT NULL,
+                   touched REAL NOT NULL
+                   )"""
+                   )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_touched ON sessions (touched)")
     conn.commit()
-    conn.close()
\ No newline at end of file
+
+def init_db():
+    with connection():
+        pass
@@ -1,8 +1,6 @@
 import subprocess
 import shutil
-from rich.console import Console
-
-console = Console()
+from yurei.core.output import console
 
 def run_command(cmd: str):
     #Safely run a shell command and display the result
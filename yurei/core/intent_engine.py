@@ -1,28 +1,149 @@
 # yurei/core/intent_engine.py
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable, Callable
+import os
 import re
+import threading
 from yurei.core import intents as rules
+from yurei.core.metrics import timed, annotate
 
 TOP_RE = re.compile(r"\btop\s+(\d{1,5})\b", re.I)
 
+# Seconds parse() waits for the LLM before settling for the rules result.
+LLM_DEADLINE = float(os.getenv("YUREI_LLM_DEADLINE", "8"))
+# LLM calls in flight at once (the daemon parses for several clients).
+LLM_WORKERS = int(os.getenv("YUREI_LLM_WORKERS", "4"))
+
 class IntentEngine:
-    def __init__(self, nlp: Optional[object] = None, use_llm_first: bool = False):
-        self.nlp = nlp
+    def __init__(self, nlp: Optional[object] = None, use_llm_first: bool = False,
+                 llm_deadline: Optional[float] = None, nlp_factory: Optional[Callable[[], object]] = None):
+        # nlp_factory defers building the LLM client until a parse actually needs it
+        self._nlp = nlp
+        self._nlp_factory = nlp_factory
         self.use_llm_first = use_llm_first
+        # None keeps the original sequential behaviour (block on the LLM)
+        self.llm_deadline = llm_deadline
+        self._pool = None
+        # calls abandoned at the deadline that are still running on self._pool
+        self._stale = set()
+        self._pool_lock = threading.Lock()
+
+    @property
+    def has_nlp(self) -> bool:
+        return self._nlp is not None or self._nlp_factory is not None
+
+    @property
+    def nlp(self) -> Optional[object]:
+        if self._nlp is None and self._nlp_factory is not None:
+            self._nlp = self._nlp_factory()
+            self._nlp_factory = None
+        return self._nlp
 
+    @nlp.setter
+    def nlp(self, value: Optional[object]) -> None:
+        self._nlp = value
+        self._nlp_factory = None
+
+    @timed("intent.parse")
     def parse(self, text: str) -> Dict[str, Any]:
+        if self.has_nlp and self.llm_deadline is not None:
+            return self._parse_concurrent(text)
         if not self.use_llm_first:
             p = rules.parse_intent(text)
             self._maybe_infer_top(text, p)
             if p["intent"] != "unknown" and not p.get("missing"):
+                annotate(path="rules")
                 return p
-            if self.nlp:
+            if self.has_nlp:
+                annotate(path="llm")
                 return self._nlp_parse(text, fallback=p)
             return p
-        if self.nlp:
+        if self.has_nlp:
             return self._nlp_parse(text, fallback=rules.parse_intent(text))
         return rules.parse_intent(text)
 
+    def parse_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Bulk parse: one rules pass over the whole batch, then the LLM only for
+        the lines the rules could not resolve.
+        """
+        texts = list(texts)
+        payloads = rules.parse_many(texts)
+        for i, (text, p) in enumerate(zip(texts, payloads)):
+            self._maybe_infer_top(text, p)
+            if self.has_nlp and (self.use_llm_first or p["intent"] == "unknown" or p.get("missing")):
+                payloads[i] = self.parse(text)
+        return payloads
+
+    def _parse_concurrent(self, text: str) -> Dict[str, Any]:
+        """
+        Bounded-latency parse. With use_llm_first the LLM call is submitted
+        before the rules pass runs, so the two overlap. Otherwise a complete
+        rules result returns without touching the LLM (or even building the
+        client), and the call is submitted as soon as the rules fall short.
+        The LLM is waited for until the deadline; on a miss the request is
+        cancelled and the rules result is returned.
+        """
+        from concurrent.futures import TimeoutError as FutureTimeout
+        future = token = None
+        if self.use_llm_first:
+            token = self._new_token()
+            future = self._submit(text, token)
+        p = rules.parse_intent(text)
+        self._maybe_infer_top(text, p)
+        if future is None:
+            if p["intent"] != "unknown" and not p.get("missing"):
+                annotate(path="rules")
+                return p
+            token = self._new_token()
+            future = self._submit(text, token)
+        annotate(path="llm")
+        try:
+            llm = future.result(timeout=self.llm_deadline)
+        except FutureTimeout:
+            self._abandon(future, token)
+            annotate(path="deadline")
+            return p
+        except Exception:
+            llm = {}
+        if not isinstance(llm, dict):
+            llm = {}
+        return self._merge_payloads(p, llm)
+
+    def _new_token(self):
+        if not getattr(self.nlp, "cancellable", False):
+            return None
+        from yurei.core.llm.mistral_client import CancelToken
+        return CancelToken()
+
+    def _infer(self, text: str, token) -> Dict[str, Any]:
+        if token is None:
+            return self.nlp.infer(text)
+        return self.nlp.infer(text, cancel=token)
+
+    def _submit(self, text: str, token):
+        """
+        Run _infer on the pool. Once abandoned calls that could not be
+        stopped fill every worker, new parses get a fresh pool instead of
+        queueing behind them; the old one is left to drain.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        with self._pool_lock:
+            self._stale = {f for f in self._stale if not f.done()}
+            if self._pool is None or len(self._stale) >= LLM_WORKERS:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ThreadPoolExecutor(max_workers=max(1, LLM_WORKERS), thread_name_prefix="intent-llm")
+                self._stale = set()
+            return self._pool.submit(self._infer, text, token)
+
+    def _abandon(self, future, token) -> None:
+        if future.cancel():
+            return
+        if token is not None:
+            token.cancel()
+        with self._pool_lock:
+            self._stale.add(future)
+
     def _maybe_infer_top(self, text: str, payload: Dict[str, Any]) -> None:
         m = TOP_RE.search(text or "")
         if m:
@@ -1,64 +1,535 @@
 # yurei/core/intents.py
 import re
-from typing import Optional, Dict
+import time
+from typing import Optional, Dict, List, Iterable, Tuple
 
 IP_CIDR_RE = re.compile(r"\b(?:(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?)\b")
-HOSTNAME_RE = re.compile(r"\b([a-z0-9\-]+\.[a-z]{2,})\b", re.I)
+# an IPv4 range (10.0.0.1-200, 10.0.0.1-10.0.3.255) or an IPv6 address/block
+IP_RANGE_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}-(?:(?:\d{1,3}\.){3})?\d{1,3}\b")
+IP6_RE = re.compile(r"(?<![\w:.])(?:[0-9a-f]{0,4}:){2,7}[0-9a-f]{0,4}(?:/\d{1,3})?(?![\w:])", re.I)
+EXCLUDE_RE = re.compile(r"\b(?:exclude|excluding|except|minus|but not)\b|--exclude\b", re.I)
+HOSTNAME_RE = re.compile(r"\b((?:[a-z0-9\-]+\.)+[a-z]{2,})\b", re.I)
 PORTS_RE = re.compile(r"\b(?:ports?|p)\s*[:=]?\s*([\d,\-]+)\b", re.I)
 RAW_PORTS_RE = re.compile(r"\b(\d{1,5}(?:-\d{1,5})?(?:,\d{1,5})*)\b")
+WORKERS_RE = re.compile(r"\b(?:workers?|parallel|shards?)\s*[:=]?\s*(\d{1,3})\b", re.I)
 
 FLAG_WORDS = {
     "verbose": ["verbose", "-v", "v"],
     "aggressive": ["aggressive", "-A", "aggr"],
     "udp": ["udp"],
     "ping": ["ping", "icmp"],
-    "http": ["http", "web"],
+    "http": ["http", "https", "web"],
     "smb": ["smb"],
-    "vuln": ["vuln", "vulnerability", "vulnerabilities"],
+    "vuln": ["vuln", "vulns", "vulnerability", "vulnerabilities"],
     "save": ["save", "output", "-oA", "-oX", "export"],
+    "fresh": ["fresh", "rescan", "--fresh", "no cache"],
+    "live": ["live", "live hosts", "alive", "discover first", "--live"],
+    "quick": ["quick", "quickly", "fast", "--quick"],
 }
 CONSENT_WORDS = ("consent", "authorized", "authorised", "permission", "--consent")
+# Questions about earlier results ("which hosts had 445 open last week"),
+# answered from the result store instead of by scanning. These words always
+# mean a query; a leading which/where/when or a time window ("last week")
+# does too, unless the command also names a kind of scan. A question asked
+# about what was seen ("which hosts had smb open", "what hosts have port 22
+# open") is a query even when it names a service, unless it has a scan verb.
+QUERY_WORDS = ("history", "next page", "more results", "--query")
+QUESTION_RE = re.compile(r"^\W*(?:which|where|when)\b", re.I)
+SEEN_RE = re.compile(r"^\W*(?:which|what|where)\b.*\b(?:had|was|were|did|seen|showed|(?:have|has)\b.*\bopen)\b",
+                     re.I | re.S)
+# Words that make a command a scan request even when it reads like a question
+# ("check smb on 10.0.0.5 which is the file server"); every INTENT_WORDS keyword counts too.
+SCAN_WORDS = ("check", "enumerate", "enum", "probe", "sweep", "os", "os detection", "fingerprint",
+              "service", "services", "version detection", "-sv", "-sc", "-ss", "-st", "-su")
 
-def _find_target(text: str) -> Optional[str]:
-    m = IP_CIDR_RE.search(text)
-    if m: return m.group(0)
-    m = HOSTNAME_RE.search(text)
-    if m: return m.group(0)
-    return None
-
-def _find_ports(text: str) -> Optional[str]:
-    m = PORTS_RE.search(text)
-    if m: return m.group(1)
-    m_all = RAW_PORTS_RE.findall(text)
-    for token in m_all:
-        if "," in token or "-" in token or (token.isdigit() and 1 <= int(token) <= 65535):
-            return token
-    return None
-
-def _find_flags(text: str) -> Dict[str, bool]:
+# Keywords per intent, lowest priority first: when several match, the last one wins.
+INTENT_WORDS = (
+    ("nmap_scan", ("nmap", "scan", "scans", "scanning", "rescan")),
+    ("udp_scan", ("udp",)),
+    ("http_enum", ("http", "https", "web")),
+    ("smb_enum", ("smb", "ms17")),
+    ("vuln_scan", ("vuln", "vulns", "vulnerability", "vulnerabilities")),
+    ("ping", ("ping", "host discovery", "-sn")),
+)
+_INTENT_RANK = {name: rank for rank, (name, _) in enumerate(INTENT_WORDS)}
+TARGET_INTENTS = ("nmap_scan", "udp_scan", "http_enum", "smb_enum", "vuln_scan", "ping")
+
+def _build_keywords() -> Dict[str, List[Tuple[str, str]]]:
+    table: Dict[str, List[Tuple[str, str]]] = {}
+    for intent, words in INTENT_WORDS:
+        for w in words:
+            table.setdefault(w.lower(), []).append(("intent", intent))
+    for flag, words in FLAG_WORDS.items():
+        for w in words:
+            table.setdefault(w.lower(), []).append(("flag", flag))
+    for w in CONSENT_WORDS:
+        table.setdefault(w.lower(), []).append(("consent", ""))
+    for w in QUERY_WORDS:
+        table.setdefault(w.lower(), []).append(("query", ""))
+    for w in SCAN_WORDS:
+        table.setdefault(w.lower(), []).append(("scan", ""))
+    return table
+
+_KEYWORDS = _build_keywords()
+# the words among them that ask for a scan rather than name what was scanned
+_SCAN_VERBS = frozenset(w.lower() for w in INTENT_WORDS[0][1] + INTENT_WORDS[-1][1] + SCAN_WORDS)
+
+# The text is split on whitespace and each token classified on its own, so
+# cost grows with the number of words rather than with characters times
+# patterns. A plain word (the bulk of a pasted ticket) costs one dict lookup
+# in _WORDS: keywords, the "ports"/"top"/"workers" clause words that take the
+# next token as their value, exclude words, time-window words and the first
+# words of multi-word keywords. Tokens with digits, dots or colons are
+# matched against the address and port patterns anchored at their start;
+# clause words glued to their value ("-p22", "top=100") are one more anchored
+# match, identifiers like "INC-4471" or "x86-64" are ordinary words, and
+# anything odder ("http://host/", "10.0.0.1:8080", IPv6) goes through
+# _TOKEN_LEXER, whose alternatives are in priority order so an address's
+# digits are never taken for ports.
+_TOKEN_LEXER = re.compile(
+    r"(?P<ports>\b(?:ports?|p)\s*[:=]?\s*(?P<ports_v>[\d,\-]+)\b)"
+    r"|(?P<top>\btop\s*[:=]?\s*(?P<top_v>\d{1,5})\b)"
+    r"|(?P<workers>\b(?:workers?|parallel|shards?)\s*[:=]?\s*(?P<workers_v>\d{1,3})\b)"
+    r"|(?P<exclude>--exclude\b)"
+    r"|(?P<range>" + IP_RANGE_RE.pattern + r")"
+    r"|(?P<ip>" + IP_CIDR_RE.pattern + r")"
+    r"|(?P<ip6>" + IP6_RE.pattern + r")"
+    r"|(?P<host>" + HOSTNAME_RE.pattern + r")"
+    r"|(?P<raw>" + RAW_PORTS_RE.pattern + r")"
+    r"|(?<![\w-])(?P<word>-{0,2}\w+)",
+    re.I,
+)
+# Whole-token shapes, tried with one anchored match before _TOKEN_LEXER, with
+# quotes, brackets and trailing punctuation ("(10.0.0.1)", "3389,", "out.")
+# matched around them. A clause glued to its value ("-p22", "top=100") is one
+# token; identifiers such as "INC-4471", "x86-64" or "2fa" are ordinary words,
+# not ports.
+_ODD_TOKEN = re.compile(
+    r"[\"'()\[\]{}<>,;!?]*(?:"
+    r"(?P<ip>(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?)"
+    r"|(?P<range>(?:\d{1,3}\.){3}\d{1,3}-(?:(?:\d{1,3}\.){3})?\d{1,3})"
+    r"|(?P<raw>\d{1,5}(?:-\d{1,5})?(?:,\d{1,5})*)"
+    r"|(?P<host>(?:[a-z0-9\-]+\.)+[a-z]{2,})"
+    r"|-{0,2}(?:(?P<ports>ports?|p)|(?P<top>top)|(?P<workers>workers?|parallel|shards?))[:=]?(?P<value>\d[\d,\-]*)"
+    r"|(?P<ident>[a-z0-9]+(?:-[a-z0-9]+)*)"
+    r")[\"'()\[\]{}<>,;!?.:]*")
+_CLAUSE_VALUES = {"ports": re.compile(r"[\d,\-]+\b"), "top": re.compile(r"\d{1,5}\b"),
+                  "workers": re.compile(r"\d{1,3}\b")}
+# A word other than a connective between two exclusions ends exclude mode
+# ("except 10.0.0.0/24 on 10.0.0.0/16"; "except 10.0.0.1 and 10.0.0.2" keeps going).
+_CONNECTIVES = frozenset(("and", "or", "nor", "&"))
+_EXCLUDE, _WINDOW, _PHRASE, _KEYWORD = range(4)
+
+def _build_words() -> Dict[str, tuple]:
+    table: Dict[str, tuple] = {}
+    for w in ("exclude", "excluding", "except", "minus", "--exclude"):
+        table[w] = (_EXCLUDE,)
+    for w in ("last", "past", "since", "after", "before", "until", "today", "yesterday"):
+        table[w] = (_WINDOW,)
+    for w in ("ports", "port", "p", "-p", "--ports"):
+        table[w] = ("ports",)
+    table["top"] = ("top",)
+    for w in ("workers", "worker", "parallel", "shards", "shard"):
+        table[w] = ("workers",)
+    phrases: Dict[str, List[Tuple[str, ...]]] = {"but": [("not",)]}
+    for k in _KEYWORDS:
+        if " " in k:
+            first, *rest = k.split()
+            phrases.setdefault(first, []).append(tuple(rest))
+        else:
+            table[k] = (_KEYWORD,)
+    for first, rests in phrases.items():
+        # a phrase's first word may be a keyword itself ("live" / "live hosts")
+        table[first] = (_PHRASE, tuple(rests), table.get(first))
+    return table
+
+_WORDS = _build_words()
+# plain keywords don't depend on position, so they are found with one set
+# intersection instead of being visited
+_PLAIN_KEYWORDS = frozenset(w for w, entry in _WORDS.items() if entry == (_KEYWORD,))
+_VISITED = frozenset(_WORDS).difference(_PLAIN_KEYWORDS)
+_ADDRESS_KINDS = frozenset(("ip", "range", "ip6", "host"))
+
+class _Lexed:
+    __slots__ = ("intent", "flags", "consent", "ip", "host", "ports", "raw_ports", "top", "workers",
+                 "targets", "excludes", "port_clauses", "query", "scan_verb", "words", "window", "_rank")
+
+    def __init__(self, words: List[str], targets: List[str], excludes: List[str], port_clauses: List[str],
+                 window: List[int]):
+        self.intent = "unknown"
+        self.flags = dict.fromkeys(FLAG_WORDS, False)
+        self.consent = False
+        self.ip = self.host = self.raw_ports = None
+        self.top = self.workers = None
+        self.targets = targets
+        self.excludes = excludes
+        self.port_clauses = port_clauses
+        self.ports = port_clauses[0] if port_clauses else None
+        self.query = self.scan_verb = False
+        # the lowercased tokens, and where a time-window word (last/since/yesterday...) is among them
+        self.words = words
+        self.window = window
+        self._rank = -1
+
+    def keywords(self, words) -> None:
+        """Apply keywords found in the text; the highest-ranked intent wins whatever the order."""
+        for w in words:
+            for what, name in _KEYWORDS[w]:
+                if what == "intent":
+                    rank = _INTENT_RANK[name]
+                    if rank > self._rank:
+                        self._rank, self.intent = rank, name
+                    self.scan_verb = True
+                elif what == "flag":
+                    self.flags[name] = True
+                elif what == "consent":
+                    self.consent = True
+                elif what == "query":
+                    self.query = True
+                else:
+                    self.scan_verb = True
+
+def _lex(text: str) -> _Lexed:
+    """
+    Extract intent, flags, consent, targets, exclusions, ports, top and
+    workers in one pass over the tokens. After an exclude word ("exclude",
+    "except", "minus", ...) addresses are exclusions until the next other word.
+    """
     lower = text.lower()
-    return {name: any(k.lower() in lower for k in keys) for name, keys in FLAG_WORDS.items()}
+    if len(lower) != len(text):  # lower() changed a length (non-ASCII); addresses keep their lowered form
+        text = lower
+    lowered = lower.split()
+    n = len(lowered)
+    # keywords don't depend on position: collected here, applied once at the end
+    found = _PLAIN_KEYWORDS.intersection(lowered)
+    more: List[str] = []
+    targets: List[str] = []
+    excludes: List[str] = []
+    port_clauses: List[str] = []
+    window: List[int] = []
+    ip = host = raw_ports = top = workers = None
+    # Ordinary words and plain keywords are filtered out without entering the
+    # loop below: only the other table words and tokens that aren't purely
+    # alphabetic are visited. A gap between two visited indexes means other
+    # words came in between, which ends exclude mode unless they were all
+    # connectives.
+    # A word with one trailing punctuation mark ("team," "out.") is still ordinary.
+    visited, words = _VISITED, _WORDS
+    visit = [i for i, lo in enumerate(lowered)
+             if lo in visited or not (lo.isalpha() or lo[:-1].isalpha() and lo[:-1] not in words)]
+    excluding = False
+    prev = -1
+    for i in visit:
+        if i <= prev:  # already consumed as a clause value or phrase word
+            continue
+        if excluding and i != prev + 1:
+            excluding = _CONNECTIVES.issuperset(lowered[prev + 1:i])
+        prev = i
+        lo = lowered[i]
+        entry = words.get(lo)
+        if entry is None:
+            m = _ODD_TOKEN.fullmatch(lo)
+            kind = m.lastgroup if m else None
+            if kind == "ident":
+                # a word behind punctuation ("verbose?", "ports:") or an identifier ("INC-4471")
+                lo = m.group(kind)
+                entry = words.get(lo)
+                if entry is None:
+                    excluding = excluding and lo in _CONNECTIVES
+                    continue
+        if entry is None:
+            if kind == "host":
+                # hostnames keep the case they were typed in
+                value = m.group(kind)
+                at = lower.find(value)
+                pieces = ((kind, text[at:at + len(value)]),)
+            elif kind == "value":
+                kind = "ports" if m.group("ports") else "top" if m.group("top") else "workers"
+                value = _CLAUSE_VALUES[kind].match(m.group("value"))
+                pieces = ((kind, value.group()),) if value else ()
+            elif kind:
+                pieces = ((kind, m.group(kind)),)
+            else:
+                at = lower.find(lo)
+                pieces = []
+                for m in _TOKEN_LEXER.finditer(text[at:at + len(lo)]):
+                    kind = m.lastgroup
+                    if kind == "word":
+                        word = m.group("word").lower()
+                        pieces.append(("keyword", word) if word in _KEYWORDS else ("word", word))
+                    else:
+                        pieces.append((kind, m.group(kind + "_v" if kind in _CLAUSE_VALUES else kind)))
+            for kind, value in pieces:
+                if kind in _ADDRESS_KINDS:
+                    if excluding:
+                        excludes.append(value)
+                        continue
+                    targets.append(value)
+                    if kind == "host":
+                        host = value if host is None else host
+                    elif ip is None:
+                        ip = value
+                elif kind == "raw":
+                    if raw_ports is None and ("," in value or "-" in value or 1 <= int(value) <= 65535):
+                        raw_ports = value
+                    excluding = False
+                elif kind == "ports":
+                    port_clauses.append(value)
+                    excluding = False
+                elif kind == "top":
+                    top = int(value) if top is None else top
+                    excluding = False
+                elif kind == "workers":
+                    workers = int(value) if workers is None else workers
+                    excluding = False
+                else:
+                    if kind == "keyword":
+                        more.append(value)
+                    excluding = kind == "exclude"
+            continue
+        what = entry[0]
+        if what == _PHRASE:
+            for rest in entry[1]:
+                if tuple(lowered[i + 1:i + 1 + len(rest)]) == rest:
+                    if rest == ("not",):
+                        excluding = True
+                    else:
+                        more.append(" ".join((lo,) + rest))
+                        excluding = False
+                    prev = i + len(rest)
+                    break
+            else:
+                entry = entry[2]
+                if entry is None:
+                    excluding = False
+                    continue
+                what = entry[0]
+            if what == _PHRASE:
+                continue
+        if what == _KEYWORD:
+            more.append(lo)
+            excluding = False
+        elif what == _EXCLUDE:
+            excluding = True
+        elif what == _WINDOW:
+            window.append(i)
+            excluding = False
+        else:
+            # clause word: its value is the next token (after an optional lone ":" or "=")
+            j = i + 2 if i + 1 < n and lowered[i + 1] in (":", "=") else i + 1
+            m = _CLAUSE_VALUES[what].match(lowered[j]) if j < n else None
+            if m:
+                if what == "ports":
+                    port_clauses.append(m.group())
+                elif what == "top":
+                    top = int(m.group()) if top is None else top
+                else:
+                    workers = int(m.group()) if workers is None else workers
+                prev = j
+            excluding = False
+    out = _Lexed(lowered, targets, excludes, port_clauses, window)
+    out.ip, out.host, out.raw_ports, out.top, out.workers = ip, host, raw_ports, top, workers
+    out.keywords(found)
+    if more:
+        out.keywords(more)
+    return out
+
+def _has_window(lexed: _Lexed) -> bool:
+    """Whether a time window ("last week", "since 2026-10-01") appears; only tried where its words occur."""
+    for i in lexed.window:
+        if WINDOW_RE.match(" ".join(lexed.words[i:i + 4])):
+            return True
+    return False
+
+# Helpers for callers that only need one slot (e.g. the dialog manager filling
+# an answer); pass lexed to reuse a pass already made over the same text.
+def _find_target(text: str, lexed: Optional[_Lexed] = None) -> Optional[str]:
+    lexed = lexed or _lex(text)
+    return lexed.ip or lexed.host
+
+def _find_ports(text: str, lexed: Optional[_Lexed] = None) -> Optional[str]:
+    lexed = lexed or _lex(text)
+    return lexed.ports or lexed.raw_ports
+
+def _find_flags(text: str, lexed: Optional[_Lexed] = None) -> Dict[str, bool]:
+    return (lexed or _lex(text)).flags
+
+def _find_workers(text: str, lexed: Optional[_Lexed] = None) -> Optional[int]:
+    return (lexed or _lex(text)).workers
+
+def _target_slot(lexed: _Lexed) -> Optional[str]:
+    """
+    Targets as typed, repeats dropped; with exclusions, the set difference
+    in CIDR form (e.g. "10.0.0.0/8 minus 10.5.0.0/16" -> eight blocks).
+    """
+    if not lexed.excludes:
+        # overlapping targets are merged when the scan runs (nmap_plugin._normalize_target)
+        return " ".join(dict.fromkeys(lexed.targets)) or None
+    from .targets import AddressSet
+    try:
+        wanted = AddressSet.parse(" ".join(lexed.targets)) - AddressSet.parse(" ".join(lexed.excludes))
+    except ValueError:
+        return " ".join(lexed.targets) or None
+    return str(wanted) or None
+
+def _ports_slot(lexed: _Lexed) -> Optional[str]:
+    """Every "ports ..." clause, joined into one nmap -p list."""
+    if not lexed.port_clauses:
+        return lexed.raw_ports
+    # overlaps and repeats are merged when the scan runs (nmap_plugin._normalize_ports)
+    return ",".join(lexed.port_clauses)
+
+# Time windows for queries; "last week" means the past seven days.
+WINDOW_RE = re.compile(
+    r"\b(?:(?:in\s+the\s+|over\s+the\s+)?(?:last|past)\s+(?:(?P<n>\d+)\s+)?(?P<unit>minute|min|hour|day|week|month|year)s?"
+    r"|(?P<since>since|after|before|until)\s+(?P<when>\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2})?|yesterday|today)"
+    r"|(?P<day>today|yesterday))\b", re.I)
+PAGE_RE = re.compile(r"\bpage\s+(\d{1,6})\b", re.I)
+LIMIT_RE = re.compile(r"\b(?:limit|per\s+page|page\s+size)\s*[:=]?\s*(\d{1,5})\b", re.I)
+VERSION_RE = re.compile(r"^v?\d+(?:\.(?:\d+|x|\*))+$|^v?\d+(?:\.x|\.\*)?$", re.I)
+WINDOW_UNITS = {"minute": 60, "min": 60, "hour": 3600, "day": 86400, "week": 7 * 86400,
+                "month": 30 * 86400, "year": 365 * 86400}
+QUERY_STATES = {"open": "open", "closed": "closed", "filtered": "filtered", "any": "any", "all": "any"}
+# Words that carry no filter ("which hosts had ... open"); anything else that isn't an
+# address, port, state or window is taken as a service/product name.
+QUERY_FILLER = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "has", "have", "had", "do", "does", "did",
+    "what", "who", "show", "list", "find", "get", "me", "all", "any", "of", "on", "in", "at", "to", "for",
+    "with", "and", "or", "by", "from", "host", "hosts", "machine", "machines", "box", "boxes", "server",
+    "servers", "port", "ports", "service", "services", "running", "run", "runs", "ran", "listening",
+    "exposed", "there", "it", "its", "them", "that", "this", "us", "we", "our", "my", "ever", "time",
+    "version", "versions", "product", "state", "results", "result", "up", "alive", "down", "next", "more",
+    "page", "please", "still", "now", "last", "past", "over", "since", "before", "after", "until",
+    "which", "where", "when", "seen", "previously", "earlier", "query",
+}
+# Keywords that double as service names when they appear in a question.
+QUERY_SERVICE_WORDS = ("http", "https", "web", "smb")
+
+def _day_start(offset: int, now: float) -> float:
+    t = time.localtime(now)
+    return time.mktime((t.tm_year, t.tm_mon, t.tm_mday + offset, 0, 0, 0, 0, 0, -1))
+
+def _time_point(when: str, now: float) -> float:
+    when = when.lower()
+    if when in ("today", "yesterday"):
+        return _day_start(0 if when == "today" else -1, now)
+    fmt = "%Y-%m-%d %H:%M" if (" " in when or "t" in when) else "%Y-%m-%d"
+    return time.mktime(time.strptime(when.replace("t", " "), fmt))
+
+def _time_window(text: str, now: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+    """(since, until) as epoch seconds from phrases like "last 3 days", "yesterday", "since 2026-10-01"."""
+    now = time.time() if now is None else now
+    since = until = None
+    for m in WINDOW_RE.finditer(text):
+        if m.group("unit"):
+            since = now - int(m.group("n") or 1) * WINDOW_UNITS[m.group("unit").lower()]
+        elif m.group("day"):
+            since = _day_start(0 if m.group("day").lower() == "today" else -1, now)
+            until = _day_start(0, now) if m.group("day").lower() == "yesterday" else None
+        else:
+            try:
+                point = _time_point(m.group("when"), now)
+            except ValueError:
+                continue
+            if m.group("since").lower() in ("since", "after"):
+                since = point
+            else:
+                until = point
+    return since, until
+
+def _query_slots(text: str, lexed: _Lexed) -> Dict:
+    """
+    Filters for a question about stored results: addresses, ports, state,
+    protocol, a product (with an optional version such as 7.x), a time
+    window and the page to show.
+    """
+    since, until = _time_window(text)
+    m = PAGE_RE.search(text)
+    page = int(m.group(1)) if m else None
+    if re.search(r"\b(?:next\s+page|more\s+results)\b", text, re.I):
+        page = "next"
+    m = LIMIT_RE.search(text)
+    limit = int(m.group(1)) if m else None
+
+    rest = text
+    for pattern in (WINDOW_RE, LIMIT_RE, PAGE_RE, PORTS_RE, IP_RANGE_RE, IP_CIDR_RE, IP6_RE, HOSTNAME_RE, EXCLUDE_RE):
+        rest = pattern.sub(" ", rest)
+    state = protocol = version = None
+    ports: List[str] = list(lexed.port_clauses)
+    terms: List[str] = []
+    after_term = False
+    for token in re.findall(r"[\w.*+\-]+", rest):
+        low = token.lower().strip(".")
+        if low in QUERY_STATES and state is None:
+            state = QUERY_STATES[low]
+        elif low in ("tcp", "udp"):
+            protocol = low
+        elif after_term and version is None and VERSION_RE.match(low):
+            version = low
+        elif RAW_PORTS_RE.fullmatch(low):
+            ports.append(low)
+        elif low and low not in QUERY_FILLER and (low not in _KEYWORDS or low in QUERY_SERVICE_WORDS):
+            terms.append(token)
+            after_term = True
+            continue
+        after_term = False
+
+    port_spec = None
+    if ports:
+        from .targets import PortSet
+        try:
+            port_spec = str(PortSet.parse(",".join(ports)))
+        except ValueError:
+            port_spec = None
+    view = "ports"
+    if not port_spec and not terms and (lexed.flags.get("live") or re.search(r"\b(?:up|alive)\b", rest, re.I)):
+        view = "hosts"
+    return {
+        "target": _target_slot(lexed),
+        "ports": port_spec,
+        "state": state or "open",
+        "protocol": protocol or ("udp" if lexed.flags.get("udp") else None),
+        "product": " ".join(terms) or None,
+        "version": version,
+        "since": since,
+        "until": until,
+        "page": page,
+        "limit": limit,
+        "view": view,
+    }
 
 def parse_intent(user_input: str) -> Dict:
     text = (user_input or "").strip()
-    lower = text.lower()
+    lexed = _lex(text)
+    intent = lexed.intent
 
-    intent = "unknown"
-    if any(w in lower for w in ("nmap", "scan")): intent = "nmap_scan"
-    if "udp" in lower: intent = "udp_scan"
-    if any(w in lower for w in ("http", "web")): intent = "http_enum"
-    if any(w in lower for w in ("smb", "ms17")): intent = "smb_enum"
-    if any(w in lower for w in ("vuln", "vulnerability")): intent = "vuln_scan"
-    if any(w in lower for w in ("ping", "host discovery", "-sn")): intent = "ping"
-
-    slots = {
-        "target": _find_target(text),
-        "ports": _find_ports(text),
-    }
-    slots.update(_find_flags(text))
-    slots["mode"] = "udp" if slots.get("udp") else "tcp"
-    slots["consent"] = any(w in lower for w in CONSENT_WORDS)  # <— NEW
+    # "scan 10.0.0.5 which ports are open" still scans; "which hosts had smb open last week" can only be history
+    question = QUESTION_RE.match(text)
+    if lexed.query or (question and not lexed.scan_verb) \
+            or ((question or not lexed.scan_verb) and lexed.window and _has_window(lexed)) \
+            or (SEEN_RE.match(text) and _SCAN_VERBS.isdisjoint(lexed.words)):
+        return {"intent": "query", "slots": _query_slots(text, lexed), "required": [], "missing": []}
+
+    slots = {"target": _target_slot(lexed), "ports": _ports_slot(lexed), **lexed.flags,
+             "top": lexed.top, "workers": lexed.workers,
+             "mode": "udp" if lexed.flags["udp"] else "tcp", "consent": lexed.consent}
 
-    required = ["target"] if intent in ("nmap_scan","udp_scan","http_enum","smb_enum","vuln_scan","ping") else []
-    missing = [s for s in required if not slots.get(s)]
+    required = ["target"] if intent in TARGET_INTENTS else []
+    missing = ["target"] if required and not slots["target"] else []
     return {"intent": intent, "slots": slots, "required": required, "missing": missing}
+
+def parse_many(lines: Iterable[str]) -> List[Dict]:
+    """
+    Parse a batch of commands. Repeated lines are lexed once; every entry
+    still gets its own payload so callers can mutate them independently.
+    """
+    seen: Dict[str, Dict] = {}
+    out = []
+    for line in lines:
+        key = (line or "").strip()
+        p = seen.get(key)
+        if p is None:
+            p = seen[key] = parse_intent(key)
+        out.append({"intent": p["intent"], "slots": dict(p["slots"]),
+                    "required": list(p["required"]), "missing": list(p["missing"])})
+    return out
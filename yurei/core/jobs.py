@@ -0,0 +1,317 @@
+# yurei/core/jobs.py
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Optional, Dict, Any, List, Callable
+from yurei.core.targets import AddressSet, IntervalSet
+
+# Jobs running at once, and at once per subnet/host (see footprint).
+MAX_JOBS = int(os.getenv("YUREI_MAX_JOBS", "4"))
+PER_SUBNET = int(os.getenv("YUREI_JOBS_PER_SUBNET", "1"))
+# Addresses within one block of this size share a per-subnet slot.
+SUBNET_PREFIX_V4 = 24
+SUBNET_PREFIX_V6 = 64
+# Finished jobs kept for `jobs` / `wait`.
+HISTORY = 100
+
+PRIORITIES = {"high": 0, "normal": 5, "low": 9}
+PRIORITY_RE = re.compile(r"\s*\b(?:prio(?:rity)?)\s*[:=]?\s*(high|normal|low|\d)\b", re.I)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+def parse_priority(text: str):
+    """Strip a 'priority high|normal|low|0-9' clause from a command; returns (text, priority)."""
+    m = PRIORITY_RE.search(text or "")
+    if not m:
+        return text, PRIORITIES["normal"]
+    value = m.group(1).lower()
+    priority = PRIORITIES[value] if value in PRIORITIES else int(value)
+    return (text[:m.start()] + text[m.end():]).strip(), priority
+
+def _widen(space: IntervalSet, bits: int) -> IntervalSet:
+    mask = (1 << bits) - 1
+    return IntervalSet((lo & ~mask, hi | mask) for lo, hi in space.intervals)
+
+def footprint(target: Optional[str]) -> AddressSet:
+    """
+    Every /24 (IPv4) or /64 (IPv6) a target touches, plus its hostnames, so
+    "10.0.0.0/16" holds 256 slots and "10.0.0.5 10.0.1.5" two. A target that
+    doesn't parse is one name.
+    """
+    if not target:
+        return AddressSet()
+    try:
+        addresses = AddressSet.parse(target)
+    except ValueError:
+        return AddressSet(names=[target])
+    return AddressSet(_widen(addresses.v4, 32 - SUBNET_PREFIX_V4),
+                      _widen(addresses.v6, 128 - SUBNET_PREFIX_V6), addresses.names)
+
+def subnet_key(target: Optional[str]) -> str:
+    """The blocks and hostnames of footprint(target), for display."""
+    return str(footprint(target))
+
+def busiest(area: AddressSet, others: List[AddressSet]) -> int:
+    """How many of others overlap the most crowded /24, /64 or hostname of area."""
+    peak = 0
+    for space in ("v4", "v6"):
+        events = []
+        for other in others:
+            for lo, hi in (getattr(area, space) & getattr(other, space)).intervals:
+                events += [(lo, 1), (hi + 1, -1)]
+        depth = 0
+        for _, step in sorted(events):
+            depth += step
+            peak = max(peak, depth)
+    for name in area.names:
+        peak = max(peak, sum(name in other.names for other in others))
+    return peak
+
+class Job:
+    __slots__ = ("id", "command", "payload", "session_id", "priority", "footprint", "subnet", "status",
+                 "submitted", "started", "finished", "result", "error", "_procs", "_cancel",
+                 "_done", "_lock")
+
+    def __init__(self, job_id: int, command: str, payload: Dict[str, Any], session_id: str, priority: int):
+        self.id = job_id
+        self.command = command
+        self.payload = payload
+        self.session_id = session_id
+        self.priority = priority
+        self.footprint = footprint(payload.get("slots", {}).get("target"))
+        self.subnet = str(self.footprint)
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.result = None
+        self.error = None
+        self._procs: List[Any] = []
+        self._cancel = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {"id": self.id, "status": self.status, "priority": self.priority, "command": self.command,
+                "subnet": self.subnet, "elapsed": round(end - (self.started or end), 1),
+                "queued_for": round((self.started or end) - self.submitted, 1), "error": self.error}
+
+    def _track(self, proc) -> None:
+        with self._lock:
+            self._procs.append(proc)
+            cancelled = self._cancel
+        if cancelled:
+            _kill(proc)
+
+    def _untrack(self, proc) -> None:
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+
+    def _request_cancel(self) -> None:
+        with self._lock:
+            self._cancel = True
+            procs = list(self._procs)
+        for proc in procs:
+            _kill(proc)
+
+def _kill(proc) -> None:
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+# The job whose work is running on this thread (set by the scheduler, carried by bind()).
+_local = threading.local()
+
+def current_job() -> Optional[Job]:
+    return getattr(_local, "job", None)
+
+def bind(fn: Callable) -> Callable:
+    """Wrap fn so that, run on another thread (e.g. a shard pool), it belongs to the caller's job."""
+    job = current_job()
+    if job is None:
+        return fn
+
+    @wraps(fn)
+    def inner(*args, **kwargs):
+        previous = current_job()
+        _local.job = job
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.job = previous
+    return inner
+
+def track_process(proc) -> None:
+    """Register a child process with the current job so cancelling the job kills it."""
+    job = current_job()
+    if job is not None:
+        job._track(proc)
+
+def untrack_process(proc) -> None:
+    job = current_job()
+    if job is not None:
+        job._untrack(proc)
+
+class JobScheduler:
+    """
+    Priority job queue driven by an asyncio loop on a background thread.
+    Jobs run on a thread pool (handlers are blocking), lowest priority
+    number first, FIFO within a priority, at most `max_jobs` at once and
+    `per_subnet` at once on any /24, /64 or host (see footprint), so a burst
+    of scans against one segment queues up instead of hammering it while
+    other segments proceed. A wide or multi-target job needs every block it
+    covers to have room.
+    """
+
+    def __init__(self, runner: Callable[[Job], Any], max_jobs: int = MAX_JOBS, per_subnet: int = PER_SUBNET,
+                 on_finish: Optional[Callable[[Job], None]] = None):
+        self.runner = runner
+        self.max_jobs = max(1, max_jobs)
+        self.per_subnet = max(1, per_subnet)
+        self.on_finish = on_finish
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._pending: List[tuple] = []
+        self._running: Dict[int, Job] = {}
+        self._jobs: "OrderedDict[int, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="yurei-job")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="yurei-jobs", daemon=True)
+        self._thread.start()
+
+    # ----- thread-safe API -----
+    def submit(self, payload: Dict[str, Any], command: str, session_id: str = "local",
+               priority: int = PRIORITIES["normal"]) -> Job:
+        job = Job(next(self._ids), command, payload, session_id, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+            heapq.heappush(self._pending, (priority, next(self._seq), job))
+            self._trim_history()
+        self._loop.call_soon_threadsafe(self._pump)
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job, or kill a running job's nmap processes. False if unknown or finished."""
+        job = self.get(job_id)
+        if job is None or job.status not in (QUEUED, RUNNING):
+            return False
+        job._request_cancel()
+        self._loop.call_soon_threadsafe(self._pump)
+        return True
+
+    def wait(self, job_id: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Wait for one job, or for every job submitted so far."""
+        targets = [self.get(job_id)] if job_id is not None else self.jobs()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in targets:
+            if job is None:
+                continue
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(left):
+                return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def shutdown(self, cancel: bool = True) -> None:
+        if cancel:
+            for job in self.jobs():
+                if job.status in (QUEUED, RUNNING):
+                    self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ----- loop thread -----
+    def _pump(self) -> None:
+        """Start every queued job that fits under the global and per-subnet caps, best priority first."""
+        settled = []
+        with self._lock:
+            deferred = []
+            while self._pending and len(self._running) < self.max_jobs:
+                entry = heapq.heappop(self._pending)
+                job = entry[2]
+                if job._cancel:
+                    settled.append(job)
+                    continue
+                if job.footprint and busiest(job.footprint, [j.footprint for j in self._running.values()]) \
+                        >= self.per_subnet:
+                    deferred.append(entry)
+                    continue
+                job.status = RUNNING
+                job.started = time.time()
+                self._running[job.id] = job
+                self._loop.create_task(self._execute(job))
+            self._pending.extend(deferred)
+            # cancelled jobs still waiting behind full caps are settled right away
+            settled += [e[2] for e in self._pending if e[2]._cancel]
+            self._pending = [e for e in self._pending if not e[2]._cancel]
+            heapq.heapify(self._pending)
+        for job in settled:
+            self._finish(job, CANCELLED)
+
+    async def _execute(self, job: Job) -> None:
+        from yurei.core import metrics
+        metrics.record("job.queue_wait", job.started - job.submitted)
+        try:
+            job.result = await self._loop.run_in_executor(self._pool, self._run, job)
+            status = CANCELLED if job._cancel else DONE
+        except Exception as e:
+            job.error = str(e)
+            status = CANCELLED if job._cancel else FAILED
+        with self._lock:
+            self._running.pop(job.id, None)
+        self._finish(job, status)
+        self._pump()
+
+    def _run(self, job: Job):
+        _local.job = job
+        try:
+            return self.runner(job)
+        finally:
+            _local.job = None
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        job._done.set()
+        if self.on_finish:
+            try:
+                self.on_finish(job)
+            except Exception:
+                pass
+
+    def _trim_history(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if j.status not in (QUEUED, RUNNING)]
+        for jid in finished[:max(0, len(finished) - HISTORY)]:
+            del self._jobs[jid]
@@ -0,0 +1,95 @@
+# yurei/core/llm/cache.py
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from yurei.core.cache import ResultCache, make_key
+
+LLM_CACHE_TTL = float(os.getenv("YUREI_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+_WS_RE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so near-identical commands share an entry."""
+    return _WS_RE.sub(" ", (text or "").strip().lower()).strip(" .!?")
+
+class InferenceCache:
+    """
+    Two-level cache for parsed LLM output: an in-process LRU in front of a
+    persistent ResultCache. Entries are scoped to the model name and a hash
+    of the system prompt, so changing either invalidates everything cached
+    under the old pair. On first disk access the entries of this model's
+    older prompts are dropped; other models' entries are left alone, since
+    another process may still be using them.
+    """
+
+    def __init__(self, model: str, system_prompt: str, ttl: float = LLM_CACHE_TTL,
+                 max_memory: int = 256, max_disk: int = 5000, persistent: bool = True):
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+        self._model_prefix = f"llm:{model}:"
+        self.namespace = self._model_prefix + prompt_hash
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = ResultCache(self.namespace, default_ttl=ttl, max_entries=max_disk) if persistent else None
+        self._purged = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = make_key(normalize_text(text))
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry and entry[0] > now:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry:
+                del self._lru[key]
+        found = self._disk_get(key)
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            data, expires = found
+            self.hits += 1
+            # the entry keeps the disk row's expiry rather than a fresh ttl
+            self._remember(key, data, min(expires, now + self.ttl))
+        return copy.deepcopy(data)
+
+    def put(self, text: str, data: Dict[str, Any]) -> None:
+        key = make_key(normalize_text(text))
+        with self._lock:
+            self._remember(key, copy.deepcopy(data), time.time() + self.ttl)
+        if self._disk:
+            try:
+                self._disk.put(key, json.dumps(data, separators=(",", ":")))
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, data: Dict[str, Any], expires: float) -> None:
+        self._lru[key] = (expires, data)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_memory:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(parsed value, expiry) of a live disk entry, or None."""
+        if not self._disk:
+            return None
+        try:
+            if not self._purged:
+                self._disk.drop_other_namespaces(self._model_prefix)
+                self._purged = True
+            entry = self._disk.get(key)
+        except sqlite3.Error:
+            return None
+        return (json.loads(entry["value"]), entry["expires"]) if entry else None
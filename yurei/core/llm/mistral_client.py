@@ -1,11 +1,21 @@
 import json
 import os
 import re
+import socket
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from typing import Dict, Any, List, Optional
+from yurei.core.llm.cache import InferenceCache
+from yurei.core.metrics import timed, annotate
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral:7b")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+MAX_TOKENS = int(os.getenv("YUREI_LLM_MAX_TOKENS", "256"))
 
 _SCHEMA = """\
 Return ONLY this JSON (no prose), in one line:
@@ -44,17 +54,201 @@ def _strip_json(text: str) -> Optional[str]:
     m = re.search(r"\{.*\}", text, flags=re.S)
     return m.group(0) if m else None
 
+class _JsonScanner:
+    """
+    Incremental scanner that spots the end of the first top-level JSON object
+    in a stream of text chunks (tracking nesting, strings and escapes).
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume a chunk; return the complete object text once it closes."""
+        start = 0
+        for i, ch in enumerate(chunk):
+            if self._depth == 0:
+                if ch != "{":
+                    continue
+                start = i
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buf.append(chunk[start:i + 1])
+                    return "".join(self._buf)
+        if self._depth > 0:
+            self._buf.append(chunk[start:])
+        return None
+
+class CancelToken:
+    """
+    Lets another thread abort an in-flight infer(). Cancelling shuts down the
+    socket the request is blocked on, so Ollama sees the disconnect and stops
+    generating instead of running to completion for nobody.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._socks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._event.set()
+            socks, self._socks = self._socks, []
+        for sock in socks:
+            _shutdown(sock)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._socks = []
+
+    def _attach(self, sock) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._socks.append(sock)
+                return
+        _shutdown(sock)
+
+def _shutdown(sock) -> None:
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+# Per-thread request state: time spent connecting and the active CancelToken.
+_call_state = threading.local()
+
+class _TimedConnectionMixin:
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _call_state.connect = getattr(_call_state, "connect", 0.0) + time.perf_counter() - t0
+
+    def getresponse(self, *args, **kwargs):
+        token = getattr(_call_state, "token", None)
+        if token is not None and self.sock is not None:
+            token._attach(self.sock)
+        return super().getresponse(*args, **kwargs)
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """Pooled adapter whose connections record how long connect() took."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+def _new_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = _KeepAliveAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
 class MistralClient:
     """
     Minimal client against Ollama's OpenAI-compatible /v1/chat/completions
     """
 
-    def __init__(self, url: str = OLLAMA_URL, model: str = OLLAMA_MODEL, timeout: int = 90):
+    # infer() accepts cancel=CancelToken
+    cancellable = True
+
+    def __init__(self, url: str = OLLAMA_URL, model: str = OLLAMA_MODEL, timeout: int = 90,
+                 cache: Optional[InferenceCache] = None, use_cache: bool = True, pool_size: int = 4,
+                 max_tokens: int = MAX_TOKENS):
         self.url = url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        # parsed results, keyed by normalized input + model + SYSTEM prompt hash
+        self.cache = cache if cache is not None else (InferenceCache(model, SYSTEM) if use_cache else None)
+        # one pooled keep-alive session for every request this client makes
+        self.session = _new_session(pool_size)
+        # upper bound on generated tokens; the stream is also cut once the JSON object closes
+        self.max_tokens = max_tokens
+        # last request: seconds spent connecting, to the first token and in total,
+        # tokens generated (the server's usage count when it sends one, else streamed
+        # chunks), prompt tokens if reported, and an estimate of tokens saved by
+        # stopping early: max_tokens minus chunks read, an upper bound since the
+        # model may have stopped on its own right after the JSON
+        self.last_timings: Dict[str, float] = {}
+        self.tokens_saved_est = 0
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def warm_up(self, background: bool = True) -> None:
+        """
+        Ask Ollama to load the model (and keep it loaded for OLLAMA_KEEP_ALIVE)
+        so the first real command doesn't pay the model-load cost. Also opens
+        the pooled connection. Failures are ignored: Ollama may not be running.
+        """
+        def _warm():
+            try:
+                self.session.post(f"{self.url}/api/generate",
+                                  json={"model": self.model, "keep_alive": OLLAMA_KEEP_ALIVE},
+                                  timeout=self.timeout).close()
+            except requests.RequestException:
+                pass
+
+        if not background:
+            _warm()
+            return
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            return
+        self._warmup_thread = threading.Thread(target=_warm, name="ollama-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    @timed("llm.infer")
+    def infer(self, text: str, cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+        if self.cache:
+            cached = self.cache.get(text)
+            if cached is not None:
+                annotate(cached=True)
+                return cached
+        data = self._infer_uncached(text, cancel)
+        annotate(cached=False)
+        if data is None:
+            return {"intent": "unknown", "slots": {}, "required": [], "missing": []}
+        annotate(**self.last_timings)
+        if self.cache:
+            self.cache.put(text, data)
+        return data
 
-    def infer(self, text: str) -> Dict[str, Any]:
+    def _infer_uncached(self, text: str, cancel: Optional[CancelToken] = None) -> Optional[Dict[str, Any]]:
         payload = {
             "model": self.model,
             "messages": [
@@ -62,18 +256,85 @@ class MistralClient:
                 {"role": "user", "content": text},
             ],
             "temperature": 0.2,
-            "stream": False,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "max_tokens": self.max_tokens,
         }
-        r = requests.post(f"{self.url}/v1/chat/completions", json=payload, timeout=self.timeout)
-        r.raise_for_status()
-        content = r.json()["choices"][0]["message"]["content"]
+        _call_state.connect = 0.0
+        _call_state.token = cancel
+        t0 = time.perf_counter()
+        ttft = None
+        tokens = 0
+        early_stop = False
+        scanner = _JsonScanner()
+        content = []
+        candidate = None
+        usage = None
+        try:
+            with self.session.post(f"{self.url}/v1/chat/completions", json=payload,
+                                   timeout=self.timeout, stream=True) as r:
+                r.raise_for_status()
+                if not r.headers.get("Content-Type", "").startswith("text/event-stream"):
+                    # server ignored "stream": plain completion body
+                    body = r.json()
+                    content.append(body["choices"][0]["message"]["content"])
+                    usage = body.get("usage")
+                    ttft = time.perf_counter() - t0
+                else:
+                    for line in r.iter_lines():
+                        if cancel is not None and cancel.cancelled:
+                            return None
+                        if not line.startswith(b"data:"):
+                            continue
+                        event = line[5:].strip()
+                        if event == b"[DONE]":
+                            break
+                        chunk = json.loads(event)
+                        # with include_usage the last chunk carries the counts and no choices
+                        usage = chunk.get("usage") or usage
+                        if not chunk.get("choices"):
+                            continue
+                        delta = chunk["choices"][0].get("delta", {}).get("content") or ""
+                        if not delta:
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - t0
+                        tokens += 1
+                        content.append(delta)
+                        candidate = scanner.feed(delta)
+                        if candidate is not None:
+                            # first object is complete: stop reading, closing drops the rest
+                            early_stop = True
+                            break
+                        if tokens >= self.max_tokens:
+                            break
+        except requests.RequestException:
+            if cancel is not None and cancel.cancelled:
+                return None
+            raise
+        finally:
+            _call_state.token = None
+            if cancel is not None:
+                cancel._release()
+        total = time.perf_counter() - t0
+        saved = max(0, self.max_tokens - tokens) if early_stop else 0
+        self.tokens_saved_est += saved
+        self.last_timings = {"connect": _call_state.connect, "ttft": ttft or total, "total": total,
+                             "tokens": tokens, "tokens_saved_est": saved}
+        if usage:
+            self.last_timings["tokens"] = usage.get("completion_tokens", tokens)
+            if usage.get("prompt_tokens") is not None:
+                self.last_timings["prompt_tokens"] = usage["prompt_tokens"]
 
-        canidate = _strip_json(content) or content
+        if candidate is None:
+            text_out = "".join(content)
+            candidate = _strip_json(text_out) or text_out
         try:
-            data = json.loads(canidate)
+            data = json.loads(candidate)
         except Exception:
-            return {"intent": "unknown", "slots": {}, "required": [], "missing": []}
-        
+            # unparseable reply: infer() falls back to unknown, nothing is cached
+            return None
+
         data.setdefault("intent", "unknown")
         data.setdefault("slots", {})
         data.setdefault("required", [])
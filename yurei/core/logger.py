@@ -1,17 +1,132 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional, Dict
 
 LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-
-def get_logger():
-    log_file = LOG_DIR / "yurei.log"
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger("Yurei")
\ No newline at end of file
+
+# Root level, and per-logger overrides such as "Yurei.nmap=DEBUG,urllib3=WARNING".
+LOG_LEVEL = os.getenv("YUREI_LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("YUREI_LOG_LEVELS", "")
+# Level of the terminal copy; set to OFF to keep logs out of the terminal.
+CONSOLE_LEVEL = os.getenv("YUREI_LOG_CONSOLE", "INFO")
+# yurei.log rotates by size, yurei.jsonl at midnight.
+MAX_BYTES = int(os.getenv("YUREI_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+BACKUP_COUNT = int(os.getenv("YUREI_LOG_BACKUPS", "5"))
+JSON_BACKUP_DAYS = int(os.getenv("YUREI_LOG_JSON_DAYS", "7"))
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+# LogRecord attributes that are not user-supplied `extra=` fields.
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are kept as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue the record without formatting it: the stock prepare() renders
+    tracebacks on the calling thread, which is the expensive part. Only the
+    message is resolved here so later mutation of args can't change it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """'a=DEBUG, b.c=warning' -> {'a': 10, 'b.c': 30}; malformed entries are ignored."""
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.strip().partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if name and isinstance(value, int):
+            levels[name.strip()] = value
+    return levels
+
+def _handlers(console: bool):
+    LOG_DIR.mkdir(exist_ok=True)
+    text = logging.handlers.RotatingFileHandler(LOG_DIR / "yurei.log", maxBytes=MAX_BYTES,
+                                                backupCount=BACKUP_COUNT, encoding="utf-8", delay=True)
+    text.setFormatter(logging.Formatter(TEXT_FORMAT))
+    structured = logging.handlers.TimedRotatingFileHandler(LOG_DIR / "yurei.jsonl", when="midnight",
+                                                           backupCount=JSON_BACKUP_DAYS, encoding="utf-8",
+                                                           delay=True)
+    structured.setFormatter(JsonFormatter())
+    handlers = [text, structured]
+    if console and CONSOLE_LEVEL.upper() != "OFF":
+        term = logging.StreamHandler()
+        term.setFormatter(logging.Formatter(TEXT_FORMAT))
+        term.setLevel(CONSOLE_LEVEL.upper())
+        handlers.append(term)
+    return handlers
+
+def configure(level: Optional[str] = None, levels: Optional[Dict[str, int]] = None,
+              console: bool = True) -> None:
+    """
+    Route all logging through a queue to a background listener that writes
+    the rotating text log, the JSON-lines log and the terminal. Safe to call
+    repeatedly: only the first call installs handlers, later calls just
+    adjust levels.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    with _lock:
+        if _listener is None:
+            q: "queue.SimpleQueue" = queue.SimpleQueue()
+            _queue_handler = _QueueHandler(q)
+            root.addHandler(_queue_handler)
+            _listener = logging.handlers.QueueListener(q, *_handlers(console), respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown)
+            root.setLevel((level or LOG_LEVEL).upper())
+            for name, value in parse_levels(LOG_LEVELS).items():
+                logging.getLogger(name).setLevel(value)
+        elif level:
+            root.setLevel(level.upper())
+        for name, value in (levels or {}).items():
+            logging.getLogger(name).setLevel(value)
+
+def shutdown() -> None:
+    """Drain the queue and stop the listener (registered at exit)."""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = _queue_handler = None
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    configure()
+    return logging.getLogger(f"Yurei.{name}" if name else "Yurei")
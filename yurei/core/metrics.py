@@ -0,0 +1,193 @@
+# yurei/core/metrics.py
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterable
+from yurei.core import db
+
+# Set YUREI_METRICS=0 to turn span recording into a no-op.
+ENABLED = os.getenv("YUREI_METRICS", "1") != "0"
+# Spans older than this are pruned the first time a process records one.
+RETENTION = 30 * 24 * 3600
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, +Inf implied).
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+class Histogram:
+    """Fixed-bucket latency histogram with count and sum."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> List[int]:
+        out, total = [], 0
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_pruned = False
+_local = threading.local()
+
+def _stack() -> List[Dict[str, Any]]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def record(stage: str, seconds: float, attrs: Optional[Dict[str, Any]] = None,
+           started: Optional[float] = None) -> None:
+    """Add one observation for stage to the in-process histogram and queue it for the timings table."""
+    global _pruned
+    if not ENABLED:
+        return
+    row = (stage, started if started is not None else time.time() - seconds, seconds,
+           json.dumps(attrs, default=str) if attrs else None)
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = Histogram()
+        hist.observe(seconds)
+        prune, _pruned = not _pruned, True
+    if prune:
+        db.submit(("DELETE FROM timings WHERE started < ?", (time.time() - RETENTION,)))
+    db.submit(("INSERT INTO timings (stage, started, duration, attrs) VALUES (?, ?, ?, ?)", row))
+
+@contextmanager
+def span(stage: str, **attrs):
+    """
+    Time the enclosed block as one observation of stage. Yields the span's
+    attribute dict; annotate() adds to the innermost open span from deeper
+    in the call stack without having to pass it around.
+    """
+    if not ENABLED:
+        yield attrs
+        return
+    stack = _stack()
+    stack.append(attrs)
+    started = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        stack.pop()
+        record(stage, elapsed, attrs, started)
+
+def timed(stage: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def annotate(**attrs) -> None:
+    """Attach attributes to the innermost open span on this thread, if any."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].update(attrs)
+
+def snapshot() -> Dict[str, Histogram]:
+    """Histograms of the spans recorded by this process."""
+    with _lock:
+        return dict(_histograms)
+
+def flush() -> None:
+    """Wait until recorded spans are in the timings table."""
+    db.flush()
+
+def clear() -> None:
+    flush()
+    with db.connection() as conn:
+        conn.execute("DELETE FROM timings")
+    with _lock:
+        _histograms.clear()
+
+def _load(since: Optional[float] = None) -> Dict[str, List[tuple]]:
+    flush()
+    with db.connection() as conn:
+        rows = conn.execute(
+            "SELECT stage, duration, attrs FROM timings WHERE started >= ? ORDER BY stage, duration",
+            (since or 0,),
+        ).fetchall()
+    out: Dict[str, List[tuple]] = {}
+    for stage, duration, attrs in rows:
+        out.setdefault(stage, []).append((duration, attrs))
+    return out
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+def _sum_attr(rows: Iterable[tuple], *names: str) -> Optional[float]:
+    total, seen = 0.0, False
+    for _, attrs in rows:
+        if not attrs:
+            continue
+        data = json.loads(attrs)
+        for name in names:
+            if isinstance(data.get(name), (int, float)):
+                total += data[name]
+                seen = True
+    return total if seen else None
+
+def summary(since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Per-stage count, mean, p50/p95/p99 and max (seconds) of persisted spans."""
+    out = []
+    for stage, rows in sorted(_load(since).items()):
+        values = [d for d, _ in rows]
+        entry = {
+            "stage": stage,
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "p50": _quantile(values, 0.50),
+            "p95": _quantile(values, 0.95),
+            "p99": _quantile(values, 0.99),
+            "max": values[-1],
+        }
+        cpu = _sum_attr(rows, "cpu_user", "cpu_sys")
+        if cpu is not None:
+            entry["cpu"] = cpu
+        output = _sum_attr(rows, "output_bytes")
+        if output is not None:
+            entry["output_bytes"] = int(output)
+        out.append(entry)
+    return out
+
+def prometheus(since: Optional[float] = None) -> str:
+    """Persisted spans as Prometheus text exposition (one histogram labelled by stage)."""
+    name = "yurei_stage_duration_seconds"
+    lines = [f"# HELP {name} Time spent per Yurei stage.", f"# TYPE {name} histogram"]
+    for stage, rows in sorted(_load(since).items()):
+        hist = Histogram()
+        for duration, _ in rows:
+            hist.observe(duration)
+        cumulative = hist.cumulative()
+        for bound, count in zip(BUCKETS, cumulative):
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {cumulative[-1]}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {hist.sum:.6f}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,60 @@
+# yurei/core/output.py
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
+
+# Per-thread output target. The daemon points it at the client connection a
+# request came in on; everywhere else it is unset and the shared terminal
+# Console is used.
+_local = threading.local()
+_default = None
+
+def _default_console():
+    global _default
+    if _default is None:
+        from rich.console import Console
+        _default = Console()
+    return _default
+
+def current():
+    """The Console output on this thread should go to."""
+    return getattr(_local, "console", None) or _default_console()
+
+@contextmanager
+def redirect(target):
+    """Send everything printed through `console` on this thread to target (a rich Console)."""
+    previous = getattr(_local, "console", None)
+    _local.console = target
+    try:
+        yield target
+    finally:
+        _local.console = previous
+
+def carry(fn: Callable) -> Callable:
+    """Wrap fn so that, run on another thread, it prints where the calling thread prints."""
+    target = getattr(_local, "console", None)
+    if target is None:
+        return fn
+
+    @wraps(fn)
+    def inner(*args, **kwargs):
+        with redirect(target):
+            return fn(*args, **kwargs)
+    return inner
+
+class ConsoleProxy:
+    """
+    Module-level stand-in for a rich Console that resolves to the current
+    thread's target on every use. Also defers importing rich until
+    something is printed. Attribute assignment configures the default
+    console (e.g. console.file = devnull).
+    """
+
+    def __getattr__(self, name):
+        return getattr(current(), name)
+
+    def __setattr__(self, name, value):
+        setattr(_default_console(), name, value)
+
+console = ConsoleProxy()
@@ -0,0 +1,144 @@
+# yurei/core/profiling.py
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Dict, List
+
+PROFILE_DIR = Path(__file__).resolve().parents[2] / "data" / "profiles"
+SAMPLE_INTERVAL = 0.005
+
+# Where a sampled thread is blocked, judged by its innermost Python frame.
+# Pipe reads and socket reads happen in C, so the leaf is the Python frame
+# that called them (e.g. _stream_nmap's loop over proc.stdout).
+_SUBPROCESS_FILES = ("subprocess.py",)
+_SUBPROCESS_FUNCS = {"_stream_nmap", "_drain_stderr", "_reap"}
+_HTTP_FILES = ("socket.py", "ssl.py", os.path.join("http", "client.py"),
+               os.sep + "urllib3" + os.sep, os.sep + "requests" + os.sep)
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures"))
+CATEGORIES = ("yurei", "subprocess", "http", "idle")
+
+def _classify(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if code.co_name in _SUBPROCESS_FUNCS or filename.endswith(_SUBPROCESS_FILES):
+        return "subprocess"
+    if any(part in filename for part in _HTTP_FILES):
+        return "http"
+    if any(part in filename for part in _IDLE_FILES) or (code.co_name == "start" and filename.endswith("cli.py")):
+        # waiting on other threads, or on input() in the REPL
+        return "idle"
+    return "yurei"
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _Sampler(threading.Thread):
+    """Wall-clock stack sampler over every thread, for collapsed-stack output."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="yurei-profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.leaves: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                category = _classify(frame)
+                leaf = _label(frame)
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    frame = frame.f_back
+                stack.append(category)
+                self.stacks[";".join(reversed(stack))] += 1
+                self.categories[category] += 1
+                if category == "yurei":
+                    self.leaves[leaf] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class Profiler:
+    """
+    cProfile on the main thread plus a sampler over all threads. The sampler
+    tags every stack with where the thread was (Yurei's own Python, blocked
+    on nmap, on HTTP to Ollama, or idle), which is what separates Yurei's
+    overhead from the tools it drives.
+    """
+
+    def __init__(self, name: str, out_dir: Optional[Path] = None, top: int = 20,
+                 interval: float = SAMPLE_INTERVAL):
+        self.name = name
+        self.out_dir = Path(out_dir) if out_dir else PROFILE_DIR
+        self.top = top
+        self.interval = interval
+        self._profile = cProfile.Profile()
+        self._sampler = _Sampler(interval)
+        self._started = 0.0
+        self.paths: Dict[str, Path] = {}
+
+    def start(self) -> "Profiler":
+        self._started = time.perf_counter()
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def stop(self, out=None) -> Dict[str, Path]:
+        self._profile.disable()
+        self._sampler.stop()
+        wall = time.perf_counter() - self._started
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        base = self.out_dir / f"yurei-{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.paths = {"pstats": base.with_suffix(".pstats"), "collapsed": base.with_suffix(".collapsed")}
+        self._profile.dump_stats(str(self.paths["pstats"]))
+        with open(self.paths["collapsed"], "w", encoding="utf-8") as fh:
+            for stack, count in self._sampler.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        self.report(wall, out or sys.stderr)
+        return self.paths
+
+    def breakdown(self) -> Dict[str, float]:
+        """Thread-seconds per category, estimated from sample counts."""
+        return {c: self._sampler.categories.get(c, 0) * self.interval for c in CATEGORIES}
+
+    def report(self, wall: float, out) -> None:
+        split = self.breakdown()
+        busy = split["yurei"] + split["subprocess"] + split["http"]
+        lines = [f"\nProfile of '{self.name}': {wall:.2f}s wall"]
+        for category in CATEGORIES:
+            share = f" ({100 * split[category] / busy:.0f}% of busy)" if busy and category != "idle" else ""
+            lines.append(f"  {category:<11}{split[category]:8.2f} thread-s{share}")
+        if self._sampler.leaves:
+            lines.append("Hottest Yurei functions (samples, all threads):")
+            for leaf, count in self._sampler.leaves.most_common(self.top):
+                lines.append(f"  {count * self.interval:8.3f}s  {leaf}")
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.sort_stats("tottime").print_stats(self.top)
+        lines.append(f"cProfile, main thread, top {self.top} by own time:")
+        lines.append(_trim_pstats(buf.getvalue()))
+        lines.append(f"Wrote {self.paths['pstats']}")
+        lines.append(f"Wrote {self.paths['collapsed']} (flamegraph.pl / speedscope)")
+        print("\n".join(lines), file=out)
+
+def _trim_pstats(text: str) -> str:
+    """Drop pstats' header chatter, keep the table."""
+    lines: List[str] = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return "\n".join(lines[i:]).rstrip()
+    return text.rstrip()
@@ -0,0 +1,84 @@
+# yurei/core/registry.py
+import importlib
+from typing import Optional, Dict, Any, Callable, Iterable, Union
+
+# Built-in manifest: handler spec ("module:function") -> intents it serves.
+# Declaring intents here (instead of asking each plugin) means a plugin
+# module is only imported the first time one of its intents is routed.
+BUILTIN_MANIFEST: Dict[str, Iterable[str]] = {
+    "yurei.plugins.nmap_plugin:handle_intent": (
+        "nmap_scan", "udp_scan", "http_enum", "smb_enum", "vuln_scan", "ping",
+        "host_discovery", "top_ports", "full", "traceroute", "save",
+    ),
+    "yurei.plugins.history:handle_intent": ("query",),
+}
+# Intents nobody claims (e.g. "unknown" with a 'web' flag) go here.
+DEFAULT_HANDLER = "yurei.plugins.nmap_plugin:handle_intent"
+# Third-party plugins: entry point name = intent, value = "module:function".
+ENTRY_POINT_GROUP = "yurei.intents"
+
+Handler = Callable[[Dict[str, Any], Optional[str]], Any]
+
+class PluginRegistry:
+    """
+    Precomputed intent -> handler table with lazy imports. Entry points are
+    only scanned when an intent is missing from the built-in manifest.
+    """
+
+    def __init__(self, manifest: Optional[Dict[str, Iterable[str]]] = None,
+                 default: Optional[str] = DEFAULT_HANDLER):
+        self._table: Dict[str, Union[str, Handler]] = {}
+        self._loaded: Dict[str, Handler] = {}
+        self._default = default
+        self._entry_points_scanned = False
+        for spec, intents in (BUILTIN_MANIFEST if manifest is None else manifest).items():
+            for intent in intents:
+                self._table[intent] = spec
+
+    def register(self, intent: str, handler: Union[str, Handler]) -> None:
+        """Map an intent to a handler callable or a lazy "module:function" spec."""
+        self._table[intent] = handler
+
+    def intents(self):
+        self._scan_entry_points()
+        return sorted(self._table)
+
+    def resolve(self, intent: Optional[str]) -> Optional[Handler]:
+        target = self._table.get(intent)
+        if target is None and not self._entry_points_scanned:
+            self._scan_entry_points()
+            target = self._table.get(intent)
+        if target is None:
+            target = self._default
+        if target is None or callable(target):
+            return target
+        return self._load(target)
+
+    def dispatch(self, intent_payload: Dict[str, Any], user_input: Optional[str] = None):
+        handler = self.resolve(intent_payload.get("intent"))
+        if handler is None:
+            return None
+        return handler(intent_payload, user_input)
+
+    def _load(self, spec: str) -> Handler:
+        handler = self._loaded.get(spec)
+        if handler is None:
+            module_name, _, attr = spec.partition(":")
+            handler = getattr(importlib.import_module(module_name), attr or "handle_intent")
+            self._loaded[spec] = handler
+        return handler
+
+    def _scan_entry_points(self) -> None:
+        if self._entry_points_scanned:
+            return
+        self._entry_points_scanned = True
+        from importlib.metadata import entry_points
+        try:
+            eps = entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:  # Python < 3.10
+            eps = entry_points().get(ENTRY_POINT_GROUP, [])
+        for ep in eps:
+            # built-ins win so a stray plugin can't hijack core intents
+            self._table.setdefault(ep.name, ep.value)
+
+registry = PluginRegistry()
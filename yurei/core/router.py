@@ -1,27 +1,53 @@
 # yurei/core/router.py
-from rich.console import Console
+import threading
+import time
 from .dialog import DialogManager
-from yurei.plugins import nmap_plugin
+from .registry import registry
+from .metrics import timed
+from . import db
+from .output import console
 
-console = Console()
 dm = DialogManager()
 
 INTRUSIVE_INTENTS = {"vuln_scan"}  # you can add more later
+# Answered from the result store in milliseconds; never worth a queued job.
+INLINE_INTENTS = {"query"}
 
-def route(intent_payload: dict, user_input: str, session_id: str = "local"):
+# Session of the request being dispatched on this thread, for plugins that keep
+# per-session state (e.g. the history plugin's "next page").
+_local = threading.local()
+
+def current_session() -> str:
+    return getattr(_local, "session_id", None) or "local"
+
+def _audit(session_id: str, user_input: str, intent, status: str, t0: float, detail=None) -> None:
+    # queued for the background writer; never waits on disk
+    db.log_action(session_id, user_input, intent, status, round(time.perf_counter() - t0, 6), detail)
+
+@timed("router.route")
+def route(intent_payload: dict, user_input: str, session_id: str = "local", submit=None):
+    """
+    Ask for whatever the payload is missing, confirm intrusive actions, then
+    dispatch to the owning plugin. With submit(payload, user_input, session_id)
+    the ready payload is handed to it instead (e.g. JobScheduler.submit) and
+    its return value (the job) is returned.
+    """
+    t0 = time.perf_counter()
+    intent = intent_payload.get("intent")
     # Ask for missing slots
     missing = intent_payload.get("missing", [])
     if missing:
         slot = missing[0]
         if slot == "target":
             dm.require_slot(session_id, intent_payload, "target", "Which target would you like to scan? (IP/CIDR/hostname)")
+            _audit(session_id, user_input, intent, "prompt", t0, {"slot": slot})
             return
         if slot == "ports":
             dm.require_slot(session_id, intent_payload, "ports", "Which ports or range? e.g. '22,80' or '1-1024'")
+            _audit(session_id, user_input, intent, "prompt", t0, {"slot": slot})
             return
 
     slots = intent_payload.get("slots", {})
-    intent = intent_payload.get("intent")
 
     # Confirmation for intrusive actions
     needs_consent = (intent in INTRUSIVE_INTENTS) or bool(slots.get("vuln"))
@@ -32,11 +58,37 @@ def route(intent_payload: dict, user_input: str, session_id: str = "local"):
             "This action will run intrusive vulnerability checks which may impact targets. "
             "Type [bold]YES[/bold] to proceed."
         )
+        _audit(session_id, user_input, intent, "consent", t0)
         return
 
-    # All set — hand off to plugin dispatcher (structured)
-    nmap_plugin.handle_intent(intent_payload, user_input)
-
+    if submit is not None and intent not in INLINE_INTENTS:
+        job = submit(intent_payload, user_input, session_id)
+        _audit(session_id, user_input, intent, "queued", t0, {"job": getattr(job, "id", None)})
+        return job
 
+    # All set — hand off to the plugin that owns this intent (imported on first use)
+    return _dispatch(intent_payload, user_input, session_id, t0)
 
+def _dispatch(intent_payload: dict, user_input: str, session_id: str, t0: float):
+    intent = intent_payload.get("intent")
+    slots = intent_payload.get("slots", {})
+    previous = getattr(_local, "session_id", None)
+    _local.session_id = session_id
+    try:
+        result = registry.dispatch(intent_payload, user_input)
+    except Exception as e:
+        _audit(session_id, user_input, intent, "error", t0, {"error": str(e)})
+        raise
+    finally:
+        _local.session_id = previous
+    returncode = getattr(result, "returncode", None)
+    status = "no_result" if result is None else ("ok" if returncode in (0, None) else "failed")
+    _audit(session_id, user_input, intent, status, t0,
+           {"target": slots.get("target"), "returncode": returncode})
+    return result
 
+def run_job(job):
+    """JobScheduler runner: dispatch a job queued by route(..., submit=...); its checks already ran."""
+    from yurei.plugins.nmap_shard import labelled
+    with labelled(f"job {job.id}"):
+        return _dispatch(job.payload, job.command, job.session_id, time.perf_counter())
@@ -0,0 +1,213 @@
+# yurei/core/sessions.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+# Pending prompts idle for this many seconds are dropped (reading one resets the clock).
+SESSION_TTL = float(os.getenv("YUREI_SESSION_TTL", "1800"))
+# Most pending sessions kept in memory; the least recently used go first.
+MAX_SESSIONS = int(os.getenv("YUREI_MAX_SESSIONS", "1000"))
+# "memory" (default) or "sqlite" (pending prompts survive restarts).
+SESSION_BACKEND = os.getenv("YUREI_SESSIONS", "memory")
+
+class SessionState:
+    """A session's pending follow-up: the payload waiting on a slot or a confirmation."""
+
+    __slots__ = ("session_id", "intent_payload", "pending_type", "pending_slot", "prompt", "created", "expires")
+
+    def __init__(self, session_id: str, intent_payload: Dict[str, Any], pending_type: str,
+                 pending_slot: Optional[str], prompt: str, ttl: float = SESSION_TTL,
+                 created: Optional[float] = None, expires: Optional[float] = None):
+        self.session_id = session_id
+        self.intent_payload = intent_payload
+        self.pending_type = pending_type
+        self.pending_slot = pending_slot
+        self.prompt = prompt
+        self.created = time.time() if created is None else created
+        self.expires = self.created + ttl if expires is None else expires
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"intent_payload": self.intent_payload, "pending_type": self.pending_type,
+                "pending_slot": self.pending_slot, "prompt": self.prompt,
+                "created": self.created, "expires": self.expires}
+
+    @classmethod
+    def from_dict(cls, session_id: str, data: Dict[str, Any]) -> "SessionState":
+        return cls(session_id, data["intent_payload"], data["pending_type"], data.get("pending_slot"),
+                   data.get("prompt", ""), created=data.get("created"), expires=data.get("expires"))
+
+class _Counters:
+    __slots__ = ("created", "completed", "expired", "evicted")
+
+    def __init__(self):
+        self.created = self.completed = self.expired = self.evicted = 0
+
+class MemorySessionStore:
+    """
+    Thread-safe in-process store. Entries expire after `ttl` seconds and the
+    least recently used are evicted beyond `max_sessions`, so abandoned
+    prompts cannot grow memory without bound.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._states: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = _Counters()
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                return None
+            if state.expired():
+                del self._states[session_id]
+                self._counts.expired += 1
+                return None
+            state.expires = time.time() + self.ttl
+            self._states.move_to_end(session_id)
+            return state
+
+    def put(self, state: SessionState) -> None:
+        state.expires = time.time() + self.ttl
+        with self._lock:
+            self._states[state.session_id] = state
+            self._states.move_to_end(state.session_id)
+            self._counts.created += 1
+            self._purge(time.time())
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+                self._counts.evicted += 1
+
+    def pop(self, session_id: str) -> Optional[SessionState]:
+        """Remove and return a live state (None if missing or expired); exactly one caller gets it."""
+        with self._lock:
+            state = self._states.pop(session_id, None)
+            if state is None:
+                return None
+            if state.expired():
+                self._counts.expired += 1
+                return None
+            self._counts.completed += 1
+            return state
+
+    def discard(self, session_id: str) -> bool:
+        """Drop a session's pending state without answering it."""
+        with self._lock:
+            return self._states.pop(session_id, None) is not None
+
+    def purge(self) -> int:
+        with self._lock:
+            return self._purge(time.time())
+
+    def _purge(self, now: float) -> int:
+        # the TTL slides on every get(), so LRU order is expiry order and the
+        # scan can stop at the first live entry
+        dropped = 0
+        for session_id in list(self._states):
+            if not self._states[session_id].expired(now):
+                break
+            del self._states[session_id]
+            dropped += 1
+        self._counts.expired += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._purge(time.time())
+            return {"active": len(self._states), "created": self._counts.created,
+                    "completed": self._counts.completed, "expired": self._counts.expired,
+                    "evicted": self._counts.evicted}
+
+class SQLiteSessionStore:
+    """
+    Store backed by the sessions table, so pending prompts and confirmations
+    survive a restart and are shared by processes using the same database.
+    Session writes are rare and must be visible to the very next request,
+    so they go straight through the shared connection, not the batched writer.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        from yurei.core import db
+        self._db = db
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._counts = _Counters()
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        now = time.time()
+        with self._db.connection() as conn:
+            row = conn.execute("SELECT state FROM sessions WHERE session_id = ? AND expires > ?",
+                               (session_id, now)).fetchone()
+            if row:
+                conn.execute("UPDATE sessions SET touched = ?, expires = ? WHERE session_id = ?",
+                             (now, now + self.ttl, session_id))
+        if not row:
+            return None
+        state = SessionState.from_dict(session_id, json.loads(row[0]))
+        state.expires = now + self.ttl
+        return state
+
+    def put(self, state: SessionState) -> None:
+        now = time.time()
+        state.expires = now + self.ttl
+        with self._db.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (session_id, state, expires, touched) VALUES (?, ?, ?, ?)",
+                         (state.session_id, json.dumps(state.to_dict()), state.expires, now))
+            self._counts.expired += self._purge(conn, now)
+            cur = conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "  SELECT session_id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+            self._counts.evicted += max(0, cur.rowcount)
+        self._counts.created += 1
+
+    def pop(self, session_id: str) -> Optional[SessionState]:
+        now = time.time()
+        with self._db.connection() as conn:
+            row = conn.execute("SELECT state, expires FROM sessions WHERE session_id = ?",
+                               (session_id,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        if not row:
+            return None
+        if row[1] <= now:
+            self._counts.expired += 1
+            return None
+        self._counts.completed += 1
+        return SessionState.from_dict(session_id, json.loads(row[0]))
+
+    def discard(self, session_id: str) -> bool:
+        """Drop a session's pending state without answering it."""
+        with self._db.connection() as conn:
+            return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def purge(self) -> int:
+        with self._db.connection() as conn:
+            dropped = self._purge(conn, time.time())
+        self._counts.expired += dropped
+        return dropped
+
+    def _purge(self, conn, now: float) -> int:
+        return max(0, conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,)).rowcount)
+
+    def stats(self) -> Dict[str, int]:
+        self.purge()
+        with self._db.connection() as conn:
+            active = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {"active": active, "created": self._counts.created, "completed": self._counts.completed,
+                "expired": self._counts.expired, "evicted": self._counts.evicted}
+
+def default_store():
+    """The store selected by YUREI_SESSIONS."""
+    if SESSION_BACKEND.lower() == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
@@ -0,0 +1,298 @@
+# yurei/core/targets.py
+"""
+Interval sets for scan targets and ports.
+
+A set is a sorted tuple of disjoint, non-adjacent closed integer ranges, so
+"10.0.0.0/8 minus 10.5.0.0/16" is two intervals rather than sixteen million
+addresses. Duplicate or overlapping inputs collapse on construction.
+Union, intersection and subtraction are linear merges over the ranges, and
+chunk(n) cuts a set into n pieces of (nearly) equal size for sharding.
+IPv4 and IPv6 live in separate integer spaces. Hostnames can't be ordered
+or split, so they are carried alongside as plain names.
+"""
+import ipaddress
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+Interval = Tuple[int, int]
+
+OCTET_RANGE_RE = re.compile(r"^((?:\d{1,3}\.){3}\d{1,3})-(\d{1,3})$")
+HOSTNAME_RE = re.compile(r"^(?=.{1,253}$)(?:[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?\.)*[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?$", re.I)
+
+def _merge(intervals: Iterable[Interval]) -> Tuple[Interval, ...]:
+    out: List[List[int]] = []
+    for lo, hi in sorted(intervals):
+        if lo > hi:
+            continue
+        if out and lo <= out[-1][1] + 1:
+            if hi > out[-1][1]:
+                out[-1][1] = hi
+        else:
+            out.append([lo, hi])
+    return tuple((lo, hi) for lo, hi in out)
+
+class IntervalSet:
+    __slots__ = ("_iv",)
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._iv = _merge(intervals)
+
+    @classmethod
+    def _wrap(cls, merged: Tuple[Interval, ...]):
+        obj = cls.__new__(cls)
+        obj._iv = merged
+        return obj
+
+    @property
+    def intervals(self) -> Tuple[Interval, ...]:
+        return self._iv
+
+    @property
+    def size(self) -> int:
+        """Number of integers in the set (can exceed sys.maxsize, hence not __len__)."""
+        return sum(hi - lo + 1 for lo, hi in self._iv)
+
+    def __bool__(self) -> bool:
+        return bool(self._iv)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other._iv == self._iv
+
+    def __hash__(self) -> int:
+        return hash(self._iv)
+
+    def __contains__(self, value: int) -> bool:
+        lo_idx, hi_idx = 0, len(self._iv)
+        while lo_idx < hi_idx:
+            mid = (lo_idx + hi_idx) // 2
+            lo, hi = self._iv[mid]
+            if value < lo:
+                hi_idx = mid
+            elif value > hi:
+                lo_idx = mid + 1
+            else:
+                return True
+        return False
+
+    def __iter__(self) -> Iterator[int]:
+        for lo, hi in self._iv:
+            yield from range(lo, hi + 1)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._iv)!r})"
+
+    def union(self, other: "IntervalSet"):
+        return self._wrap(_merge(self._iv + other._iv))
+
+    def intersection(self, other: "IntervalSet"):
+        out, a, b, i, j = [], self._iv, other._iv, 0, 0
+        while i < len(a) and j < len(b):
+            lo, hi = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+            if lo <= hi:
+                out.append((lo, hi))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return self._wrap(tuple(out))
+
+    def subtract(self, other: "IntervalSet"):
+        out, b, j = [], other._iv, 0
+        for lo, hi in self._iv:
+            while j < len(b) and b[j][1] < lo:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] <= hi:
+                if b[k][0] > lo:
+                    out.append((lo, b[k][0] - 1))
+                lo = max(lo, b[k][1] + 1)
+                k += 1
+            if lo <= hi:
+                out.append((lo, hi))
+        return self._wrap(tuple(out))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = subtract
+
+    def take(self, count: int) -> Tuple["IntervalSet", "IntervalSet"]:
+        """(the first count integers, the rest)."""
+        head: List[Interval] = []
+        for idx, (lo, hi) in enumerate(self._iv):
+            width = hi - lo + 1
+            if count >= width:
+                head.append((lo, hi))
+                count -= width
+                continue
+            if count:
+                head.append((lo, lo + count - 1))
+                rest = ((lo + count, hi),) + self._iv[idx + 1:]
+            else:
+                rest = self._iv[idx:]
+            return self._wrap(tuple(head)), self._wrap(rest)
+        return self._wrap(tuple(head)), self._wrap(())
+
+    def chunk(self, n: int) -> list:
+        """Split into at most n contiguous pieces whose sizes differ by at most one."""
+        return _chunks(self, _split_sizes(self.size, n))
+
+def _split_sizes(total: int, n: int) -> List[int]:
+    n = max(1, min(n, total))
+    base, extra = divmod(total, n)
+    return [base + (1 if i < extra else 0) for i in range(n)] if total else []
+
+def _chunks(values: IntervalSet, sizes: List[int]) -> List[IntervalSet]:
+    out = []
+    for size in sizes:
+        head, values = values.take(size)
+        out.append(head)
+    return out
+
+class PortSet(IntervalSet):
+    __slots__ = ()
+    MIN, MAX = 1, 65535
+
+    @classmethod
+    def parse(cls, spec: str) -> "PortSet":
+        """'22,80,8000-8010' (repeats and overlaps allowed); ValueError on anything else."""
+        ranges = []
+        for part in (spec or "").replace(" ", "").split(","):
+            if not part:
+                continue
+            lo, _, hi = part.partition("-")
+            if not lo.isdigit() or (hi and not hi.isdigit()):
+                raise ValueError(f"bad port range {part!r}")
+            lo_n, hi_n = int(lo), int(hi or lo)
+            if not cls.MIN <= lo_n <= hi_n <= cls.MAX:
+                raise ValueError(f"port range {part!r} outside {cls.MIN}-{cls.MAX}")
+            ranges.append((lo_n, hi_n))
+        if not ranges:
+            raise ValueError("no ports given")
+        return cls(ranges)
+
+    def __str__(self) -> str:
+        """nmap -p syntax."""
+        return ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in self._iv)
+
+def _parse_address(token: str):
+    """(version, lo, hi) for an IP, CIDR block or range (10.0.0.1-200 / a-b); None if it is a name."""
+    m = OCTET_RANGE_RE.match(token)
+    if m:
+        start = ipaddress.IPv4Address(m.group(1))
+        last = int(m.group(2))
+        lo = int(start)
+        if last > 255 or last < lo & 0xFF:
+            raise ValueError(f"bad address range {token!r}")
+        return 4, lo, (lo & ~0xFF) | last
+    if "-" in token and (":" in token or token.count(".") == 6):
+        first, _, last = token.partition("-")
+        lo, hi = ipaddress.ip_address(first), ipaddress.ip_address(last)
+        if lo.version != hi.version:
+            raise ValueError(f"mixed address families in {token!r}")
+        return lo.version, int(lo), int(hi)
+    try:
+        net = ipaddress.ip_network(token, strict=False)
+    except ValueError:
+        if ":" in token or re.fullmatch(r"[\d./]+", token):
+            raise ValueError(f"bad address {token!r}")
+        return None
+    return net.version, int(net.network_address), int(net.broadcast_address)
+
+def is_target(token: str) -> bool:
+    """Whether token is a single address, block, range or plausible hostname."""
+    try:
+        return _parse_address(token) is not None or bool(HOSTNAME_RE.match(token) and "." in token)
+    except ValueError:
+        return False
+
+class AddressSet:
+    __slots__ = ("v4", "v6", "names")
+
+    def __init__(self, v4: Optional[IntervalSet] = None, v6: Optional[IntervalSet] = None,
+                 names: Iterable[str] = ()):
+        self.v4 = v4 or IntervalSet()
+        self.v6 = v6 or IntervalSet()
+        # hostnames, lowercased, first-seen order
+        self.names = tuple(dict.fromkeys(n.lower() for n in names))
+
+    @classmethod
+    def parse(cls, text: str) -> "AddressSet":
+        """Whitespace/comma separated IPs, CIDR blocks, ranges and hostnames; ValueError on junk."""
+        v4, v6, names = [], [], []
+        for token in re.split(r"[\s,]+", (text or "").strip()):
+            if not token:
+                continue
+            parsed = _parse_address(token)
+            if parsed is None:
+                if not HOSTNAME_RE.match(token):
+                    raise ValueError(f"bad target {token!r}")
+                names.append(token)
+            else:
+                version, lo, hi = parsed
+                (v4 if version == 4 else v6).append((lo, hi))
+        return cls(IntervalSet(v4), IntervalSet(v6), names)
+
+    @property
+    def size(self) -> int:
+        return self.v4.size + self.v6.size + len(self.names)
+
+    def __bool__(self) -> bool:
+        return bool(self.v4 or self.v6 or self.names)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, AddressSet) and (self.v4, self.v6) == (other.v4, other.v6)
+                and set(self.names) == set(other.names))
+
+    def __iter__(self) -> Iterator[str]:
+        """Every address as a string (lazily; a /8 is sixteen million of them), then the hostnames."""
+        for value in self.v4:
+            yield str(ipaddress.IPv4Address(value))
+        for value in self.v6:
+            yield str(ipaddress.IPv6Address(value))
+        yield from self.names
+
+    def union(self, other: "AddressSet") -> "AddressSet":
+        return AddressSet(self.v4 | other.v4, self.v6 | other.v6, self.names + other.names)
+
+    def intersection(self, other: "AddressSet") -> "AddressSet":
+        keep = set(other.names)
+        return AddressSet(self.v4 & other.v4, self.v6 & other.v6, [n for n in self.names if n in keep])
+
+    def subtract(self, other: "AddressSet") -> "AddressSet":
+        drop = set(other.names)
+        return AddressSet(self.v4 - other.v4, self.v6 - other.v6, [n for n in self.names if n not in drop])
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = subtract
+
+    def chunk(self, n: int) -> List["AddressSet"]:
+        """At most n pieces of (nearly) equal size: IPv4, then IPv6, then hostnames, in order."""
+        parts = []
+        v4, v6, names = self.v4, self.v6, list(self.names)
+        for size in _split_sizes(self.size, n):
+            a, v4 = v4.take(size)
+            b, v6 = v6.take(size - a.size)
+            left = size - a.size - b.size
+            parts.append(AddressSet(a, b, names[:left]))
+            names = names[left:]
+        return parts
+
+    def to_cidrs(self) -> List[str]:
+        """Fewest CIDR blocks covering the addresses (single hosts without a prefix)."""
+        out = []
+        for space, cls in ((self.v4, ipaddress.IPv4Address), (self.v6, ipaddress.IPv6Address)):
+            for lo, hi in space.intervals:
+                for net in ipaddress.summarize_address_range(cls(lo), cls(hi)):
+                    out.append(str(net.network_address) if net.num_addresses == 1 else str(net))
+        return out
+
+    def tokens(self) -> List[str]:
+        """nmap target arguments."""
+        return self.to_cidrs() + list(self.names)
+
+    def __str__(self) -> str:
+        return " ".join(self.tokens())
+
+    def __repr__(self) -> str:
+        return f"AddressSet({str(self)!r})"
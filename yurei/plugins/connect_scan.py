@@ -0,0 +1,251 @@
+# yurei/plugins/connect_scan.py
+"""
+Built-in TCP connect scanner for quick, unprivileged checks.
+
+A "top 20 ports on 30 hosts" check through nmap -sT still pays for process
+start-up, and without root nmap can't SYN-scan anyway. Here every probe is an
+asyncio connect: a completed handshake is open, a refusal (RST) is closed and
+a timeout or unreachable error is filtered. Probes run ports-major across the
+hosts, so no single host is hit in a burst. A fixed pool of worker
+coroutines pulls probes from a lazy queue, which bounds both how many are in
+flight and how many exist at all, and an optional rate limit spaces out
+their starts. The result is
+the same ScanResult the nmap XML parser produces, holding open ports only.
+"""
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from typing import Optional, List, Dict, Callable, Tuple
+from yurei.plugins.nmap_xml import Host, Port, ScanResult
+from yurei.core.targets import AddressSet, PortSet
+
+# "auto" (small unprivileged jobs), "connect" (whenever a job can be served) or "nmap" (never).
+BACKEND = os.getenv("YUREI_SCAN_BACKEND", "auto").lower()
+CONCURRENCY = int(os.getenv("YUREI_CONNECT_CONCURRENCY", "256"))
+TIMEOUT = float(os.getenv("YUREI_CONNECT_TIMEOUT", "1.0"))
+# New connections per second; 0 = as fast as the semaphore allows.
+RATE = float(os.getenv("YUREI_CONNECT_RATE", "0"))
+# "auto" picks this backend for jobs of at most this many host x port probes.
+AUTO_MAX_PROBES = int(os.getenv("YUREI_CONNECT_MAX_PROBES", "4096"))
+# Hard cap on hosts a single connect scan will expand a target into.
+MAX_HOSTS = 4096
+# Hard cap on host x port probes in one scan, whichever backend setting chose it.
+MAX_PROBES = 1 << 20
+
+NMAP_SERVICES = ("/usr/share/nmap/nmap-services", "/usr/local/share/nmap/nmap-services",
+                 "/opt/homebrew/share/nmap/nmap-services")
+# nmap's most common TCP ports (most frequent first, then the rest of its
+# top 100), used when nmap-services isn't installed.
+TOP_TCP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    7, 9, 13, 26, 37, 79, 81, 88, 106, 113, 119, 144, 179, 199, 389, 427, 444, 465, 513, 514, 515, 543,
+    544, 548, 554, 587, 631, 646, 873, 990, 1025, 1026, 1027, 1028, 1029, 1110, 1433, 1720, 1755, 1900,
+    2000, 2001, 2049, 2121, 2717, 3000, 3128, 3986, 4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357,
+    5432, 5631, 5666, 5800, 6000, 6001, 6646, 7070, 8000, 8008, 8009, 8081, 8443, 8888, 9100, 9999,
+    10000, 32768, 49152, 49153, 49154, 49155, 49156, 49157,
+)
+
+_services: Optional[Dict[int, Tuple[str, float]]] = None
+
+def _load_services() -> Dict[int, Tuple[str, float]]:
+    """tcp port -> (service name, open frequency) from nmap-services, or {} when it isn't installed."""
+    global _services
+    if _services is not None:
+        return _services
+    paths = ([os.path.join(os.environ["NMAPDIR"], "nmap-services")] if os.getenv("NMAPDIR") else []) + list(NMAP_SERVICES)
+    table: Dict[int, Tuple[str, float]] = {}
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                for line in fh:
+                    fields = line.split()
+                    if len(fields) < 3 or line.startswith("#") or not fields[1].endswith("/tcp"):
+                        continue
+                    try:
+                        table[int(fields[1][:-4])] = (fields[0], float(fields[2]))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+        break
+    _services = table
+    return table
+
+def top_ports(n: int) -> Optional[List[int]]:
+    """The n most common TCP ports, or None if n is beyond what is known without nmap-services."""
+    services = _load_services()
+    if services:
+        ranked = sorted(services, key=lambda p: services[p][1], reverse=True)
+        return ranked[:n] if n <= len(ranked) else None
+    return list(TOP_TCP_PORTS[:n]) if n <= len(TOP_TCP_PORTS) else None
+
+def service_name(port: int) -> str:
+    entry = _load_services().get(port)
+    if entry:
+        return entry[0]
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return ""
+
+def parse_ports(spec: Optional[str]) -> Optional[List[int]]:
+    """'22,80,8000-8010' -> sorted unique port numbers; None if spec is not a plain list/range."""
+    try:
+        return list(PortSet.parse(spec)) if spec else None
+    except ValueError:
+        return None
+
+def format_ports(ports: List[int]) -> str:
+    """Inverse of parse_ports, collapsing consecutive runs into ranges."""
+    out, start = [], None
+    for i, port in enumerate(ports):
+        if start is None:
+            start = port
+        if i + 1 == len(ports) or ports[i + 1] != port + 1:
+            out.append(str(start) if start == port else f"{start}-{port}")
+            start = None
+    return ",".join(out)
+
+def count_hosts(target: str) -> int:
+    """Addresses the target expands to (hostnames count as one)."""
+    try:
+        return AddressSet.parse(target).size
+    except ValueError:
+        return len(target.split())
+
+def expand_hosts(target: str, limit: int = MAX_HOSTS) -> List[str]:
+    """Space-separated IPs, CIDR blocks, ranges and hostnames, deduplicated."""
+    addresses = AddressSet.parse(target)
+    if addresses.size > limit:
+        raise ValueError(f"{target} expands to more than {limit} hosts")
+    return list(addresses)
+
+class _RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        # single-threaded loop: reserving the slot needs no lock
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def _fd_headroom(wanted: int) -> int:
+    """Keep concurrent sockets under the open-file limit."""
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return wanted
+    return max(1, min(wanted, soft - 64))
+
+async def _probe(addr: str, port: int, limiter: _RateLimiter, timeout: float) -> Tuple[str, Optional[float]]:
+    """(state, rtt ms): open, closed (refused) or filtered (timeout / unreachable)."""
+    await limiter.wait()
+    t0 = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(addr, port), timeout)
+    except ConnectionRefusedError:
+        return "closed", (time.perf_counter() - t0) * 1000.0
+    except (asyncio.TimeoutError, OSError):
+        return "filtered", None
+    rtt = (time.perf_counter() - t0) * 1000.0
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return "open", rtt
+
+async def _resolve(loop, name: str) -> Optional[str]:
+    try:
+        info = await loop.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return None
+    return info[0][4][0]
+
+async def _scan(hosts: List[str], ports: List[int], on_host: Optional[Callable[[Host], None]],
+                concurrency: int, timeout: float, rate: float,
+                cancelled: Optional[Callable[[], bool]] = None) -> Tuple[List[Host], Dict[str, int]]:
+    loop = asyncio.get_running_loop()
+    limiter = _RateLimiter(rate)
+    addrs = await asyncio.gather(*(_resolve(loop, h) if not _is_ip(h) else _noop(h) for h in hosts))
+    targets = [(h, a) for h, a in zip(hosts, addrs) if a]
+    # ports-major order spreads consecutive connects across hosts; generated as the workers pull
+    order = ((i, port) for port in ports for i in range(len(targets)))
+    pending = {i: len(ports) for i in range(len(targets))}
+    found: Dict[int, List[Tuple[int, str, Optional[float]]]] = {i: [] for i in range(len(targets))}
+    counts = {"open": 0, "closed": 0, "filtered": 0, "unresolved": len(hosts) - len(targets)}
+    finished: List[Tuple[int, Host]] = []
+
+    async def worker():
+        for i, port in order:
+            if cancelled is not None and cancelled():
+                return
+            state, rtt = await _probe(targets[i][1], port, limiter, timeout)
+            counts[state] += 1
+            found[i].append((port, state, rtt))
+            pending[i] -= 1
+            if not pending[i]:
+                host = _host(targets[i], found.pop(i))
+                if host is not None:
+                    finished.append((i, host))
+                    if on_host:
+                        on_host(host)
+
+    workers = min(_fd_headroom(concurrency), len(targets) * len(ports))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return [host for _, host in sorted(finished, key=lambda item: item[0])], counts
+
+async def _noop(value):
+    return value
+
+def _is_ip(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+def _host(target: Tuple[str, str], probes: List[Tuple[int, str, Optional[float]]]) -> Optional[Host]:
+    """A Host for a target that answered at least once (open or refused); None if it never did."""
+    name, addr = target
+    rtts = [rtt for _, _, rtt in probes if rtt is not None]
+    if not rtts:
+        return None
+    ports = [Port("tcp", port, "open", "syn-ack", service_name(port))
+             for port, state, _ in sorted(probes) if state == "open"]
+    return Host(addr, "ipv6" if ":" in addr else "ipv4", "up", [name] if name != addr else [],
+                ports, srtt=round(sum(rtts) / len(rtts), 3))
+
+def scan(target: str, ports: List[int], on_host: Optional[Callable[[Host], None]] = None,
+         concurrency: int = CONCURRENCY, timeout: float = TIMEOUT, rate: float = RATE,
+         cancelled: Optional[Callable[[], bool]] = None) -> ScanResult:
+    """
+    Connect-scan ports on every host in target. on_host gets each responsive
+    host as soon as all of its probes are done. Once cancelled() is true no
+    new probe starts, so the scan ends within one timeout. Runs its own event
+    loop, so call it from a plain (non-async) thread.
+    """
+    probes = count_hosts(target) * len(ports)
+    if probes > MAX_PROBES:
+        raise ValueError(f"{target} x {len(ports)} port(s) is {probes:,} probes; the connect scanner "
+                         f"stops at {MAX_PROBES:,} (narrow the target or the ports, or use nmap)")
+    hosts = expand_hosts(target)
+    started = time.time()
+    t0 = time.perf_counter()
+    found, counts = asyncio.run(_scan(hosts, ports, on_host, concurrency, timeout, rate, cancelled))
+    elapsed = time.perf_counter() - t0
+    args = ["connect", "-p", format_ports(ports), target]
+    summary = (f"Connect scan done: {len(hosts)} IP addresses ({len(found)} hosts up) scanned in "
+               f"{elapsed:.2f} seconds; {counts['open']} open, {counts['closed']} closed, "
+               f"{counts['filtered']} filtered")
+    errors = [f"Failed to resolve {counts['unresolved']} host(s)"] if counts["unresolved"] else []
+    return ScanResult(args, found, 0, int(started), round(elapsed, 3), summary, errors)
@@ -0,0 +1,248 @@
+# yurei/plugins/history.py
+"""
+Answers questions about earlier scans ("which hosts had 445 open last week",
+"where is OpenSSH 7.x running") from the normalized result tables in db.py
+instead of scanning again.
+
+Each filter is one indexed condition on the ports table. A product match
+first resolves ids in the small services table. Rows are grouped per
+address/port, so a host scanned every day is listed once with the time it
+was last seen. Results are paged with LIMIT/OFFSET, and only the page shown
+is ever fetched.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from yurei.core import db
+from yurei.core.metrics import timed, annotate
+from yurei.core.output import console
+from yurei.core.targets import AddressSet, PortSet
+
+PAGE_SIZE = int(os.getenv("YUREI_QUERY_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 1000
+# IPv6 blocks and hostnames are matched address by address; bigger IPv6 blocks are refused.
+MAX_LISTED_ADDRESSES = 1024
+
+# Words people use for a service that nmap reports under other names.
+SERVICE_ALIASES = {
+    "smb": ("microsoft-ds", "netbios-ssn"),
+    "web": ("http", "https", "http-proxy", "http-alt", "https-alt"),
+    "http": ("http", "http-proxy", "http-alt"),
+    "https": ("https", "https-alt", "ssl/http"),
+    "rdp": ("ms-wbt-server",),
+    "dns": ("domain",),
+}
+
+# Each session's last query slots, for "next page"; least recently used dropped past MAX_SESSIONS.
+MAX_SESSIONS = 256
+_last: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_last_lock = threading.Lock()
+
+def _recall(session_id: str) -> Optional[Dict[str, Any]]:
+    with _last_lock:
+        slots = _last.get(session_id)
+        if slots is not None:
+            _last.move_to_end(session_id)
+        return slots
+
+def _remember(session_id: str, slots: Dict[str, Any]) -> None:
+    with _last_lock:
+        _last[session_id] = slots
+        _last.move_to_end(session_id)
+        while len(_last) > MAX_SESSIONS:
+            _last.popitem(last=False)
+
+class QueryPage:
+    """One page of a history query."""
+
+    __slots__ = ("view", "rows", "total", "page", "limit", "elapsed")
+    returncode = 0
+
+    def __init__(self, view: str, rows: List[Dict[str, Any]], total: int, page: int, limit: int, elapsed: float):
+        self.view = view
+        self.rows = rows
+        self.total = total
+        self.page = page
+        self.limit = limit
+        self.elapsed = elapsed
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.limit))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"view": self.view, "rows": self.rows, "total": self.total, "page": self.page,
+                "pages": self.pages, "limit": self.limit, "elapsed": self.elapsed}
+
+    def __repr__(self):
+        return f"QueryPage({self.view} {self.page}/{self.pages}, {len(self.rows)} of {self.total} rows)"
+
+def _address_filter(target: str, column: str = "p") -> Tuple[str, List[Any]]:
+    addresses = AddressSet.parse(target)
+    clauses, params = [], []
+    for lo, hi in addresses.v4.intervals:
+        clauses.append(f"{column}.ipv4 = ?" if lo == hi else f"{column}.ipv4 BETWEEN ? AND ?")
+        params.extend((lo,) if lo == hi else (lo, hi))
+    if addresses.v6.size > MAX_LISTED_ADDRESSES:
+        raise ValueError(f"IPv6 block in {target} is too large to query address by address")
+    listed = [a for a in AddressSet(v6=addresses.v6)] + list(addresses.names)
+    if listed:
+        clauses.append(f"{column}.address IN ({','.join('?' * len(listed))})")
+        params.extend(listed)
+    for name in addresses.names:
+        clauses.append(f"{column}.host_id IN (SELECT id FROM hosts WHERE hostnames LIKE ?)"
+                       if column == "p" else f"{column}.hostnames LIKE ?")
+        params.append(f"%{name}%")
+    return "(" + " OR ".join(clauses) + ")", params
+
+def _version_pattern(version: str) -> str:
+    """7.x / 7.* / 7 -> prefix match; 2.4.49 -> exact or longer (2.4.49p1)."""
+    version = version.lstrip("vV").replace("%", "").replace("_", "")
+    for wildcard in (".x", ".X", ".*"):
+        if version.endswith(wildcard):
+            return version[:-len(wildcard)] + ".%"
+    return version + "%"
+
+def _service_filter(product: str, version: Optional[str]) -> Tuple[str, List[Any]]:
+    names = SERVICE_ALIASES.get(product.lower(), (product,))
+    cond = f"(name IN ({','.join('?' * len(names))}) OR product LIKE ?)"
+    params: List[Any] = list(names) + [f"%{product}%"]
+    if version:
+        cond += " AND version LIKE ?"
+        params.append(_version_pattern(version))
+    return f"p.service_id IN (SELECT id FROM services WHERE {cond})", params
+
+def _window(slots: Dict[str, Any], column: str) -> Tuple[List[str], List[Any]]:
+    where, params = [], []
+    if slots.get("since") is not None:
+        where.append(f"{column}.ts >= ?")
+        params.append(float(slots["since"]))
+    if slots.get("until") is not None:
+        where.append(f"{column}.ts < ?")
+        params.append(float(slots["until"]))
+    return where, params
+
+def _ports_query(slots: Dict[str, Any]) -> Tuple[str, str, List[Any]]:
+    where, params = _window(slots, "p")
+    if slots.get("state") and slots["state"] != "any":
+        where.append("p.state = ?")
+        params.append(slots["state"])
+    if slots.get("protocol"):
+        where.append("p.protocol = ?")
+        params.append(slots["protocol"])
+    if slots.get("ports"):
+        ranges = PortSet.parse(slots["ports"]).intervals
+        where.append("(" + " OR ".join("p.port = ?" if lo == hi else "p.port BETWEEN ? AND ?"
+                                        for lo, hi in ranges) + ")")
+        for lo, hi in ranges:
+            params.extend((lo,) if lo == hi else (lo, hi))
+    if slots.get("target"):
+        cond, extra = _address_filter(slots["target"])
+        where.append(cond)
+        params.extend(extra)
+    if slots.get("product"):
+        cond, extra = _service_filter(slots["product"], slots.get("version"))
+        where.append(cond)
+        params.extend(extra)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    # a lone max() makes SQLite take the bare columns from the newest row of each group
+    select = ("SELECT p.address, p.protocol, p.port, p.state, s.name, s.product, s.version, "
+              f"MAX(p.ts), COUNT(*) FROM ports p LEFT JOIN services s ON s.id = p.service_id {clause} "
+              "GROUP BY p.address, p.protocol, p.port "
+              "ORDER BY p.ipv4 IS NULL, p.ipv4, p.address, p.protocol, p.port LIMIT ? OFFSET ?")
+    count = f"SELECT COUNT(*) FROM (SELECT 1 FROM ports p {clause} GROUP BY p.address, p.protocol, p.port)"
+    return select, count, params
+
+def _hosts_query(slots: Dict[str, Any]) -> Tuple[str, str, List[Any]]:
+    where, params = _window(slots, "h")
+    where.append("h.status = 'up'")
+    if slots.get("target"):
+        cond, extra = _address_filter(slots["target"], "h")
+        where.append(cond)
+        params.extend(extra)
+    clause = f"WHERE {' AND '.join(where)}"
+    select = (f"SELECT h.address, h.hostnames, MAX(h.ts), COUNT(*) FROM hosts h {clause} "
+              "GROUP BY h.address ORDER BY h.ipv4 IS NULL, h.ipv4, h.address LIMIT ? OFFSET ?")
+    count = f"SELECT COUNT(*) FROM (SELECT 1 FROM hosts h {clause} GROUP BY h.address)"
+    return select, count, params
+
+@timed("query.run")
+def run_query(slots: Dict[str, Any]) -> QueryPage:
+    """Run one page of a query built by intents._query_slots (ValueError on a bad filter)."""
+    view = slots.get("view") or "ports"
+    limit = max(1, min(int(slots.get("limit") or PAGE_SIZE), MAX_PAGE_SIZE))
+    page = max(1, int(slots.get("page") or 1))
+    select, count, params = (_hosts_query if view == "hosts" else _ports_query)(slots)
+    # results of scans that just finished may still be queued for the writer
+    db.flush(timeout=5)
+    t0 = time.perf_counter()
+    with db.connection() as conn:
+        total = conn.execute(count, params).fetchone()[0]
+        raw = conn.execute(select, params + [limit, (page - 1) * limit]).fetchall()
+    elapsed = time.perf_counter() - t0
+    if view == "hosts":
+        rows = [{"address": a, "hostnames": n.split() if n else [], "last_seen": ts, "scans": c}
+                for a, n, ts, c in raw]
+    else:
+        rows = [{"address": a, "protocol": proto, "port": port, "state": state, "service": name or "",
+                 "product": product or "", "version": version or "", "last_seen": ts, "scans": c}
+                for a, proto, port, state, name, product, version, ts, c in raw]
+    annotate(view=view, rows=len(rows), total=total, page=page)
+    return QueryPage(view, rows, total, page, limit, round(elapsed, 6))
+
+def _when(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+def _print_page(result: QueryPage, slots: Dict[str, Any]) -> None:
+    if not result.total:
+        console.print("[yellow]No stored results match.[/yellow] Only finished scans are recorded; "
+                      "run a scan first or widen the time window.")
+        return
+    from rich.table import Table
+    table = Table(title="Open ports seen" if slots.get("state", "open") == "open" and result.view == "ports"
+                  else ("Hosts seen up" if result.view == "hosts" else "Ports seen"))
+    if result.view == "hosts":
+        for col in ("address", "hostnames", "last seen", "scans"):
+            table.add_column(col, justify="right" if col == "scans" else "left", no_wrap=col == "last seen")
+        for r in result.rows:
+            table.add_row(r["address"], " ".join(r["hostnames"]) or "-", _when(r["last_seen"]), str(r["scans"]))
+    else:
+        for col in ("address", "port", "state", "service", "product / version", "last seen", "scans"):
+            table.add_column(col, justify="right" if col == "scans" else "left", no_wrap=col == "last seen")
+        for r in result.rows:
+            table.add_row(r["address"], f"{r['port']}/{r['protocol']}", r["state"], r["service"] or "-",
+                          " ".join(x for x in (r["product"], r["version"]) if x) or "-",
+                          _when(r["last_seen"]), str(r["scans"]))
+    console.print(table)
+    first = (result.page - 1) * result.limit + 1
+    line = (f"Rows {first}-{first + len(result.rows) - 1} of {result.total} "
+            f"(page {result.page}/{result.pages}) in {result.elapsed * 1000:.1f} ms")
+    if result.page < result.pages:
+        line += "; say [cyan]next page[/cyan] or [cyan]page N[/cyan] for more"
+    console.print(line)
+
+def handle_intent(intent_payload: Dict[str, Any], user_input: Optional[str] = None):
+    """Router entrypoint for the "query" intent. Returns the QueryPage shown, or None."""
+    from yurei.core.router import current_session
+    session_id = current_session()
+    slots = dict(intent_payload.get("slots") or {})
+    if slots.get("page") == "next":
+        last = _recall(session_id)
+        if last is None:
+            console.print("[yellow]No earlier query to continue.[/yellow]")
+            return None
+        slots = dict(last, page=(last.get("page") or 1) + 1)
+    try:
+        result = run_query(slots)
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        return None
+    if result.rows or result.page == 1:
+        _remember(session_id, slots)
+        _print_page(result, slots)
+    else:
+        console.print(f"[yellow]Page {result.page} is past the end[/yellow] ({result.total} rows, "
+                      f"{result.pages} page(s)).")
+    return result
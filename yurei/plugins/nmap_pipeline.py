@@ -0,0 +1,144 @@
+# yurei/plugins/nmap_pipeline.py
+"""
+Discovery-then-scan pipeline for sparse targets.
+
+A ping sweep (nmap -sn) runs on a helper thread. Each host it reports up is
+queued for the port-scan stage, which collects live hosts into batches and
+scans every batch with its own nmap process. Those scans start while
+discovery is still sweeping the rest of the range. Dead addresses are never
+port-scanned.
+"""
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Callable, List, Dict
+from yurei.plugins.nmap_shard import labelled, current_label
+from yurei.plugins.nmap_xml import ScanResult, merge_results
+from yurei.core.jobs import bind
+from yurei.core.metrics import timed, annotate
+from yurei.core.output import console, carry
+
+# Live hosts per follow-up nmap invocation, and how long a partial batch
+# waits for more hosts before it is scanned anyway.
+BATCH_SIZE = 16
+BATCH_WAIT = 1.0
+DEFAULT_WORKERS = 2
+
+SCANNED_RE = re.compile(r"(\d+) IP address", re.I)
+
+@timed("nmap.pipeline")
+def run_pipelined(discover: Callable[[str, Callable[[str], None]], Optional[ScanResult]],
+                  scan: Callable[[List[str]], Optional[ScanResult]], target: str,
+                  workers: Optional[int] = None, batch_size: int = BATCH_SIZE,
+                  batch_wait: float = BATCH_WAIT) -> Optional[ScanResult]:
+    """
+    discover(target, on_live) runs the sweep and calls on_live(address) for
+    every host found up. scan(addresses) port-scans one batch. Returns the
+    merged port-scan results, or the discovery result if no host was up.
+    """
+    workers = max(1, workers or DEFAULT_WORKERS)
+    live: "queue.Queue[Optional[str]]" = queue.Queue()
+    found: List[str] = []
+    state: Dict[str, object] = {}
+    outer = current_label()
+
+    def _discover():
+        t0 = time.perf_counter()
+        try:
+            with labelled(f"{outer} discovery" if outer else "discovery"):
+                state["discovery"] = discover(target, live.put)
+        except Exception as e:
+            console.print(f"[red]Host discovery failed:[/red] {e}")
+        finally:
+            state["discovery_wall"] = time.perf_counter() - t0
+            live.put(None)
+
+    timings: Dict[int, float] = {}
+
+    def _scan(idx: int, hosts: List[str]):
+        t0 = time.perf_counter()
+        try:
+            label = f"batch {idx + 1}"
+            with labelled(f"{outer} {label}" if outer else label):
+                return scan(hosts)
+        finally:
+            timings[idx] = time.perf_counter() - t0
+
+    console.print(f"[cyan]Discovering live hosts in {target}; port scans start as hosts are found...[/cyan]")
+    wall0 = time.perf_counter()
+    sweeper = threading.Thread(target=carry(bind(_discover)), name="nmap-discovery", daemon=True)
+    sweeper.start()
+    futures = {}
+    first_scan = None
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nmap-batch") as pool:
+        run_one = carry(bind(_scan))
+        batch: List[str] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                address = live.get(timeout=timeout)
+            except queue.Empty:
+                address = ""
+            if address:
+                found.append(address)
+                batch.append(address)
+                if deadline is None:
+                    deadline = time.monotonic() + batch_wait
+            # flush on a full batch, an expired wait ("") or the end of discovery (None)
+            if batch and (not address or len(batch) >= batch_size):
+                if first_scan is None:
+                    first_scan = time.perf_counter() - wall0
+                futures[pool.submit(run_one, len(futures), list(batch))] = len(futures)
+                batch.clear()
+                deadline = None
+            if address is None:
+                break
+        results: Dict[int, ScanResult] = {}
+        failed = 0
+        for fut in as_completed(futures):
+            idx = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                result = None
+                console.print(f"[red]Batch {idx + 1} failed:[/red] {e}")
+            if result is None:
+                failed += 1
+            else:
+                results[idx] = result
+    sweeper.join()
+    wall = time.perf_counter() - wall0
+
+    discovery = state.get("discovery")
+    m = SCANNED_RE.search(getattr(discovery, "summary", "") or "")
+    addresses = int(m.group(1)) if m else None
+    skipped = addresses - len(found) if addresses is not None else None
+    sequential = state.get("discovery_wall", 0.0) + sum(timings.values())
+    overlap = max(0.0, sequential - wall)
+    # dead addresses would have cost about what a live one did to port-scan
+    per_host = sum(timings.values()) / len(found) if found and timings else None
+    skip_saved = skipped * per_host if skipped is not None and per_host is not None else None
+    annotate(addresses=addresses, live=len(found), skipped=skipped, batches=len(futures),
+             per_host=per_host and round(per_host, 3), skip_saved_est=skip_saved and round(skip_saved, 3),
+             overlap_saved=round(overlap, 3))
+
+    scanned = f"{len(found)}/{addresses}" if addresses is not None else str(len(found))
+    console.print(f"[bold cyan]Pipeline finished:[/bold cyan] {scanned} addresses live, "
+                  f"{skipped if skipped is not None else '?'} dead addresses skipped, "
+                  f"{len(futures)} batch(es){f', {failed} failed' if failed else ''}")
+    if futures:
+        console.print(f"[bold cyan]Time:[/bold cyan] first port scan {first_scan:.1f}s in, wall {wall:.1f}s vs "
+                      f"{sequential:.1f}s serial discovery-then-scan ({overlap:.1f}s saved by overlap)")
+    if skip_saved:
+        console.print(f"[bold cyan]Skipped:[/bold cyan] ~{skip_saved:.1f}s of port scanning saved on {skipped} dead "
+                      f"addresses (est. at {per_host:.2f}s per host measured)")
+    if not results:
+        if not found:
+            console.print("[yellow]No live hosts found; nothing to port-scan.[/yellow]")
+        return discovery if not found else None
+    merged = merge_results([results[i] for i in sorted(results)])
+    merged.summary += f", {skipped if skipped is not None else '?'} dead addresses skipped"
+    return merged
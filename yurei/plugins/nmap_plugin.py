@@ -1,13 +1,27 @@
 # yurei/plugins/nmap_plugin.py
-from rich.console import Console
+import copy
+import functools
 import subprocess
 import shutil
 import os
 import re
+import time
+import sqlite3
+import ipaddress
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any, Union, List
-
-console = Console()
+from typing import Optional, Dict, Any, Union, List, Callable
+from yurei.plugins.nmap_shard import run_sharded, current_label
+from yurei.plugins.nmap_pipeline import run_pipelined
+from yurei.plugins.nmap_xml import NmapXmlParser, Host, ScanResult
+from yurei.plugins import nmap_timing, connect_scan
+from yurei.core import db
+from yurei.core.targets import AddressSet, PortSet, is_target
+from yurei.core.cache import ResultCache, make_key
+from yurei.core.metrics import timed, annotate
+from yurei.core.output import console, carry
+from yurei.core.jobs import current_job, track_process, untrack_process
 
 # -----------------------
 # Low-level helpers
@@ -29,16 +43,25 @@ IP_CIDR_RE = re.compile(r"\b(?:(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?)\b")
 HOSTNAME_RE = re.compile(r"\b([a-z0-9\-]+\.[a-z]{2,})\b", re.I)
 PORT_LIST_RE = re.compile(r"^(\d{1,5}(?:-\d{1,5})?(?:,\d{1,5})*)$")
 
-def _normalize_target(target_like: Optional[str], default="127.0.0.1") -> str:
+def _normalize_target(target_like: Union[str, List[str], None], default="127.0.0.1") -> str:
     """
     Accept either:
       - explicit IP/CIDR or hostname
       - 'None' -> default
       - a string which may include flags; extract first token
+      - a list of targets -> space-separated (expanded into separate nmap args)
     """
+    if isinstance(target_like, (list, tuple)):
+        return " ".join(_normalize_target(t) for t in target_like if t) or default
     if not target_like:
         return default
-    token = str(target_like).strip().split()[0]
+    tokens = str(target_like).split()
+    if not tokens:
+        return default
+    if len(tokens) > 1 and all(is_target(t) for t in tokens):
+        # overlapping or repeated targets ("10.0.0.0/24 10.0.0.5") become one set of blocks
+        return str(AddressSet.parse(" ".join(tokens)))
+    token = tokens[0]
     if IP_CIDR_RE.match(token) or HOSTNAME_RE.match(token) or re.match(r"^[\w\.\-:]+$", token):
         return token
     # fallback to original string (best-effort)
@@ -51,58 +74,343 @@ def _normalize_ports(ports_like: Optional[str]) -> Optional[str]:
     # Accept "top 100" as special handled in higher-level code
     if ports_like.lower().startswith("top"):
         return ports_like  # returned as-is (router should translate if desired)
-    # If it looks like a list or range, return it
-    if PORT_LIST_RE.match(ports_like):
-        return ports_like
+    # If it is a list of ports/ranges, return it merged and deduplicated
+    try:
+        return str(PortSet.parse(ports_like))
+    except ValueError:
+        pass
     # try to extract comma/dash containing token
     m = re.search(r"(\d{1,5}(?:-\d{1,5})?(?:,\d{1,5})*)", ports_like)
     if m:
         return m.group(1)
     return None
 
-def _run_nmap(args: List[str], show_command: bool = False) -> Optional[subprocess.CompletedProcess]:
-    if not _check_nmap():
+# How many trailing stderr lines (warnings/errors) are kept on the result.
+STDERR_TAIL_LINES = 200
+# Ask nmap for periodic <taskprogress> updates on long runs.
+STATS_EVERY = "30s"
+
+def _stream_nmap(args: List[str], on_stdout: Callable[[str], None],
+                 on_stderr: Callable[[str], None], usage: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Run nmap and hand its stdout and stderr to the callbacks line by line as
+    they are produced (stderr is drained on a helper thread so neither pipe
+    can fill up and stall nmap). Returns nmap's exit code. If usage is given
+    it is filled with the child's wall time, CPU time, peak RSS and output size.
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, bufsize=1)
+    # cancelling the job this scan belongs to (if any) kills proc
+    track_process(proc)
+    sizes = {"stdout": 0, "stderr": 0}
+
+    def _drain_stderr():
+        for line in proc.stderr:
+            sizes["stderr"] += len(line)
+            on_stderr(line.rstrip("\n"))
+
+    err_thread = threading.Thread(target=carry(_drain_stderr), daemon=True)
+    err_thread.start()
+    try:
+        for line in proc.stdout:
+            sizes["stdout"] += len(line)
+            on_stdout(line)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        rusage = _reap(proc)
+        untrack_process(proc)
+        err_thread.join()
+        proc.stderr.close()
+    if usage is not None:
+        usage["wall"] = time.perf_counter() - t0
+        usage["output_bytes"] = sizes["stdout"] + sizes["stderr"]
+        if rusage is not None:
+            usage["cpu_user"] = rusage.ru_utime
+            usage["cpu_sys"] = rusage.ru_stime
+            usage["maxrss_kb"] = rusage.ru_maxrss
+    return proc.returncode
+
+def _reap(proc: subprocess.Popen):
+    """Wait for proc; returns its resource usage where os.wait4 exists (POSIX), else None."""
+    if not hasattr(os, "wait4") or proc.returncode is not None:
+        proc.wait()
+        return None
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        proc.wait()
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+def _xml_args(args: List[str]) -> List[str]:
+    extra = []
+    if "--stats-every" not in args:
+        extra += ["--stats-every", STATS_EVERY]
+    if "-oX" not in args:
+        extra += ["-oX", "-"]
+    # the last arg may hold several space-separated targets (see _normalize_target)
+    return args[:1] + extra + args[1:-1] + args[-1].split()
+
+# Per-intent lifetime of cached scan results, in seconds.
+SCAN_CACHE_TTLS = {
+    "ping": 300,
+    "host_discovery": 300,
+    "nmap_scan": 1800,
+    "top_ports": 1800,
+    "full": 3600,
+    "udp_scan": 3600,
+    "http_enum": 1800,
+    "smb_enum": 1800,
+    "vuln_scan": 3600,
+    "traceroute": 600,
+}
+SCAN_CACHE_DEFAULT_TTL = 900
+scan_cache = ResultCache("nmap", default_ttl=SCAN_CACHE_DEFAULT_TTL, max_entries=500)
+
+# Per-call options set by _dispatch and read by _run_nmap on the same thread.
+_opts = threading.local()
+
+def _canonical_target(target: str) -> str:
+    try:
+        return str(ipaddress.ip_network(target, strict=False))
+    except ValueError:
+        return target.lower()
+
+def _cache_key(args: List[str]) -> str:
+    return make_key(args[:-1] + [" ".join(_canonical_target(t) for t in args[-1].split())])
+
+def _cache_lookup(key: str) -> Optional[ScanResult]:
+    if getattr(_opts, "fresh", False):
+        return None
+    try:
+        entry = scan_cache.get(key)
+        # entries hold the id of the scans row the result was logged to
+        data = db.load_scan(int(entry["value"])) if entry else None
+    except sqlite3.Error as e:
+        console.print(f"[yellow]Scan cache unavailable:[/yellow] {e}")
+        return None
+    if not data:
         return None
+    age = int(time.time() - entry["created"])
+    console.print(f"[grey50](cache)[/grey50] Reusing result from {age // 60}m{age % 60:02d}s ago "
+                  f"(add 'fresh' or --fresh to rescan)")
+    return ScanResult.from_dict(data)
+
+def _cache_store(key: str) -> Callable[[sqlite3.Connection, int], None]:
+    """For db.log_scan(then=...): points the cache entry at the scans row written with it."""
+    ttl = SCAN_CACHE_TTLS.get(getattr(_opts, "intent", None), SCAN_CACHE_DEFAULT_TTL)
+    return lambda conn, scan_id: scan_cache.write(conn, key, str(scan_id), ttl=ttl)
+
+def _format_host(host: Host) -> str:
+    names = f" ({', '.join(host.hostnames)})" if host.hostnames else ""
+    lines = [f"{host.address}{names} {host.status}"]
+    for port in host.ports:
+        desc = " ".join(x for x in (port.product, port.version, port.extrainfo) if x)
+        portspec = f"{port.portid}/{port.protocol}"
+        lines.append(f"  {portspec:<10} {port.state:<13} {port.service:<14} {desc}".rstrip())
+    return "\n".join(lines)
+
+def _emitter(on_line: Optional[Callable[[str], None]]) -> Callable[[str], None]:
+    label = current_label()
+    prefix = f"[{label}] " if label else ""
+    return on_line or (lambda text: console.print(prefix + text, markup=False, highlight=False))
+
+def _replay(cached: ScanResult, emit: Callable[[str], None],
+            on_host: Optional[Callable[[Host], None]] = None) -> ScanResult:
+    annotate(cached=True)
+    for host in cached.hosts:
+        if on_host:
+            on_host(host)
+        if host.status == "up" or host.ports:
+            emit(_format_host(host))
+    if cached.summary:
+        emit(cached.summary)
+    return cached
+
+@timed("nmap.run")
+def _run_nmap(args: List[str], show_command: bool = False,
+              on_line: Optional[Callable[[str], None]] = None,
+              xml_copy: Optional[str] = None,
+              on_host: Optional[Callable[[Host], None]] = None) -> Optional[ScanResult]:
+    """
+    Run nmap with XML output on stdout and parse it host by host as it
+    arrives. on_line (default: print to the console) receives a rendered
+    summary of every finished host, progress updates and nmap's warnings.
+    xml_copy, if given, is a path the raw XML is also written to. on_host
+    receives every parsed Host (cached ones too) as soon as it is known.
+    Successful results are cached per argument vector (see SCAN_CACHE_TTLS);
+    runs that write files (xml_copy) always execute. Timing flags chosen by
+    nmap_timing are added after the cache lookup and kept out of the key.
+    """
+    if getattr(_opts, "known_up", False) and "-sn" not in args and "-Pn" not in args:
+        # targets came from a discovery sweep, so nmap needn't ping them again
+        args = args[:-1] + ["-Pn"] + args[-1:]
     if show_command:
         console.print(f"[grey50][cmd][/grey50] {' '.join(args)}")
+    emit = _emitter(on_line)
+
+    key = None if xml_copy else _cache_key(args)
+    cached = _cache_lookup(key) if key else None
+    if cached is not None:
+        return _replay(cached, emit, on_host)
+
+    if not _check_nmap():
+        return None
+    timing = nmap_timing.profile_for(args)
+    if timing is not None:
+        console.print(f"[grey50](timing)[/grey50] {timing.describe()}", highlight=False)
+        annotate(timing=timing.tier)
+        args = nmap_timing.apply(args, timing)
+    errors = deque(maxlen=STDERR_TAIL_LINES)
+
+    def _on_host(host: Host):
+        if on_host:
+            on_host(host)
+        if host.status == "up" or host.ports:
+            emit(_format_host(host))
+
+    def _on_progress(task: str, percent: float, remaining: Optional[int]):
+        eta = f", ~{remaining}s left" if remaining is not None else ""
+        emit(f"{task}: {percent:.1f}% done{eta}")
+
+    def _on_stderr(line: str):
+        if line.strip():
+            errors.append(line)
+            emit(line)
+
+    parser = NmapXmlParser(on_host=_on_host, on_progress=_on_progress)
+    copy_fh = open(xml_copy, "w") if xml_copy else None
+
+    def _on_stdout(chunk: str):
+        if copy_fh:
+            copy_fh.write(chunk)
+        parser.feed(chunk)
+
     try:
-        result = subprocess.run(args, capture_output=True, text=True, check=False)
         console.rule("[green]nmap output")
-        # Prefer stdout; if empty show stderr
-        out = result.stdout.strip() or result.stderr.strip()
-        console.print(out)
+        usage: Dict[str, Any] = {}
+        returncode = _stream_nmap(_xml_args(args), _on_stdout, _on_stderr, usage)
+        annotate(**usage)
+        result = parser.close()
         console.rule()
-        return result
     except Exception as e:
         console.print(f"[red]Error running nmap:[/red] {e}")
         return None
+    finally:
+        if copy_fh:
+            copy_fh.close()
+    result.args = args
+    result.returncode = returncode
+    result.errors = list(errors)
+    result.timing = timing.to_dict() if timing else None
+    if timing is not None:
+        nmap_timing.observe(result)
+    annotate(returncode=returncode, hosts=len(result.hosts))
+    if result.summary:
+        emit(result.summary)
+    db.log_scan(args, result, then=_cache_store(key) if key and returncode == 0 else None)
+    return result
+
+def _use_connect(target: str, ports: Optional[List[int]], quick: bool = False) -> bool:
+    """
+    Whether a plain TCP port check goes to the built-in connect scanner:
+    with no nmap installed, with YUREI_SCAN_BACKEND=connect for jobs of up to
+    connect_scan.MAX_PROBES probes, otherwise ("auto") for small jobs run
+    without root or asked to be quick.
+    """
+    if ports is None or connect_scan.BACKEND == "nmap":
+        return False
+    probes = connect_scan.count_hosts(target) * len(ports)
+    if shutil.which("nmap") is None:
+        return True  # connect_scan.scan refuses jobs over MAX_PROBES with a message
+    if connect_scan.BACKEND == "connect":
+        return probes <= connect_scan.MAX_PROBES
+    if _is_root() and not quick:
+        return False  # nmap can SYN-scan, which is quieter than full connects
+    return probes <= connect_scan.AUTO_MAX_PROBES
+
+@timed("connect.run")
+def _run_connect(target: str, ports: List[int],
+                 on_line: Optional[Callable[[str], None]] = None,
+                 on_host: Optional[Callable[[Host], None]] = None) -> Optional[ScanResult]:
+    """Same contract as _run_nmap (output, caching, scans table) for connect_scan.scan."""
+    args = ["connect", "-p", connect_scan.format_ports(ports), target]
+    console.print(f"[grey50](connect)[/grey50] built-in TCP connect scan, {len(ports)} port(s) per host",
+                  highlight=False)
+    emit = _emitter(on_line)
+    key = _cache_key(args)
+    cached = _cache_lookup(key)
+    if cached is not None:
+        return _replay(cached, emit, on_host)
+
+    def _on_host(host: Host):
+        if on_host:
+            on_host(host)
+        emit(_format_host(host))
+
+    # nothing for the job to kill here, so the scan polls the job's cancel flag instead
+    job = current_job()
+    try:
+        result = connect_scan.scan(target, ports, on_host=_on_host,
+                                   cancelled=(lambda: job.cancelled) if job is not None else None)
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        return None
+    if job is not None and job.cancelled:
+        console.print("[yellow]Connect scan cancelled.[/yellow]")
+        return None
+    annotate(hosts=len(result.hosts), probes=connect_scan.count_hosts(target) * len(ports))
+    for line in result.errors:
+        emit(line)
+    emit(result.summary)
+    db.log_scan(args, result, source="connect", then=_cache_store(key))
+    return result
 
 # -----------------------
 # High-level scan helpers (accept structured args)
 # -----------------------
 
-def host_discovery(target: Union[str, None] = None):
+def host_discovery(target: Union[str, None] = None, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running host discovery (ping/ARP) on {target}...[/cyan]")
-    return _run_nmap(["nmap", "-sn", target], show_command=True)
+    return _run_nmap(["nmap", "-sn", target], show_command=True, on_line=on_line)
 
-def ping_sweep(target: Union[str, None] = None):
-    return host_discovery(target)
+def ping_sweep(target: Union[str, None] = None, on_line: Optional[Callable[[str], None]] = None):
+    return host_discovery(target, on_line=on_line)
 
-def top_ports_scan(target: str, top_n: int = 100):
+def top_ports_scan(target: str, top_n: int = 100, quick: bool = False,
+                   on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Scanning top {top_n} ports on {target}...[/cyan]")
-    return _run_nmap(["nmap", f"--top-ports", str(top_n), target], show_command=True)
+    ports = connect_scan.top_ports(top_n)
+    if _use_connect(target, ports, quick):
+        return _run_connect(target, ports, on_line=on_line)
+    return _run_nmap(["nmap", f"--top-ports", str(top_n), target], show_command=True, on_line=on_line)
 
-def full_tcp_scan(target: str):
+def full_tcp_scan(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running full TCP port scan on {target}...[/cyan]")
     if not _is_root():
         console.print("[yellow]Warning:[/yellow] Full SYN scan (-sS) usually requires root. Falling back to connect scan (-sT).")
-        return _run_nmap(["nmap", "-sT", "-p-", "-T3", target], show_command=True)
-    return _run_nmap(["nmap", "-sS", "-p-", "-T4", target], show_command=True)
+        return _run_nmap(["nmap", "-sT", "-p-", "-T3", target], show_command=True, on_line=on_line)
+    return _run_nmap(["nmap", "-sS", "-p-", "-T4", target], show_command=True, on_line=on_line)
 
-def service_version_scan(target: str, ports: Optional[str] = None, verbose: bool = False, aggressive: bool = False):
+def quick_port_scan(target: str, ports: str, on_line: Optional[Callable[[str], None]] = None):
+    """Open/closed check of an explicit port list, without service detection."""
+    target = _normalize_target(target)
+    console.print(f"[cyan]Checking ports {ports} on {target}...[/cyan]")
+    port_list = connect_scan.parse_ports(ports)
+    if _use_connect(target, port_list, quick=True):
+        return _run_connect(target, port_list, on_line=on_line)
+    return _run_nmap(["nmap", "-p", ports, target], show_command=True, on_line=on_line)
+
+def service_version_scan(target: str, ports: Optional[str] = None, verbose: bool = False, aggressive: bool = False,
+                         on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     args = ["nmap"]
     if verbose:
@@ -116,52 +424,54 @@ def service_version_scan(target: str, ports: Optional[str] = None, verbose: bool
         args += ["-p", ports]
     args.append(target)
     console.print(f"[cyan]Running service/version detection on {target}...[/cyan]")
-    return _run_nmap(args, show_command=True)
+    return _run_nmap(args, show_command=True, on_line=on_line)
 
-def os_detection(target: str):
+def os_detection(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running OS detection on {target}...[/cyan]")
     if not _is_root():
         console.print("[yellow]Warning:[/yellow] OS detection works best as root and is noisy. Proceed only on authorized targets.")
-    return _run_nmap(["nmap", "-O", target], show_command=True)
+    return _run_nmap(["nmap", "-O", target], show_command=True, on_line=on_line)
 
-def udp_scan(target: str, ports: Optional[str] = None):
+def udp_scan(target: str, ports: Optional[str] = None, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     ports = ports or "1-1024"
     console.print(f"[cyan]Running UDP scan on {target} ports {ports}...[/cyan]")
     console.print("[yellow]Note:[/yellow] UDP scans are slower and less reliable; consider running as root for best results.")
     if not _is_root():
         console.print("[yellow]Warning:[/yellow] Consider running as root/Administrator for best results.")
-    return _run_nmap(["nmap", "-sU", "-p", ports, "-T3", target], show_command=True)
+    return _run_nmap(["nmap", "-sU", "-p", ports, "-T3", target], show_command=True, on_line=on_line)
 
-def vuln_script_scan(target: str):
+def vuln_script_scan(target: str, on_line: Optional[Callable[[str], None]] = None, warn: bool = True):
     target = _normalize_target(target)
     console.print(f"[cyan]Running vulnerability scripts (nmap --script vuln) on {target}...[/cyan]")
-    console.print("[red]WARNING:[/red] Vulnerability scripts can be intrusive and may impact target availability. Use only on authorized systems.")
-    return _run_nmap(["nmap", "--script", "vuln", target], show_command=True)
+    if warn:
+        console.print("[red]WARNING:[/red] Vulnerability scripts can be intrusive and may impact target availability. Use only on authorized systems.")
+    return _run_nmap(["nmap", "--script", "vuln", target], show_command=True, on_line=on_line)
 
-def nse_default(target: str):
+def nse_default(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running default NSE scripts on {target}...[/cyan]")
-    return _run_nmap(["nmap", "--script", "default", target], show_command=True)
+    return _run_nmap(["nmap", "--script", "default", target], show_command=True, on_line=on_line)
 
-def http_enum(target: str):
+def http_enum(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running HTTP enumeration against {target}...[/cyan]")
-    return _run_nmap(["nmap", "-p", "80,443", "--script", "http-enum,http-title", target], show_command=True)
+    return _run_nmap(["nmap", "-p", "80,443", "--script", "http-enum,http-title", target], show_command=True, on_line=on_line)
 
-def smb_enum(target: str):
+def smb_enum(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running SMB enumeration on {target} (port 445)...[/cyan]")
     console.print("[yellow]Warning:[/yellow] SMB enumeration can be noisy; run only on authorized hosts.")
-    return _run_nmap(["nmap", "-p", "445", "--script", "smb-enum-shares,smb-vuln-ms17-010", target], show_command=True)
+    return _run_nmap(["nmap", "-p", "445", "--script", "smb-enum-shares,smb-vuln-ms17-010", target], show_command=True, on_line=on_line)
 
-def traceroute_scan(target: str):
+def traceroute_scan(target: str, on_line: Optional[Callable[[str], None]] = None):
     target = _normalize_target(target)
     console.print(f"[cyan]Running traceroute to {target}...[/cyan]")
-    return _run_nmap(["nmap", "--traceroute", target], show_command=True)
+    return _run_nmap(["nmap", "--traceroute", target], show_command=True, on_line=on_line)
 
-def save_output_scan(target: str, extra_flags: Optional[List[str]] = None):
+def save_output_scan(target: str, extra_flags: Optional[List[str]] = None,
+                     on_line: Optional[Callable[[str], None]] = None):
     if not _check_nmap():
         return None
     target = _normalize_target(target)
@@ -169,8 +479,9 @@ def save_output_scan(target: str, extra_flags: Optional[List[str]] = None):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     base = f"scan_{target.replace('/', '_')}_{timestamp}"
     console.print(f"[cyan]Running scan on {target} and saving to {base}.*[/cyan]")
-    args = ["nmap", "-oA", base] + extra_flags + [target]
-    return _run_nmap(args, show_command=True)
+    # equivalent of -oA: XML goes to stdout for parsing and is teed to base.xml
+    args = ["nmap", "-oN", f"{base}.nmap", "-oG", f"{base}.gnmap"] + extra_flags + [target]
+    return _run_nmap(args, show_command=True, xml_copy=f"{base}.xml", on_line=on_line)
 
 # -----------------------
 # Dispatcher: accept router payload
@@ -179,7 +490,7 @@ def save_output_scan(target: str, extra_flags: Optional[List[str]] = None):
 def _extract_from_payload(intent_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Normalize the router payload to our internal shape:
-      { target, ports, flags: { verbose, aggressive, udp, vuln, http, smb, save, top_n } }
+      { target, ports, workers, flags: { verbose, aggressive, udp, vuln, http, smb, save, top_n } }
     """
     slots = intent_payload.get("slots", {}) if intent_payload else {}
     target = slots.get("target") or slots.get("host") or None
@@ -193,6 +504,8 @@ def _extract_from_payload(intent_payload: Dict[str, Any]) -> Dict[str, Any]:
         "http": bool(slots.get("http")),
         "smb": bool(slots.get("smb")),
         "save": bool(slots.get("save")),
+        "live": bool(slots.get("live")),
+        "quick": bool(slots.get("quick")),
     }
     # support 'top' expressed as integer in slots
     top = slots.get("top") or None
@@ -203,73 +516,134 @@ def _extract_from_payload(intent_payload: Dict[str, Any]) -> Dict[str, Any]:
     else:
         flags["top_n"] = None
 
-    return {"target": target, "ports": ports, "flags": flags}
+    workers = slots.get("workers") or None
+    if isinstance(workers, str) and workers.isdigit():
+        workers = int(workers)
+    if not isinstance(workers, int) or workers < 2:
+        workers = None
+
+    return {"target": target, "ports": ports, "workers": workers, "flags": flags}
 
-def handle_intent(intent_payload: Dict[str, Any], user_input: Optional[str] = None):
+def handle_intent(intent_payload: Dict[str, Any], user_input: Optional[str] = None,
+                  on_line: Optional[Callable[[str], None]] = None):
     """
     Main entrypoint for the router. Accepts the payload produced by parse_intent().
     Example payload:
       { "intent": "nmap_scan", "slots": {"target":"10.0.0.1", "ports":"22,80", "verbose":True } }
+    Returns the parsed ScanResult (hosts, ports, services, scripts), or None on failure.
     """
     if not intent_payload or "intent" not in intent_payload:
         console.print("[red]Error:[/red] Invalid intent payload")
         return None
 
+    # Safety reminder, once per command rather than once per shard or batch
+    cautioned = intent_payload["intent"] == "vuln_scan" or bool(intent_payload.get("slots", {}).get("vuln"))
+    if cautioned:
+        console.print("[red]Caution:[/red] You are about to run vulnerability checks. Ensure you have authorization.")
+    return _dispatch(intent_payload, user_input, on_line, cautioned)
+
+def _dispatch(intent_payload: Dict[str, Any], user_input: Optional[str] = None,
+              on_line: Optional[Callable[[str], None]] = None, cautioned: bool = False):
+    """
+    handle_intent minus the checks done once per command; shards and live
+    batches re-enter here. cautioned: the vuln caution was already shown.
+    """
     intent = intent_payload["intent"]
     p = _extract_from_payload(intent_payload)
+    _opts.intent = intent
+    _opts.fresh = bool(intent_payload.get("slots", {}).get("fresh"))
     target = p["target"]
     ports = p["ports"]
-    flags = p["flags"]
-
-    # Safety reminder
-    if intent in ("vuln_scan",) or flags.get("vuln"):
-        console.print("[red]Caution:[/red] You are about to run vulnerability checks. Ensure you have authorization.")
+    flags = dict(p["flags"], cautioned=cautioned)
 
-    # Dispatch
-    if intent == "nmap_scan":
-        # if UDP mode requested explicitly in slots, delegate to udp_scan
-        if flags.get("udp"):
-            return udp_scan(target, ports)
-        # handle top-ports if requested
-        if flags.get("top_n"):
-            return top_ports_scan(target, flags["top_n"])
-        # choose sS if root else sT; call service_version_scan wrapper
-        return service_version_scan(target, ports=ports, verbose=flags["verbose"], aggressive=flags["aggressive"])
-
-    if intent == "udp_scan":
-        return udp_scan(target, ports)
-
-    if intent == "http_enum" or flags.get("http"):
-        return http_enum(target)
-
-    if intent == "smb_enum" or flags.get("smb"):
-        return smb_enum(target)
-
-    if intent == "vuln_scan" or flags.get("vuln"):
-        return vuln_script_scan(target)
-
-    if intent == "ping":
-        return host_discovery(target)
-
-    if intent == "host_discovery":
-        return host_discovery(target)
+    # Sparse ranges: sweep first and port-scan only the live hosts, in batches
+    if flags.get("live") and _resolve_intent(intent, flags) not in _NO_PIPELINE:
+        return _run_live(intent_payload, user_input, target, p["workers"], on_line, cautioned)
 
-    if intent == "top_ports":
-        n = flags.get("top_n") or 100
-        return top_ports_scan(target, n)
+    # Large CIDR/range targets can be split across a pool of nmap processes
+    # (shards share one timing state, so later shards adapt to what earlier ones saw)
+    if p["workers"]:
+        handler = functools.partial(_dispatch, on_line=on_line, cautioned=cautioned)
+        if nmap_timing.ENABLED:
+            handler = nmap_timing.AdaptiveTiming(target).wrap(handler)
+        return run_sharded(handler, intent_payload, user_input, target, p["workers"])
 
-    if intent == "full":
-        return full_tcp_scan(target)
-
-    if intent == "traceroute":
-        return traceroute_scan(target)
-
-    if intent == "save":
-        extra = [] 
-        return save_output_scan(target, extra)
-
-    console.print(f"[yellow]Unknown intent in nmap_plugin:[/yellow] {intent}")
-    return None
+    # Dispatch
+    handler = _INTENT_HANDLERS.get(_resolve_intent(intent, flags))
+    if handler is None:
+        console.print(f"[yellow]Unknown intent in nmap_plugin:[/yellow] {intent}")
+        return None
+    return handler(target, ports, flags, on_line)
+
+# intents a discovery sweep can't usefully precede
+_NO_PIPELINE = ("ping", "host_discovery", "traceroute", "save")
+
+def _run_live(intent_payload: Dict[str, Any], user_input: Optional[str], target: str, workers: Optional[int],
+              on_line: Optional[Callable[[str], None]] = None, cautioned: bool = False):
+    """Discovery-then-scan: live hosts found by a ping sweep are port-scanned in batches as they appear."""
+    fresh = _opts.fresh
+    timing = nmap_timing.AdaptiveTiming() if nmap_timing.ENABLED else None
+
+    def discover(sweep_target: str, on_live: Callable[[str], None]):
+        # runs on the pipeline's sweep thread, which has no per-call options yet
+        _opts.intent, _opts.fresh = "host_discovery", fresh
+        return _run_nmap(["nmap", "-sn", sweep_target], show_command=True, on_line=on_line,
+                         on_host=lambda host: on_live(host.address) if host.status == "up" else None)
+
+    def scan(hosts: List[str]):
+        payload = copy.deepcopy(intent_payload)
+        payload["slots"].update(target=hosts, live=False, workers=None)
+        _opts.known_up = True
+        try:
+            return _dispatch(payload, user_input, on_line, cautioned)
+        finally:
+            _opts.known_up = False
+
+    return run_pipelined(discover, timing.wrap(scan) if timing else scan, target, workers)
+
+def _scan_default(target, ports, flags, on_line=None):
+    # if UDP mode requested explicitly in slots, delegate to udp_scan
+    if flags.get("udp"):
+        return udp_scan(target, ports, on_line=on_line)
+    # handle top-ports if requested
+    if flags.get("top_n"):
+        return top_ports_scan(target, flags["top_n"], quick=flags.get("quick"), on_line=on_line)
+    # "quick": open/closed only, no -sV (served by connect_scan when small enough)
+    if flags.get("quick") and not (flags["verbose"] or flags["aggressive"]):
+        if ports:
+            return quick_port_scan(target, ports, on_line=on_line)
+        return top_ports_scan(target, 100, quick=True, on_line=on_line)
+    # choose sS if root else sT; call service_version_scan wrapper
+    return service_version_scan(target, ports=ports, verbose=flags["verbose"], aggressive=flags["aggressive"],
+                                on_line=on_line)
+
+# intent -> handler(target, ports, flags, on_line), looked up once per call
+_INTENT_HANDLERS = {
+    "nmap_scan": _scan_default,
+    "udp_scan": lambda target, ports, flags, on_line=None: udp_scan(target, ports, on_line=on_line),
+    "http_enum": lambda target, ports, flags, on_line=None: http_enum(target, on_line=on_line),
+    "smb_enum": lambda target, ports, flags, on_line=None: smb_enum(target, on_line=on_line),
+    # no second warning when handle_intent has shown the caution
+    "vuln_scan": lambda target, ports, flags, on_line=None: vuln_script_scan(
+        target, on_line=on_line, warn=not flags.get("cautioned")),
+    "ping": lambda target, ports, flags, on_line=None: host_discovery(target, on_line=on_line),
+    "host_discovery": lambda target, ports, flags, on_line=None: host_discovery(target, on_line=on_line),
+    "top_ports": lambda target, ports, flags, on_line=None: top_ports_scan(
+        target, flags.get("top_n") or 100, flags.get("quick"), on_line=on_line),
+    "full": lambda target, ports, flags, on_line=None: full_tcp_scan(target, on_line=on_line),
+    "traceroute": lambda target, ports, flags, on_line=None: traceroute_scan(target, on_line=on_line),
+    "save": lambda target, ports, flags, on_line=None: save_output_scan(target, [], on_line=on_line),
+}
+# Flags that redirect any intent other than nmap_scan/udp_scan, in precedence order.
+_FLAG_INTENTS = (("http", "http_enum"), ("smb", "smb_enum"), ("vuln", "vuln_scan"))
+
+def _resolve_intent(intent: str, flags: Dict[str, Any]) -> str:
+    if intent in ("nmap_scan", "udp_scan"):
+        return intent
+    for flag, name in _FLAG_INTENTS:
+        if intent == name or flags.get(flag):
+            return name
+    return intent
 
 
 def run_scan(user_input: str):
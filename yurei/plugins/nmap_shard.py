@@ -0,0 +1,111 @@
+# yurei/plugins/nmap_shard.py
+import copy
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Callable
+from yurei.plugins.nmap_xml import ScanResult, merge_results
+from yurei.core.output import console, carry
+from yurei.core.jobs import bind
+from yurei.core.targets import AddressSet
+
+# Each worker gets a few shards so a slow block doesn't leave the pool idle.
+SHARDS_PER_WORKER = 4
+MAX_WORKERS = 64
+
+_local = threading.local()
+
+def current_label() -> Optional[str]:
+    """Label of the shard/job running on this thread, if any (used to prefix output)."""
+    return getattr(_local, "label", None)
+
+@contextmanager
+def labelled(label: str):
+    """Prefix nmap output produced on this thread with label (nested labels are joined)."""
+    previous = current_label()
+    _local.label = f"{previous} {label}" if previous else label
+    try:
+        yield
+    finally:
+        _local.label = previous
+
+def split_target(target: Optional[str], shards: int) -> List[str]:
+    """
+    Split the addresses of a target (CIDR blocks, ranges such as
+    10.0.0.1-200, several space-separated targets) into up to `shards`
+    contiguous, equally sized sub-targets in CIDR form. Hostnames are dealt
+    out whole; anything unparseable is returned unsplit.
+    """
+    if not target or shards <= 1:
+        return [target] if target else []
+    try:
+        addresses = AddressSet.parse(target)
+    except ValueError:
+        return [target]
+    if addresses.size <= 1:
+        return [target]
+    return [str(part) for part in addresses.chunk(shards)]
+
+def run_sharded(handler: Callable[[Dict[str, Any], Optional[str]], Any],
+                intent_payload: Dict[str, Any], user_input: Optional[str],
+                target: str, workers: int):
+    """
+    Run `handler` once per shard of `target` on a pool of `workers` threads
+    (each one driving its own nmap process) and merge the results. A failing
+    shard is reported but does not abort the others.
+    """
+    workers = max(1, min(workers, MAX_WORKERS))
+    shards = split_target(target, workers * SHARDS_PER_WORKER)
+    if len(shards) <= 1:
+        return handler(intent_payload, user_input)
+
+    console.print(f"[cyan]Splitting {target} into {len(shards)} shards across {workers} workers...[/cyan]")
+    timings: Dict[str, float] = {}
+    failed: List[str] = []
+    results: Dict[int, ScanResult] = {}
+    # pool threads don't inherit the caller's label (e.g. a batch job), output target or job, so carry them over
+    outer = current_label()
+
+    def _run_one(idx: int, shard: str):
+        payload = copy.deepcopy(intent_payload)
+        payload["slots"]["target"] = shard
+        payload["slots"]["workers"] = None
+        t0 = time.perf_counter()
+        try:
+            label = f"{idx + 1}/{len(shards)}"
+            with labelled(f"{outer} {label}" if outer else label):
+                return handler(payload, user_input)
+        finally:
+            timings[shard] = time.perf_counter() - t0
+
+    wall0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nmap-shard") as pool:
+        run_one = carry(bind(_run_one))
+        futures = {pool.submit(run_one, i, shard): i for i, shard in enumerate(shards)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            idx = futures[fut]
+            shard = shards[idx]
+            try:
+                result = fut.result()
+            except Exception as e:
+                result = None
+                console.print(f"[red]Shard {shard} failed:[/red] {e}")
+            if result is None:
+                failed.append(shard)
+            else:
+                results[idx] = result
+            status = "[red]failed[/red]" if result is None else "[green]done[/green]"
+            console.print(f"[grey50][{done}/{len(shards)}][/grey50] {shard} {status} "
+                          f"in {timings.get(shard, 0.0):.1f}s")
+    wall = time.perf_counter() - wall0
+
+    serial = sum(timings.values())
+    speedup = serial / wall if wall > 0 else 1.0
+    console.print(f"[bold cyan]Sharded scan finished:[/bold cyan] {len(shards) - len(failed)}/{len(shards)} shards ok, "
+                  f"wall {wall:.1f}s vs {serial:.1f}s serial ({speedup:.1f}x speedup)")
+    if failed:
+        console.print(f"[yellow]Failed shards:[/yellow] {', '.join(failed)}")
+    if not results:
+        return None
+    return merge_results([results[i] for i in sorted(results)])
@@ -0,0 +1,327 @@
+# yurei/plugins/nmap_timing.py
+"""
+Adaptive nmap timing.
+
+Before a scan runs, a short probe phase opens TCP connections to a sample of
+the target's addresses on a few common ports. A SYN/ACK or a RST both count
+as a reply, so the connect time is a round-trip measurement. The pairs that
+answered are probed again a few times to estimate packet loss. choose() maps
+RTT and loss to a timing template, --min-rate, --max-retries, --host-timeout
+and RTT timeouts.
+
+It is opt-in (YUREI_ADAPTIVE_TIMING=1) and only used for TCP port scans:
+ping sweeps run without a probe phase, UDP and protocol scans keep nmap's
+own pacing, and scans that run scripts, version detection, -A or all ports
+get no --host-timeout, since their long runs are expected.
+
+Sharded scans share one AdaptiveTiming. Every shard starts with its current
+profile, and each finished shard feeds back nmap's measured RTTs and any
+rate-limit or retransmission warnings. A later shard can then speed up on a
+quiet LAN or back off on a lossy link.
+"""
+import ipaddress
+import itertools
+import math
+import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional, Dict, Any, List, Callable, Tuple
+from yurei.core.metrics import timed, annotate
+
+# Set YUREI_ADAPTIVE_TIMING=1 to probe before TCP port scans instead of using the helpers' fixed -T templates.
+ENABLED = os.getenv("YUREI_ADAPTIVE_TIMING", "0").lower() in ("1", "true", "yes", "on")
+PROBE_PORTS = (80, 443, 22, 445, 3389, 8080)
+PROBE_HOSTS = 8
+PROBE_REPEATS = 4
+PROBE_PAIRS = 4
+PROBE_TIMEOUT = float(os.getenv("YUREI_PROBE_TIMEOUT", "1.0"))
+
+# (tier, max avg RTT ms, max loss, -T template, --min-rate, --max-retries, --host-timeout s), fastest first
+TIERS = (
+    ("lan", 5.0, 0.01, 4, 1000, 1, 300),
+    ("fast", 40.0, 0.03, 4, 300, 2, 600),
+    ("wan", 150.0, 0.08, 3, 100, 3, 1200),
+    ("lossy", math.inf, math.inf, 3, None, 6, 1800),
+)
+MAX_HOST_TIMEOUT = 7200
+
+# nmap stderr lines that mean probes were dropped or the target rate-limits
+DROP_RE = re.compile(r"retransmission cap hit|Increasing send delay|dropped probes|rate limit", re.I)
+HOST_TIMEOUT_RE = re.compile(r"due to host timeout", re.I)
+# flags a profile replaces when it is applied to an argument vector
+_VALUE_FLAGS = {"--min-rate", "--max-retries", "--host-timeout", "--min-rtt-timeout",
+                "--initial-rtt-timeout", "--max-rtt-timeout"}
+TEMPLATE_RE = re.compile(r"^-T[0-5]$")
+# scan types that aren't TCP port scans: no probe phase, nmap's own timing
+NOT_TCP_SCANS = {"-sn", "-sP", "-sU", "-sO", "-sY", "-sZ"}
+# scans expected to run long, which a --host-timeout would cut short
+LONG_SCANS = {"-sV", "-sC", "-A", "-p-"}
+
+def _clamp(value: float, lo: float, hi: float) -> float:
+    return max(lo, min(hi, value))
+
+class TimingProfile:
+    __slots__ = ("tier", "template", "min_rate", "max_retries", "host_timeout", "min_rtt", "initial_rtt",
+                 "max_rtt", "rtt", "rtt_max", "loss", "samples", "source")
+
+    def __init__(self, tier: str, template: Optional[int] = None, min_rate: Optional[int] = None,
+                 max_retries: Optional[int] = None, host_timeout: Optional[int] = None,
+                 min_rtt: Optional[int] = None, initial_rtt: Optional[int] = None, max_rtt: Optional[int] = None,
+                 rtt: Optional[float] = None, rtt_max: Optional[float] = None, loss: Optional[float] = None,
+                 samples: int = 0, source: str = "probe"):
+        self.tier = tier
+        self.template = template
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.host_timeout = host_timeout
+        self.min_rtt = min_rtt
+        self.initial_rtt = initial_rtt
+        self.max_rtt = max_rtt
+        self.rtt = rtt
+        self.rtt_max = rtt_max
+        self.loss = loss
+        self.samples = samples
+        self.source = source
+
+    @property
+    def measured(self) -> bool:
+        return self.rtt is not None
+
+    def args(self, host_timeout: bool = True) -> List[str]:
+        """nmap flags for this profile (empty when nothing was measured)."""
+        if not self.measured:
+            return []
+        out = [f"-T{self.template}"]
+        if self.min_rate:
+            out += ["--min-rate", str(self.min_rate)]
+        out += ["--max-retries", str(self.max_retries)]
+        if host_timeout:
+            out += ["--host-timeout", f"{self.host_timeout}s"]
+        out += ["--min-rtt-timeout", f"{self.min_rtt}ms", "--initial-rtt-timeout", f"{self.initial_rtt}ms",
+                "--max-rtt-timeout", f"{self.max_rtt}ms"]
+        return out
+
+    def describe(self) -> str:
+        if not self.measured:
+            return "no probe replies; keeping nmap's default timing"
+        rate = f"min-rate {self.min_rate}/s" if self.min_rate else "no min-rate"
+        return (f"{self.tier}: rtt {self.rtt:.1f}ms (max {self.rtt_max:.1f}ms), loss {self.loss:.0%} "
+                f"-> -T{self.template}, {rate}, {self.max_retries} retries, host-timeout {self.host_timeout}s "
+                f"({self.source})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TimingProfile":
+        return cls(**{name: data.get(name) for name in cls.__slots__ if name in data})
+
+def choose(rtt: float, rtt_max: float, loss: float, samples: int = 0, source: str = "probe",
+           host_timeout: Optional[int] = None) -> TimingProfile:
+    """Pick the fastest tier the measured RTT (ms) and loss rate allow, with RTT timeouts scaled to match."""
+    for tier, max_rtt, max_loss, template, min_rate, retries, tier_timeout in TIERS:
+        if rtt <= max_rtt and loss <= max_loss:
+            break
+    # floors stay near -T5's (50/250/300ms) so a quiet LAN doesn't get timeouts nmap itself wouldn't use
+    min_rtt = int(_clamp(2 * rtt, 50, 100))
+    initial_rtt = int(_clamp(4 * rtt, 100, 1000))
+    max_rtt_ms = int(_clamp(8 * rtt_max, 300, 10000))
+    return TimingProfile(tier, template, min_rate, retries, max(host_timeout or 0, tier_timeout),
+                         min_rtt, initial_rtt, max_rtt_ms, round(rtt, 3), round(rtt_max, 3),
+                         round(loss, 3), samples, source)
+
+def sample_hosts(target: str, count: int = PROBE_HOSTS) -> List[str]:
+    """
+    Up to count addresses spread evenly across a CIDR block, last-octet range
+    or space-separated target list; other targets as-is.
+    """
+    if " " in target.strip():
+        tokens = target.split()
+        picks = sorted({(len(tokens) - 1) * i // max(1, count - 1) for i in range(count)})
+        return [sample_hosts(tokens[i], 1)[0] for i in picks]
+    m = re.match(r"^((?:\d{1,3}\.){3})(\d{1,3})-(\d{1,3})$", target)
+    if m:
+        lo, hi = int(m.group(2)), int(m.group(3))
+        picks = sorted({lo + (hi - lo) * i // max(1, count - 1) for i in range(count)}) if hi > lo else [lo]
+        return [f"{m.group(1)}{n}" for n in picks]
+    try:
+        net = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return [target]
+    size = net.num_addresses
+    if size <= 2:
+        return [str(a) for a in itertools.islice(iter(net), size)]
+    # skip the network and broadcast addresses
+    picks = sorted({1 + (size - 3) * i // max(1, count - 1) for i in range(count)})
+    return [str(net[i]) for i in picks]
+
+def _connect(addr: Tuple, family: int, timeout: float) -> Optional[float]:
+    """Connect time in ms; a refusal (RST) is a reply too. None on timeout or an unreachable host."""
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    t0 = time.perf_counter()
+    try:
+        sock.connect(addr)
+    except ConnectionRefusedError:
+        pass
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    return (time.perf_counter() - t0) * 1000.0
+
+def _resolve(host: str) -> Optional[Tuple[int, str]]:
+    try:
+        info = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return None
+    family, _, _, _, sockaddr = info[0]
+    return family, sockaddr[0]
+
+@timed("nmap.probe")
+def probe(target: str, ports=PROBE_PORTS, timeout: float = PROBE_TIMEOUT) -> TimingProfile:
+    """Measure RTT and loss to target and choose a profile from them."""
+    hosts = [r for r in map(_resolve, sample_hosts(target)) if r]
+    pairs = [(family, (addr, port)) for family, addr in hosts for port in ports]
+    if not pairs:
+        return TimingProfile("unknown")
+    with ThreadPoolExecutor(max_workers=min(32, len(pairs)), thread_name_prefix="nmap-probe") as pool:
+        first = list(pool.map(lambda p: _connect(p[1], p[0], timeout), pairs))
+        answered = [(pair, rtt) for pair, rtt in zip(pairs, first) if rtt is not None]
+        if not answered:
+            annotate(replies=0)
+            return TimingProfile("unknown", samples=len(pairs))
+        # one port per host where possible, so loss isn't measured against a single box
+        chosen, seen = [], set()
+        for pair, _ in answered:
+            if pair[1][0] not in seen:
+                seen.add(pair[1][0])
+                chosen.append(pair)
+        chosen = (chosen + [p for p, _ in answered if p not in chosen])[:PROBE_PAIRS]
+        # a reply takes at most a few times the first RTT; waiting the full timeout adds nothing
+        repeat_timeout = _clamp(max(r for _, r in answered) * 5 / 1000.0, 0.05, timeout)
+        again = list(pool.map(lambda p: _connect(p[1], p[0], repeat_timeout), chosen * PROBE_REPEATS))
+    rtts = [r for _, r in answered] + [r for r in again if r is not None]
+    loss = sum(1 for r in again if r is None) / len(again)
+    annotate(replies=len(rtts), loss=round(loss, 3))
+    return choose(sum(rtts) / len(rtts), max(rtts), loss, samples=len(pairs) + len(again))
+
+def adjust(profile: TimingProfile, result) -> TimingProfile:
+    """
+    Re-derive a profile from a finished scan: nmap's per-host srtt refines the
+    RTT estimate, each drop/rate-limit warning raises the loss estimate (their
+    absence halves it), and host timeouts double --host-timeout.
+    """
+    if not profile.measured or result is None:
+        return profile
+    srtts = [h.srtt for h in result.hosts if getattr(h, "srtt", None)]
+    rtt, rtt_max = profile.rtt, profile.rtt_max
+    if srtts:
+        rtt = 0.5 * rtt + 0.5 * sum(srtts) / len(srtts)
+        rtt_max = max(rtt, 0.5 * rtt_max + 0.5 * max(srtts))
+    drops = sum(1 for line in result.errors if DROP_RE.search(line))
+    loss = min(0.5, profile.loss + 0.02 * drops) if drops else profile.loss / 2
+    host_timeout = profile.host_timeout
+    if any(HOST_TIMEOUT_RE.search(line) for line in result.errors):
+        host_timeout = min(MAX_HOST_TIMEOUT, host_timeout * 2)
+    return choose(rtt, rtt_max, loss, profile.samples + len(srtts), "adjusted", host_timeout)
+
+def is_tcp_port_scan(args: List[str]) -> bool:
+    """Whether an nmap argument vector is a TCP port scan, the only kind timing is adapted for."""
+    return NOT_TCP_SCANS.isdisjoint(args)
+
+def is_long_scan(args: List[str]) -> bool:
+    """Scripts, version detection, -A or every port: runs that must not hit a --host-timeout."""
+    return not LONG_SCANS.isdisjoint(args) or any(a.startswith("--script") for a in args) \
+        or any(a == "-p" and v in ("-", "1-65535") for a, v in zip(args, args[1:]))
+
+def apply(args: List[str], profile: Optional[TimingProfile]) -> List[str]:
+    """
+    args with any timing flags replaced by the profile's, inserted before the
+    target (last arg). Anything but a TCP port scan is returned unchanged.
+    """
+    if profile is None or not is_tcp_port_scan(args):
+        return args
+    extra = profile.args(host_timeout=not is_long_scan(args))
+    if not extra:
+        return args
+    out, skip = [], False
+    for arg in args[:-1]:
+        if skip:
+            skip = False
+        elif arg in _VALUE_FLAGS:
+            skip = True
+        elif not TEMPLATE_RE.match(arg):
+            out.append(arg)
+    return out + extra + args[-1:]
+
+class AdaptiveTiming:
+    """
+    Timing state shared by the shards (or pipeline batches) of one scan. It
+    probes on first use, so a scan answered entirely from the cache never
+    probes. Without a target, the first scan's own target is probed.
+    """
+
+    def __init__(self, target: Optional[str] = None):
+        self.target = target
+        self.history: List[TimingProfile] = []
+        self._profile: Optional[TimingProfile] = None
+        self._lock = threading.Lock()
+
+    def current(self, target: Optional[str] = None) -> TimingProfile:
+        with self._lock:
+            if self._profile is None:
+                self._profile = probe(self.target or target)
+                self.history.append(self._profile)
+            return self._profile
+
+    def observe(self, result) -> None:
+        with self._lock:
+            if self._profile is None:
+                return
+            updated = adjust(self._profile, result)
+            if updated is not self._profile:
+                self._profile = updated
+                self.history.append(updated)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """fn run with this timing active on whichever thread calls it (e.g. a shard worker)."""
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with self.use():
+                return fn(*args, **kwargs)
+        return inner
+
+    @contextmanager
+    def use(self):
+        previous = active()
+        _local.timing = self
+        try:
+            yield self
+        finally:
+            _local.timing = previous
+
+_local = threading.local()
+
+def active() -> Optional[AdaptiveTiming]:
+    return getattr(_local, "timing", None)
+
+def profile_for(args: List[str]) -> Optional[TimingProfile]:
+    """
+    Profile for the scan about to run (target last in args): the active
+    shared timing's, else a fresh probe. None if disabled or not a TCP port scan.
+    """
+    if not ENABLED or not is_tcp_port_scan(args):
+        return None
+    timing = active()
+    return timing.current(args[-1]) if timing else probe(args[-1])
+
+def observe(result) -> None:
+    timing = active()
+    if timing is not None:
+        timing.observe(result)
@@ -0,0 +1,259 @@
+# yurei/plugins/nmap_xml.py
+"""
+Incremental parser for nmap's XML output (-oX -) and the compact result model
+handed back by the nmap plugin.
+
+Hosts are parsed one at a time as nmap finishes them and their XML subtree is
+dropped straight away, so parser memory does not grow with the size of the
+scan. Records use __slots__ and interned strings for the highly repetitive
+fields (state, protocol, service name) to keep the result itself small.
+"""
+import sys
+import xml.etree.ElementTree as ET
+from typing import Optional, List, Iterator, Callable, Dict, Any
+
+_intern = sys.intern
+
+class Script:
+    __slots__ = ("id", "output")
+
+    def __init__(self, id: str, output: str):
+        self.id = _intern(id)
+        self.output = output
+
+    def __repr__(self):
+        return f"Script({self.id!r})"
+
+class Port:
+    __slots__ = ("protocol", "portid", "state", "reason", "service", "product", "version", "extrainfo", "scripts")
+
+    def __init__(self, protocol: str, portid: int, state: str, reason: str = "",
+                 service: str = "", product: str = "", version: str = "", extrainfo: str = "",
+                 scripts: Optional[List[Script]] = None):
+        self.protocol = _intern(protocol)
+        self.portid = portid
+        self.state = _intern(state)
+        self.reason = _intern(reason)
+        self.service = _intern(service)
+        self.product = product
+        self.version = version
+        self.extrainfo = extrainfo
+        self.scripts = scripts or None
+
+    def __repr__(self):
+        return f"Port({self.portid}/{self.protocol} {self.state} {self.service})"
+
+class Host:
+    __slots__ = ("address", "addrtype", "status", "hostnames", "ports", "scripts", "srtt")
+
+    def __init__(self, address: str, addrtype: str = "ipv4", status: str = "unknown",
+                 hostnames: Optional[List[str]] = None, ports: Optional[List[Port]] = None,
+                 scripts: Optional[List[Script]] = None, srtt: Optional[float] = None):
+        self.address = address
+        self.addrtype = _intern(addrtype)
+        self.status = _intern(status)
+        self.hostnames = hostnames or []
+        self.ports = ports or []
+        self.scripts = scripts or None
+        self.srtt = srtt  # nmap's smoothed round-trip time to the host, in ms
+
+    def open_ports(self) -> List[Port]:
+        return [p for p in self.ports if p.state == "open"]
+
+    def __repr__(self):
+        return f"Host({self.address} {self.status}, {len(self.ports)} ports)"
+
+class ScanResult:
+    __slots__ = ("args", "hosts", "returncode", "started", "elapsed", "summary", "errors", "timing")
+
+    def __init__(self, args: List[str], hosts: Optional[List[Host]] = None, returncode: Optional[int] = None,
+                 started: Optional[int] = None, elapsed: Optional[float] = None, summary: str = "",
+                 errors: Optional[List[str]] = None, timing: Optional[Dict[str, Any]] = None):
+        self.args = args
+        self.hosts = hosts or []
+        self.returncode = returncode
+        self.started = started
+        self.elapsed = elapsed
+        self.summary = summary
+        self.errors = errors or []
+        # timing profile the scan ran with (see nmap_timing.TimingProfile.to_dict)
+        self.timing = timing
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    def up_hosts(self) -> List[Host]:
+        return [h for h in self.hosts if h.status == "up"]
+
+    def iter_ports(self, state: Optional[str] = "open") -> Iterator[tuple]:
+        """Yield (host, port) pairs, optionally filtered by port state."""
+        for h in self.hosts:
+            for p in h.ports:
+                if state is None or p.state == state:
+                    yield h, p
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form; hosts/ports are stored as positional lists to stay compact."""
+        def scripts(items):
+            return [[s.id, s.output] for s in items or ()]
+        return {
+            "args": self.args,
+            "returncode": self.returncode,
+            "started": self.started,
+            "elapsed": self.elapsed,
+            "summary": self.summary,
+            "errors": self.errors,
+            "timing": self.timing,
+            "hosts": [
+                [h.address, h.addrtype, h.status, h.hostnames,
+                 [[p.protocol, p.portid, p.state, p.reason, p.service, p.product, p.version, p.extrainfo,
+                   scripts(p.scripts)] for p in h.ports],
+                 scripts(h.scripts), h.srtt]
+                for h in self.hosts
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScanResult":
+        def scripts(items):
+            return [Script(i, o) for i, o in items]
+        hosts = []
+        for address, addrtype, status, hostnames, ports, hscripts, srtt in data.get("hosts", []):
+            hosts.append(Host(
+                address, addrtype, status, hostnames,
+                [Port(*fields[:8], scripts=scripts(fields[8])) for fields in ports],
+                scripts(hscripts), srtt,
+            ))
+        return cls(data.get("args", []), hosts, data.get("returncode"), data.get("started"),
+                   data.get("elapsed"), data.get("summary", ""), data.get("errors"), data.get("timing"))
+
+    def __repr__(self):
+        return f"ScanResult({len(self.hosts)} hosts, rc={self.returncode})"
+
+def _scripts(elem) -> List[Script]:
+    return [Script(s.get("id", ""), s.get("output", "")) for s in elem.iterfind("script")]
+
+def _host_from_elem(elem) -> Host:
+    status = elem.find("status")
+    address, addrtype = "", "ipv4"
+    for a in elem.iterfind("address"):
+        # prefer the IP address over the MAC address nmap reports on LANs
+        if a.get("addrtype") in ("ipv4", "ipv6") or not address:
+            address, addrtype = a.get("addr", ""), a.get("addrtype", "ipv4")
+    hostnames = [h.get("name") for h in elem.iterfind("hostnames/hostname") if h.get("name")]
+    ports = []
+    for p in elem.iterfind("ports/port"):
+        st = p.find("state")
+        svc = p.find("service")
+        ports.append(Port(
+            p.get("protocol", "tcp"),
+            int(p.get("portid", 0)),
+            st.get("state", "unknown") if st is not None else "unknown",
+            st.get("reason", "") if st is not None else "",
+            svc.get("name", "") if svc is not None else "",
+            svc.get("product", "") if svc is not None else "",
+            svc.get("version", "") if svc is not None else "",
+            svc.get("extrainfo", "") if svc is not None else "",
+            _scripts(p),
+        ))
+    hostscript = elem.find("hostscript")
+    times = elem.find("times")
+    srtt = times.get("srtt") if times is not None else None
+    return Host(
+        address,
+        addrtype,
+        status.get("state", "unknown") if status is not None else "unknown",
+        hostnames,
+        ports,
+        _scripts(hostscript) if hostscript is not None else None,
+        int(srtt) / 1000.0 if srtt and srtt.isdigit() else None,
+    )
+
+class NmapXmlParser:
+    """
+    Push parser: feed() it chunks of nmap XML as they arrive and it calls
+    on_host for every completed <host> and on_progress for every
+    <taskprogress> (task, percent, remaining seconds).
+    """
+
+    def __init__(self, on_host: Optional[Callable[[Host], None]] = None,
+                 on_progress: Optional[Callable[[str, float, Optional[int]], None]] = None):
+        self.result = ScanResult(args=[])
+        self.on_host = on_host
+        self.on_progress = on_progress
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+
+    def feed(self, data: str) -> None:
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self) -> ScanResult:
+        try:
+            self._parser.close()
+        except ET.ParseError:
+            # nmap killed mid-run: keep whatever hosts were completed
+            pass
+        self._drain()
+        return self.result
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                if self._depth == 1:
+                    self._root = elem
+                    self.result.args = (elem.get("args") or "").split()
+                    start = elem.get("start")
+                    self.result.started = int(start) if start and start.isdigit() else None
+                continue
+
+            self._depth -= 1
+            tag = elem.tag
+            if tag == "host" and self._depth == 1:
+                host = _host_from_elem(elem)
+                self.result.hosts.append(host)
+                if self.on_host:
+                    self.on_host(host)
+            elif tag == "taskprogress" and self.on_progress:
+                remaining = elem.get("remaining")
+                self.on_progress(elem.get("task", ""), float(elem.get("percent", 0) or 0),
+                                 int(remaining) if remaining and remaining.isdigit() else None)
+            elif tag == "finished":
+                elapsed = elem.get("elapsed")
+                self.result.elapsed = float(elapsed) if elapsed else None
+                self.result.summary = elem.get("summary", "")
+            if self._depth == 1 and self._root is not None:
+                # top-level child fully processed: drop its subtree
+                self._root.remove(elem)
+
+def parse_xml(source) -> ScanResult:
+    """Parse a complete nmap XML document from a string or file-like object."""
+    parser = NmapXmlParser()
+    if isinstance(source, str):
+        parser.feed(source)
+    else:
+        for chunk in iter(lambda: source.read(65536), ""):
+            parser.feed(chunk)
+    return parser.close()
+
+def merge_results(results: List[ScanResult], args: Optional[List[str]] = None) -> ScanResult:
+    """Combine several partial results (e.g. shards) into one."""
+    merged = ScanResult(args=args or (results[0].args if results else []))
+    for r in results:
+        merged.hosts.extend(r.hosts)
+        merged.errors.extend(r.errors)
+        if r.returncode and not merged.returncode:
+            merged.returncode = r.returncode
+        if r.started and (merged.started is None or r.started < merged.started):
+            merged.started = r.started
+    shard_timing = [r.timing for r in results if r.timing]
+    if shard_timing:
+        merged.timing = {"shards": shard_timing}
+    if results and merged.returncode is None:
+        merged.returncode = 0
+    up = len(merged.up_hosts())
+    merged.summary = f"{len(merged.hosts)} hosts scanned, {up} up"
+    return merged